@@ -0,0 +1,247 @@
+"""Price alert rules evaluated as prices are written.
+
+    python alerts.py add "갤럭시 S24" --below 900000
+    python alerts.py add "갤럭시 S24" --drop 10
+    python alerts.py add "갤럭시 S24" --new-low
+    python alerts.py list
+    python alerts.py events --unseen
+
+The app, scheduler.py and collector.py register an AlertEngine as a price
+listener on the DatabaseManager, so every add_prices commit is checked
+against the rules. Fired alerts are stored in alert_events and shown in the
+app (or printed by the headless runs). Rules added or removed elsewhere,
+e.g. with this CLI while the app or scheduler runs, are picked up before
+the next batch of prices is checked.
+"""
+import argparse
+import datetime
+import sys
+import threading
+import traceback
+
+from database_manager import DatabaseManager
+
+# 'drop' 규칙이 비교하는 최근 최저가 기간 (일)
+WINDOW_DAYS = 7
+
+
+def format_alert(event):
+    """One-line Korean description of an alert dict (from AlertEngine or get_alert_events)."""
+    where = f"{event['product_name']} {event.get('site_name') or ''}".strip()
+    price = f"{event['price']:,.0f}원"
+    if event['kind'] == 'below':
+        return f"{where} {price} (목표가 {event['reference']:,.0f}원 이하)"
+    if event['kind'] == 'drop':
+        pct = (event['reference'] - event['price']) / event['reference'] * 100
+        return f"{where} {price} ({WINDOW_DAYS}일 최저 {event['reference']:,.0f}원보다 {pct:.1f}% 하락)"
+    return f"{where} {price} (역대 최저가, 이전 {event['reference']:,.0f}원)"
+
+
+def print_alerts(events):
+    """Alert listener for the headless runs."""
+    for event in events:
+        print(f"알림: {format_alert(event)}", flush=True)
+
+
+class _ProductState:
+    """Rolling state for one watched product: per-site last price and daily lows, and the all-time low."""
+
+    def __init__(self, lowest):
+        self.lowest = lowest
+        self.last = {}
+        self.days = {}
+
+    def window_min(self, since):
+        lows = [low for site_days in self.days.values() for day, low in site_days.items() if day >= since]
+        return min(lows) if lows else None
+
+    def update(self, site_id, day, price, since):
+        self.last[site_id] = price
+        site_days = self.days.setdefault(site_id, {})
+        site_days[day] = min(site_days.get(day, price), price)
+        # 기간이 지난 날은 버려서 상품/쇼핑몰당 최대 WINDOW_DAYS + 1 개만 유지
+        for old in [d for d in site_days if d < since]:
+            del site_days[old]
+        if self.lowest is None or price < self.lowest:
+            self.lowest = price
+
+
+class AlertEngine:
+    """Checks new prices against the alert rules using a small in-memory state per product.
+
+    State is loaded once per watched product (from price_daily_site and
+    price_daily) and then updated from each written row, so a price costs a
+    dict lookup for unwatched products and a scan of at most WINDOW_DAYS
+    days per site otherwise, however long the history is.
+
+    A 'below' rule fires when a site's price crosses the target, a 'drop'
+    rule when a price is `threshold`% under the product's lowest price of the
+    last WINDOW_DAYS days and a 'new_low' rule when a price beats the lowest
+    ever recorded for the product on any site.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._rules = {}
+        self._names = {}
+        self._state = {}
+        self._site_names = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._version = None
+        self.reload()
+
+    def add_listener(self, callback):
+        """Call callback(events) with the alert dicts fired by each add_prices commit."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def reload(self, product_id=None):
+        """Re-read the rules (of one product, or all) and rebuild their state from the DB."""
+        # 규칙보다 먼저 읽어서, 읽는 사이에 바뀐 규칙은 다음 확인에서 다시 읽음
+        version = self.db.get_alert_rules_version() if product_id is None else None
+        rules = self.db.get_alert_rules(product_id)
+        by_product = {}
+        for rule_id, pid, name, kind, threshold in rules:
+            if kind != 'new_low' and threshold is None:
+                # 예전 버전에서 기준값 없이 저장된 규칙은 평가하지 않음
+                continue
+            by_product.setdefault(pid, []).append((rule_id, kind, threshold))
+            self._names[pid] = name
+        states = {pid: self._load_state(pid) for pid in by_product}
+        with self._lock:
+            if product_id is None:
+                self._rules = by_product
+                self._state = states
+                self._version = version
+            else:
+                self._rules.pop(product_id, None)
+                self._state.pop(product_id, None)
+                self._rules.update(by_product)
+                self._state.update(states)
+
+    def refresh(self):
+        """Reload the rules if they were added or deleted since the last full reload (e.g. by the CLI).
+
+        Registered as the `before` hook of the price listener, so new rules
+        start from the prices stored before the batch they first check.
+        """
+        if self.db.get_alert_rules_version() != self._version:
+            self.reload()
+
+    def _load_state(self, product_id):
+        lowest = self.db.get_lowest_price(product_id)
+        state = _ProductState(lowest[0] if lowest else None)
+        for site_id, day, min_price, last_price in self.db.get_recent_daily_prices(product_id, WINDOW_DAYS):
+            state.days.setdefault(site_id, {})[day] = min_price
+            state.last[site_id] = last_price
+        return state
+
+    def add_rule(self, product_id, kind, threshold=None):
+        rule_id = self.db.add_alert_rule(product_id, kind, threshold)
+        self.reload(product_id)
+        return rule_id
+
+    def delete_rule(self, rule_id, product_id):
+        self.db.delete_alert_rule(rule_id)
+        self.reload(product_id)
+
+    def on_prices(self, rows):
+        """Price listener: evaluate (product_id, site_id, price, title, url) rows, record and publish alerts."""
+        today = datetime.date.today()
+        day = today.isoformat()
+        since = (today - datetime.timedelta(days=WINDOW_DAYS)).isoformat()
+        events = []
+        with self._lock:
+            for product_id, site_id, price, *_ in rows:
+                rules = self._rules.get(product_id)
+                if not rules or not price or price <= 0:
+                    continue
+                state = self._state[product_id]
+                previous = state.last.get(site_id)
+                window_min = state.window_min(since)
+                for rule_id, kind, threshold in rules:
+                    reference = None
+                    if kind == 'below':
+                        if price <= threshold and (previous is None or previous > threshold):
+                            reference = threshold
+                    elif kind == 'drop':
+                        if window_min and price <= window_min * (1 - threshold / 100):
+                            reference = window_min
+                    elif state.lowest is not None and price < state.lowest:
+                        reference = state.lowest
+                    if reference is not None:
+                        events.append({'rule_id': rule_id, 'product_id': product_id, 'site_id': site_id,
+                                       'kind': kind, 'price': price, 'reference': reference})
+                state.update(site_id, day, price, since)
+        if not events:
+            return
+        self.db.add_alert_events(
+            (e['rule_id'], e['product_id'], e['site_id'], e['kind'], e['price'], e['reference']) for e in events
+        )
+        site_names = self._get_site_names({e['site_id'] for e in events})
+        for e in events:
+            e['product_name'] = self._names.get(e['product_id'], '')
+            e['site_name'] = site_names.get(e['site_id'], '')
+        for callback in list(self._listeners):
+            # 닫힌 UI 세션 등 한 리스너의 오류가 다른 리스너와 가격 저장 쪽으로 번지지 않게 함
+            try:
+                callback(events)
+            except Exception:
+                traceback.print_exc()
+
+    def _get_site_names(self, site_ids):
+        if not site_ids <= self._site_names.keys():
+            self._site_names = {site[0]: site[1] for site in self.db.get_sites()}
+        return self._site_names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="상품별 가격 알림 규칙을 관리하고 발생한 알림을 봅니다.")
+    parser.add_argument("--db", default="prices_mobile.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="알림 규칙 추가")
+    add.add_argument("product", help="상품 이름 (없으면 새로 등록)")
+    kind = add.add_mutually_exclusive_group(required=True)
+    kind.add_argument("--below", type=float, metavar="원", help="가격이 이 금액 이하로 내려가면 알림")
+    kind.add_argument("--drop", type=float, metavar="%", help=f"{WINDOW_DAYS}일 최저가보다 이만큼 내려가면 알림")
+    kind.add_argument("--new-low", action="store_true", help="역대 최저가를 갱신하면 알림")
+    sub.add_parser("list", help="알림 규칙 목록")
+    remove = sub.add_parser("remove", help="알림 규칙 삭제")
+    remove.add_argument("rule_id", type=int)
+    events = sub.add_parser("events", help="발생한 알림 (최근 순)")
+    events.add_argument("--unseen", action="store_true", help="확인하지 않은 알림만 보고 확인 처리")
+    events.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db)
+    try:
+        if args.command == "add":
+            product_id = db.get_or_create_product(args.product)
+            if args.below is not None:
+                rule_id = db.add_alert_rule(product_id, 'below', args.below)
+            elif args.drop is not None:
+                rule_id = db.add_alert_rule(product_id, 'drop', args.drop)
+            else:
+                rule_id = db.add_alert_rule(product_id, 'new_low')
+            print(f"규칙 {rule_id} 추가")
+        elif args.command == "list":
+            for rule_id, product_id, name, kind, threshold in db.get_alert_rules():
+                print(f"{rule_id}\t{name}\t{kind}\t{'' if threshold is None else f'{threshold:g}'}")
+        elif args.command == "remove":
+            db.delete_alert_rule(args.rule_id)
+        else:
+            for event in db.get_alert_events(unseen_only=args.unseen, limit=args.limit):
+                print(f"{event['created_at']}  {format_alert(event)}")
+            if args.unseen:
+                db.mark_alerts_seen()
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,44 +1,164 @@
+import re
+import threading
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+import soupsieve
+from concurrent.futures import as_completed
 from urllib.parse import urljoin, urlparse
 
+from extraction import read_html
+from fetch_engine import ConcurrentFetcher
+
+_COMPOUND = re.compile(r'^(?P<tag>[a-zA-Z][\w-]*)?(?P<classes>(?:\.[\w-]+)*)(?:\[(?P<attr>[\w-]+)(?:\^="(?P<prefix>[^"]*)")?\])?$')
+
+
+def compile_simple_selector(css):
+    """Compile a selector into a fast element predicate.
+
+    Handles the shapes used by the candidate lists (tag, .class, [attr],
+    [attr^="x"] and descendant combinators); anything else falls back to
+    soupsieve's matcher.
+    """
+    parts = [_COMPOUND.match(part) for part in css.split()]
+    if not all(parts):
+        return soupsieve.compile(css).match
+    compounds = [(m['tag'], [c for c in m['classes'].split('.') if c], m['attr'], m['prefix']) for m in parts]
+
+    def matches(el, compound):
+        tag, classes, attr, prefix = compound
+        if tag and el.name != tag:
+            return False
+        if classes:
+            el_classes = el.get('class') or []
+            if not all(c in el_classes for c in classes):
+                return False
+        if attr:
+            value = el.get(attr)
+            if value is None:
+                return False
+            if prefix is not None:
+                value = " ".join(value) if isinstance(value, list) else value
+                if not value.startswith(prefix):
+                    return False
+        return True
+
+    def predicate(el):
+        if not matches(el, compounds[-1]):
+            return False
+        # 나머지는 조상 중에서 순서대로 찾음 (자손 결합자)
+        pending = len(compounds) - 2
+        parent = el.parent
+        while pending >= 0 and parent is not None:
+            if parent.name != '[document]' and matches(parent, compounds[pending]):
+                pending -= 1
+            parent = parent.parent
+        return pending < 0
+
+    return predicate
+
+
 class SiteAnalyzer:
-    def __init__(self):
+    # 분석 중 같은 홈페이지/검색 결과를 반복해서 받지 않도록 캐시 유지 시간(초)
+    CACHE_TTL = 3600
+    # 분석용으로 읽는 페이지 최대 크기 (스크립트/스타일은 제외하고 보관)
+    MAX_BYTES = 2 * 1024 * 1024
+    _forms_only = SoupStrainer('form')
+    TEST_KEYWORDS = ["측기", "현장"]
+    # 앞에 있을수록 우선 (가격은 (찾을 CSS, 저장할 선택자) 쌍)
+    TITLE_CANDIDATES = ['strong[class^="_"]', 'span[class^="_"]', '.name a', '.prd_name a', '.item_name']
+    PRICE_CANDIDATES = [('span[class^="_"]', 'span[class^="_"]'), ('[ec-data-price]', '[ec-data-price]::attr(ec-data-price)'), ('.price', '.price')]
+    _title_matchers = [compile_simple_selector(css) for css in TITLE_CANDIDATES]
+    _price_matchers = [compile_simple_selector(css) for css, selector in PRICE_CANDIDATES]
+
+    def __init__(self, cache=None, fetcher=None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
         }
         self.session = requests.Session()
+        self.cache = cache
+        # 앱에서는 검색과 같은 공유 풀/호스트 제한을 사용
+        self.fetcher = fetcher or ConcurrentFetcher(max_workers=1 + 2 * len(self.TEST_KEYWORDS))
+
+    def _fetch(self, url):
+        """Return (status_code, text) for url, served from the HTTP cache when possible."""
+        entry = self.cache.get(url) if self.cache else None
+        if entry and entry['partial']:
+            # 검색에서 앞부분만 받아 둔 본문은 분석에 쓸 수 없음
+            entry = None
+        if entry and self.cache.is_fresh(entry, self.CACHE_TTL):
+            return 200, entry['body']
+        headers = dict(self.headers)
+        headers.update(self.cache.conditional_headers(entry) if self.cache else {})
+        with self.session.get(url, headers=headers, timeout=10, stream=True) as resp:
+            if resp.status_code == 304 and entry:
+                self.cache.touch(url)
+                return 200, entry['body']
+            text, info = read_html(resp, self.MAX_BYTES)
+            # 크기 제한에 걸려 잘린 본문은 캐시하지 않음
+            if resp.status_code == 200 and self.cache and info['stopped'] is None:
+                self.cache.put_response(url, resp, text)
+            return resp.status_code, text
 
-    def analyze(self, base_url):
+    def analyze(self, base_url, progress=None, cancel_event=None):
+        """Work out a site's search URL pattern and title/price selectors.
+
+        The homepage and keyword probes against the platform's guessed search
+        URL are fetched at the same time on the fetcher's pool; probes are only
+        repeated when the homepage form points somewhere else. Stops as soon as
+        both selectors are found. progress(message) is called as each stage
+        finishes. Once cancel_event is set, probes that have not sent their
+        request skip it and the result has 'cancelled': True.
+        """
+        report = progress or (lambda message: None)
         if not base_url.startswith("http"):
             base_url = "https://" + base_url
         domain = urlparse(base_url).netloc
         site_name = domain.replace('www.', '').split('.')[0]
+        cancel_event = cancel_event or threading.Event()
+        submitted = []
+
+        def submit(fn, url):
+            future = self.fetcher.submit(fn, url, cancel_event)
+            submitted.append(future)
+            return future
+
+        def cancelled():
+            return {'success': False, 'message': '분석 취소', 'site_name': site_name, 'cancelled': True}
+
         try:
-            search_pattern = self._find_search_pattern(base_url)
+            guessed_pattern = self._guess_platform_search_pattern(base_url)
+            home_future = submit(self._find_search_pattern, base_url)
+            probes = [submit(self._probe, guessed_pattern.format(kw)) for kw in self.TEST_KEYWORDS]
+            report("홈페이지와 검색 결과를 동시에 확인하는 중...")
+
+            search_pattern = home_future.result()
+            if cancel_event.is_set():
+                return cancelled()
+            if search_pattern and search_pattern != guessed_pattern:
+                for f in probes:
+                    f.cancel()
+                probes = [submit(self._probe, search_pattern.format(kw)) for kw in self.TEST_KEYWORDS]
             if not search_pattern:
-                search_pattern = self._guess_platform_search_pattern(base_url)
+                search_pattern = guessed_pattern
             if not search_pattern:
                 return {'success': False, 'message': '검색 패턴 찾기 실패', 'site_name': site_name}
+            report(f"검색 주소: {search_pattern}")
 
-            test_keywords = ["측기", "현장"]
             best_selectors = {'title': '', 'price': ''}
-            for kw in test_keywords:
-                test_url = search_pattern.format(kw)
-                try:
-                    resp = self.session.get(test_url, headers=self.headers, timeout=10)
-                    if resp.status_code == 200:
-                        soup = BeautifulSoup(resp.text, 'html.parser')
-                        selectors = self._detect_selectors(soup)
-                        if not best_selectors['title'] and selectors.get('title'):
-                            best_selectors['title'] = selectors['title']
-                        if not best_selectors['price'] and selectors.get('price'):
-                            best_selectors['price'] = selectors['price']
-                        if best_selectors['title'] and best_selectors['price']:
-                            break
-                except: continue
+            for future in as_completed(probes):
+                if cancel_event.is_set():
+                    return cancelled()
+                selectors = future.result()
+                if not best_selectors['title'] and selectors.get('title'):
+                    best_selectors['title'] = selectors['title']
+                    report(f"상품명 선택자: {selectors['title']}")
+                if not best_selectors['price'] and selectors.get('price'):
+                    best_selectors['price'] = selectors['price']
+                    report(f"가격 선택자: {selectors['price']}")
+                if best_selectors['title'] and best_selectors['price']:
+                    break
 
             return {
                 'success': True,
@@ -49,11 +169,30 @@ class SiteAnalyzer:
             }
         except Exception as e:
             return {'success': False, 'message': str(e), 'site_name': site_name}
+        finally:
+            # 아직 시작하지 않은 확인 요청은 보내지 않음
+            for future in submitted:
+                future.cancel()
 
-    def _find_search_pattern(self, base_url):
+    def _probe(self, test_url, cancel_event=None):
+        """Selectors detected on one keyword search page ({} on any failure or cancel)."""
+        if cancel_event is not None and cancel_event.is_set():
+            return {}
         try:
-            resp = self.session.get(base_url, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(resp.text, 'html.parser')
+            status, text = self._fetch(test_url)
+            if status == 200:
+                return self._detect_selectors(BeautifulSoup(text, 'html.parser'))
+        except Exception:
+            pass
+        return {}
+
+    def _find_search_pattern(self, base_url, cancel_event=None):
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        try:
+            status, text = self._fetch(base_url)
+            # 검색 폼만 필요하므로 form 요소만 트리로 만듦
+            soup = BeautifulSoup(text, 'html.parser', parse_only=self._forms_only)
             for form in soup.find_all('form'):
                 action = form.get('action', '')
                 for inp in form.find_all('input'):
@@ -72,17 +211,23 @@ class SiteAnalyzer:
         return urljoin(base_url, "/product/search.html?keyword={}")
 
     def _detect_selectors(self, soup):
-        selectors = {}
-        title_candidates = ['strong[class^="_"]', 'span[class^="_"]', '.name a', '.prd_name a', '.item_name']
-        for css in title_candidates:
-            found = soup.select(css)
-            if found:
-                selectors['title'] = css
-                break
-        price_candidates = [('span[class^="_"]', 'span[class^="_"]'), ('[ec-data-price]', '[ec-data-price]::attr(ec-data-price)'), ('.price', '.price')]
-        for css, selector in price_candidates:
-            found = soup.select(css)
-            if found:
-                selectors['price'] = selector
+        """Pick the earliest-listed title and price candidates that match, in one walk of the tree."""
+        best_title = len(self._title_matchers)
+        best_price = len(self._price_matchers)
+        for el in soup.find_all(True):
+            for i in range(best_title):
+                if self._title_matchers[i](el):
+                    best_title = i
+                    break
+            for i in range(best_price):
+                if self._price_matchers[i](el):
+                    best_price = i
+                    break
+            if best_title == 0 and best_price == 0:
                 break
+        selectors = {}
+        if best_title < len(self.TITLE_CANDIDATES):
+            selectors['title'] = self.TITLE_CANDIDATES[best_title]
+        if best_price < len(self.PRICE_CANDIDATES):
+            selectors['price'] = self.PRICE_CANDIDATES[best_price][1]
         return selectors
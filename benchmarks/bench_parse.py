@@ -0,0 +1,102 @@
+"""Per-page parse cost of each HTML backend on the saved fixture pages.
+
+    python benchmarks/bench_parse.py [--repeat 50]
+
+'legacy' is the pre-plan code path (BeautifulSoup html.parser plus
+select_one and '::attr(' splitting on every call); the other rows use a
+compiled ExtractionPlan on each installed backend.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from extraction import BACKENDS, ExtractionPlan, get_backend
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# 각 픽스처 페이지에 대해 SiteAnalyzer 가 찾아내는 것과 같은 선택자
+FIXTURE_SITES = {
+    'cafe24.html': {'title_selector': '.name a', 'price_selector': '[ec-data-price]::attr(ec-data-price)'},
+    'smartstore.html': {'title_selector': 'strong[class^="_"]', 'price_selector': 'span[class^="_"]'},
+    'generic.html': {'title_selector': '.prd_name a', 'price_selector': '.price'},
+}
+
+
+def legacy_extract(html, site_config):
+    soup = BeautifulSoup(html, 'html.parser')
+    title_element = soup.select_one(site_config['title_selector'])
+    price_selector = site_config['price_selector']
+    price_text = ""
+    if "::attr(" in price_selector:
+        parts = price_selector.split("::attr(")
+        price_element = soup.select_one(parts[0].strip())
+        if price_element:
+            price_text = price_element.get(parts[1].rstrip(")"), "")
+    else:
+        price_element = soup.select_one(price_selector)
+        if price_element:
+            price_text = price_element.get_text(strip=True)
+    if title_element and price_text:
+        return {'product_title': title_element.get_text(strip=True), 'price_text': price_text}
+    return None
+
+
+def time_per_call(fn, repeat):
+    fn()  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def load_fixtures():
+    pages = {}
+    for name in FIXTURE_SITES:
+        with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as f:
+            pages[name] = f.read()
+    return pages
+
+
+def run(repeat=50):
+    """Return {fixture: {backend: ms_per_page}}."""
+    backends = []
+    for name in BACKENDS:
+        try:
+            backends.append(get_backend(name))
+        except ImportError:
+            pass
+
+    results = {}
+    for fixture, html in load_fixtures().items():
+        site = dict(FIXTURE_SITES[fixture], name=fixture)
+        expected = legacy_extract(html, site)
+        row = {'legacy': time_per_call(lambda: legacy_extract(html, site), repeat)}
+        for backend in backends:
+            plan = ExtractionPlan(site, backend)
+            found = plan.extract(html, 'http://fixture/')
+            if not found or found['price_text'] != expected['price_text']:
+                raise AssertionError(f'{backend.name} disagrees with legacy on {fixture}: {found} != {expected}')
+            row[backend.name] = time_per_call(lambda: plan.extract(html, 'http://fixture/'), repeat)
+        results[fixture] = row
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    columns = list(next(iter(results.values())))
+    print(f"{'fixture':<18}" + ''.join(f'{c:>12}' for c in columns) + '   (ms/page)')
+    for fixture, row in results.items():
+        print(f'{fixture:<18}' + ''.join(f'{row[c]:>12.2f}' for c in columns))
+
+
+if __name__ == '__main__':
+    main()
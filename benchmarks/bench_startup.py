@@ -0,0 +1,97 @@
+"""Cold-start timing of the app: time to first frame and to loaded lists.
+
+Each sample is a fresh interpreter that imports main.py and builds
+PriceCompareMobile on a stand-in page object, against a database that
+already holds sites, products and prices.
+
+    python benchmarks/bench_startup.py --repeat 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+# 자식 프로세스에서 실행: page.add (첫 화면) 와 목록 표시 시점을 기록
+CHILD = r'''
+import json, time
+t0 = time.perf_counter()
+import main
+imported = time.perf_counter()
+marks = {}
+
+class Page:
+    def add(self, *controls):
+        marks.setdefault('first_frame', time.perf_counter())
+    def update(self, *controls):
+        pass
+    def run_threadsafe(self, fn, *args):
+        fn(*args)
+    def launch_url(self, url):
+        pass
+
+app = main.PriceCompareMobile(Page())
+while not getattr(app, 'site_list', None) or not app.site_list.controls:
+    if time.perf_counter() - t0 > 10:
+        break
+    time.sleep(0.001)
+else:
+    marks['lists'] = time.perf_counter()
+ms = lambda t: (t - t0) * 1000 if t else None
+print(json.dumps({'import_ms': ms(imported), 'first_frame_ms': ms(marks.get('first_frame')),
+                  'lists_ms': ms(marks.get('lists'))}))
+'''
+
+
+def _prepare_db(path, n_sites=10, n_products=200):
+    from database_manager import DatabaseManager
+    db = DatabaseManager(path)
+    for i in range(n_sites):
+        db.add_site(f'site{i}', f'http://site{i}.example/?q={{}}', '.name a', '.price')
+    rows = []
+    for p in range(n_products):
+        product_id = db.get_or_create_product(f'product{p}')
+        rows.extend((product_id, s + 1, 1000 + p, 't', 'u') for s in range(n_sites))
+    db.add_prices(rows)
+    db.close()
+
+
+def run(repeat=5):
+    """Median/max of each startup mark over `repeat` fresh processes, or None without flet."""
+    try:
+        import flet  # noqa: F401
+    except ImportError:
+        return None
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # main.py 는 현재 디렉터리의 prices_mobile.db 를 사용
+        _prepare_db(os.path.join(tmp, 'prices_mobile.db'))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+        for _ in range(repeat):
+            started = time.perf_counter()
+            proc = subprocess.run([sys.executable, '-c', CHILD], cwd=tmp, env=env, capture_output=True, text=True)
+            if proc.returncode:
+                # 설치된 flet 버전과 UI 코드가 맞지 않는 경우 등
+                return {'error': (proc.stderr.strip().splitlines() or ['exit %d' % proc.returncode])[-1]}
+            sample = json.loads(proc.stdout.strip().splitlines()[-1])
+            sample['process_ms'] = (time.perf_counter() - started) * 1000
+            samples.append(sample)
+    results = {}
+    for key in ('import_ms', 'first_frame_ms', 'lists_ms', 'process_ms'):
+        values = sorted(s[key] for s in samples if s[key] is not None)
+        if values:
+            results[key] = {'p50': values[len(values) // 2], 'max': values[-1]}
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
@@ -0,0 +1,172 @@
+"""Local HTTP server that imitates many shopping malls' search pages.
+
+Every mall lives under /mall/<n>/ and uses one of three layouts
+(Cafe24 `[ec-data-price]`, smartstore `span[class^="_"]`, generic `.price`).
+Latency, error rate and page size are configurable so benchmarks can model
+slow or flaky sites without touching the network.
+
+    python benchmarks/fixture_server.py --port 8765 --latency 0.05 0.4
+"""
+import argparse
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+LAYOUTS = ('cafe24', 'smartstore', 'generic')
+
+# 레이아웃별로 SiteAnalyzer 가 찾아내는 것과 같은 선택자
+LAYOUT_SELECTORS = {
+    'cafe24': ('.name a', '[ec-data-price]::attr(ec-data-price)'),
+    'smartstore': ('strong[class^="_"]', 'span[class^="_"]'),
+    'generic': ('.prd_name a', '.price'),
+}
+
+
+def _items(layout, keyword, rng, count):
+    items = []
+    for i in range(count):
+        price = rng.randint(10, 900) * 100
+        name = f'{keyword} 상품 {i}'
+        if layout == 'cafe24':
+            items.append(
+                f'<li class="xans-record-"><div class="description" ec-data-price="{price}">'
+                f'<strong class="name"><a href="/product/detail.html?product_no={i}"><span>{name}</span></a></strong>'
+                f'<ul class="spec"><li><span>{price:,}원</span></li></ul></div></li>'
+            )
+        elif layout == 'smartstore':
+            items.append(
+                f'<li class="_3S7Ho5J2Ql"><a class="_2id8yXpK_k" href="/products/{1000 + i}">'
+                f'<strong class="_1Zvjahn0GA">{name}</strong></a>'
+                f'<div class="_23DThs7PLJ"><span class="_2DywKu0J_8">{price:,}</span>원</div></li>'
+            )
+        else:
+            items.append(
+                f'<div class="item"><div class="prd_name"><a href="/goods/view?no={i}">{name}</a></div>'
+                f'<div class="info"><span class="price">{price:,}원</span></div></div>'
+            )
+    return items
+
+
+def render_page(layout, keyword, page_kb=64, items=40, seed=0):
+    """A deterministic search results page of roughly page_kb kilobytes."""
+    rng = random.Random(zlib.crc32(f'{layout}:{keyword}:{seed}'.encode()))
+    body = ''.join(_items(layout, keyword, rng, items))
+    nav = ''.join(f'<li><a href="/category/{i}">카테고리 {i}</a></li>' for i in range(30))
+    head = '<!DOCTYPE html><html lang="ko"><head><meta charset="utf-8"><title>검색결과</title>'
+    tail = '</body></html>'
+    page = (f'{head}</head><body><header><ul>{nav}</ul>'
+            f'<form action="/product/search.html"><input name="keyword"></form></header>'
+            f'<ul class="prdList">{body}</ul>')
+    # 실제 쇼핑몰처럼 나머지 용량은 인라인 스크립트로 채움
+    padding = page_kb * 1024 - len(page.encode('utf-8')) - len(tail)
+    if padding > 40:
+        page += '<script>window.__STATE__="' + 'x' * (padding - 40) + '";</script>'
+    return page + tail
+
+
+class FixtureServer:
+    """Runs the fixture HTTP server on a background thread.
+
+    latency is a (min, max) range in seconds per request; error_rate is the
+    fraction of requests answered with HTTP 503. Per-mall overrides can be
+    given as {mall_index: {'latency': (a, b), 'error_rate': x}}.
+    """
+
+    def __init__(self, n_malls=10, latency=(0.0, 0.0), error_rate=0.0, page_kb=64,
+                 items=40, overrides=None, host='127.0.0.1', port=0):
+        self.n_malls = n_malls
+        self.latency = latency
+        self.error_rate = error_rate
+        self.page_kb = page_kb
+        self.items = items
+        self.overrides = overrides or {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                parsed = urlparse(self.path)
+                parts = parsed.path.strip('/').split('/')
+                if len(parts) < 2 or parts[0] != 'mall' or not parts[1].isdigit():
+                    return self._send(404, b'not found')
+                mall = int(parts[1])
+                cfg = server.overrides.get(mall, {})
+                low, high = cfg.get('latency', server.latency)
+                if high:
+                    time.sleep(random.uniform(low, high))
+                if random.random() < cfg.get('error_rate', server.error_rate):
+                    return self._send(503, b'unavailable')
+                keyword = parse_qs(parsed.query).get('keyword', [''])[0]
+                layout = LAYOUTS[mall % len(LAYOUTS)]
+                page = render_page(layout, keyword, cfg.get('page_kb', server.page_kb), server.items, mall)
+                self._send(200, page.encode('utf-8'))
+
+            def _send(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def site_configs(self):
+        """(name, url_pattern, title_selector, price_selector) for every mall."""
+        configs = []
+        for mall in range(self.n_malls):
+            title, price = LAYOUT_SELECTORS[LAYOUTS[mall % len(LAYOUTS)]]
+            configs.append((f'mall{mall}', f'{self.base_url}/mall/{mall}/search?keyword={{}}', title, price))
+        return configs
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='쇼핑몰 검색 페이지를 흉내 내는 로컬 서버')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--malls', type=int, default=10)
+    parser.add_argument('--latency', type=float, nargs=2, default=(0.0, 0.0), metavar=('MIN', 'MAX'))
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--page-kb', type=int, default=64)
+    args = parser.parse_args()
+    server = FixtureServer(args.malls, tuple(args.latency), args.error_rate, args.page_kb, port=args.port)
+    for name, pattern, title, price in server.site_configs():
+        print(f'{name}: {pattern}  title={title} price={price}')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
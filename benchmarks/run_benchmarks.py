@@ -0,0 +1,281 @@
+"""Offline benchmark suite: end-to-end search, parsing, database throughput and app startup.
+
+    python benchmarks/run_benchmarks.py                       # default (small) sizes
+    python benchmarks/run_benchmarks.py --db-rows 10000 1000000 10000000
+    python benchmarks/run_benchmarks.py --output new.json --compare old.json
+
+Results are written as JSON so runs from different versions can be
+compared with --compare.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from database_manager import DatabaseManager
+from fetch_engine import ConcurrentFetcher
+from scraper import PriceScraper
+from search_jobs import SearchCoordinator
+
+import bench_parse
+import bench_startup
+from fixture_server import LAYOUTS, LAYOUT_SELECTORS, FixtureServer, render_page
+
+
+def percentiles(samples):
+    """p50/p95/p99/mean/max (in the samples' unit) of a list of numbers."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        'n': len(ordered),
+        'p50': pick(0.50),
+        'p95': pick(0.95),
+        'p99': pick(0.99),
+        'mean': sum(ordered) / len(ordered),
+        'max': ordered[-1],
+    }
+
+
+def bench_search(n_malls, searches, latency, error_rate, page_kb, workers):
+    """End-to-end SearchCoordinator.search (the run_scraping path) against the fixture server."""
+    with FixtureServer(n_malls, latency, error_rate, page_kb) as server, tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'bench.db'))
+        for config in server.site_configs():
+            db.add_site(*config)
+        fetcher = ConcurrentFetcher(max_workers=workers, per_host_limit=workers, deadline=60)
+        # 캐시/당일 결과 재사용을 끄고 매번 실제 요청을 보냄
+        searcher = SearchCoordinator(db, PriceScraper(pool_size=workers), fetcher, freshness=0)
+        latencies = []
+        failures = 0
+        started = time.perf_counter()
+        for i in range(searches):
+            t0 = time.perf_counter()
+            results = searcher.search(f'bench{i}')
+            latencies.append((time.perf_counter() - t0) * 1000)
+            failures += sum(1 for site, res in results if not res['success'])
+        elapsed = time.perf_counter() - started
+        db.close()
+    return {
+        'malls': n_malls,
+        'searches': searches,
+        'latency_range_s': list(latency),
+        'error_rate': error_rate,
+        'page_kb': page_kb,
+        'searches_per_sec': searches / elapsed,
+        'site_failures': failures,
+        'latency_ms': percentiles(latencies),
+        'server_requests': server.requests,
+    }
+
+
+def bench_scrape_parse(page_kb, repeat):
+    """Per-page extraction cost inside scrape_site for each synthetic layout."""
+    scraper = PriceScraper()
+    results = {'backend': scraper.backend.name, 'page_kb': page_kb}
+    for layout in LAYOUTS:
+        title, price = LAYOUT_SELECTORS[layout]
+        site = {'id': layout, 'name': layout, 'title_selector': title, 'price_selector': price}
+        html = render_page(layout, 'bench', page_kb)
+        plan = scraper.plan_for(site)
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            plan.extract_all(html, 'http://fixture/', scraper.max_offers)
+            samples.append((time.perf_counter() - t0) * 1000)
+        results[layout] = percentiles(samples)
+    results['fixtures_ms_per_page'] = bench_parse.run(max(5, repeat // 4))
+    return results
+
+
+def _fill_prices(db, total_rows, n_sites=10):
+    """Bulk-load roughly total_rows daily price rows spread over products, sites and days."""
+    conn = db.get_connection()
+    with conn:
+        conn.executemany('INSERT INTO sites (name, url_pattern) VALUES (?, ?)',
+                         [(f'site{i}', f'http://site{i}/?q={{}}') for i in range(n_sites)])
+    days = min(730, max(1, total_rows // (n_sites * 10)))
+    n_products = max(1, total_rows // (n_sites * days))
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    rng = random.Random(1)
+    with conn:
+        conn.executemany('INSERT INTO products (name) VALUES (?)', [(f'product{i}',) for i in range(n_products)])
+        for product_id in range(1, n_products + 1):
+            rows = []
+            for d in range(days):
+                day = start + datetime.timedelta(days=d)
+                stamp = f'{day.isoformat()} 03:00:00'
+                for site_id in range(1, n_sites + 1):
+                    rows.append((product_id, site_id, rng.randint(100, 900) * 100, 't', 'u', stamp, day.isoformat()))
+            conn.executemany('''
+                INSERT INTO prices (product_id, site_id, price, product_title, product_url, scraped_at, day)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+    return n_products, n_sites, days
+
+
+def bench_db(total_rows, queries):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'bench.db'))
+        t0 = time.perf_counter()
+        n_products, n_sites, days = _fill_prices(db, total_rows)
+        fill_s = time.perf_counter() - t0
+        rows = db.get_connection().execute('SELECT COUNT(*) FROM prices').fetchone()[0]
+        rng = random.Random(2)
+
+        # 검색 한 번 분량(사이트 수만큼)의 행을 add_prices 로 기록
+        insert_samples = []
+        for _ in range(queries):
+            product_id = rng.randint(1, n_products)
+            batch = [(product_id, s, rng.randint(100, 900) * 100, 't', 'u') for s in range(1, n_sites + 1)]
+            t = time.perf_counter()
+            db.add_prices(batch)
+            insert_samples.append((time.perf_counter() - t) * 1000)
+
+        history_samples = []
+        fresh_samples = []
+        summary_samples = []
+        for _ in range(queries):
+            product_id = rng.randint(1, n_products)
+            t = time.perf_counter()
+            db.get_price_history_buckets(product_id, max_points=90)
+            history_samples.append((time.perf_counter() - t) * 1000)
+            t = time.perf_counter()
+            db.get_fresh_result(product_id, rng.randint(1, n_sites), 3600)
+            fresh_samples.append((time.perf_counter() - t) * 1000)
+            t = time.perf_counter()
+            db.get_price_summary(product_id)
+            summary_samples.append((time.perf_counter() - t) * 1000)
+
+        # 입력 중 자동완성 / 상품 선택 목록 필터 (FTS 접두어 검색)
+        suggest_samples = []
+        for _ in range(queries):
+            name = f'product{rng.randint(0, n_products - 1)}'
+            t = time.perf_counter()
+            db.get_suggestions(name[:rng.randint(1, len(name))])
+            db.find_products(name[:rng.randint(1, len(name))])
+            suggest_samples.append((time.perf_counter() - t) * 1000 / 2)
+
+        t = time.perf_counter()
+        db.get_refresh_candidates(6 * 3600)
+        refresh_ms = (time.perf_counter() - t) * 1000
+        db.close()
+    insert_stats = percentiles(insert_samples)
+    return {
+        'rows': rows,
+        'products': n_products,
+        'sites': n_sites,
+        'days': days,
+        'fill_rows_per_sec': rows / fill_s if fill_s else None,
+        'add_prices_batch_ms': insert_stats,
+        'add_prices_rows_per_sec': n_sites * 1000 / insert_stats['mean'] if insert_stats['mean'] else None,
+        'history_buckets_ms': percentiles(history_samples),
+        'fresh_result_ms': percentiles(fresh_samples),
+        'price_summary_ms': percentiles(summary_samples),
+        'suggest_ms': percentiles(suggest_samples),
+        'refresh_candidates_ms': refresh_ms,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for k, v in value.items():
+            _flatten(f'{prefix}.{k}' if prefix else k, v, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+    return out
+
+
+def compare(old, new):
+    """Print every numeric metric present in both result files with its relative change."""
+    old_flat = _flatten('', old['results'], {})
+    new_flat = _flatten('', new['results'], {})
+    print(f"{'metric':<70}{'old':>12}{'new':>12}{'change':>10}")
+    for key in sorted(old_flat.keys() & new_flat.keys()):
+        a, b = old_flat[key], new_flat[key]
+        change = f'{(b - a) / a * 100:+.1f}%' if a else ''
+        print(f'{key:<70}{a:>12.3f}{b:>12.3f}{change:>10}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--malls', type=int, default=10)
+    parser.add_argument('--searches', type=int, default=20)
+    parser.add_argument('--latency', type=float, nargs=2, default=(0.02, 0.2), metavar=('MIN', 'MAX'))
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--page-kb', type=int, default=128)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--parse-repeat', type=int, default=40)
+    parser.add_argument('--db-rows', type=int, nargs='*', default=[10000, 100000])
+    parser.add_argument('--db-queries', type=int, default=50)
+    parser.add_argument('--startup-repeat', type=int, default=5)
+    parser.add_argument('--skip', nargs='*', default=[], choices=['search', 'parse', 'db', 'startup'])
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='이전 결과 JSON 과 비교')
+    args = parser.parse_args()
+
+    results = {}
+    if 'search' not in args.skip:
+        print('search ...', flush=True)
+        results['search'] = bench_search(args.malls, args.searches, tuple(args.latency),
+                                         args.error_rate, args.page_kb, args.workers)
+    if 'parse' not in args.skip:
+        print('parse ...', flush=True)
+        results['parse'] = bench_scrape_parse(args.page_kb, args.parse_repeat)
+    if 'db' not in args.skip:
+        results['db'] = {}
+        for rows in args.db_rows:
+            print(f'db {rows} rows ...', flush=True)
+            results['db'][str(rows)] = bench_db(rows, args.db_queries)
+    if 'startup' not in args.skip:
+        print('startup ...', flush=True)
+        startup = bench_startup.run(args.startup_repeat)
+        if startup is None:
+            print('  flet 이 설치되어 있지 않아 건너뜀', flush=True)
+        else:
+            results['startup'] = startup
+
+    report = {
+        'meta': {
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f'-> {args.output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""Headless bulk price collection over the registered sites.
+
+    python collector.py --keywords keywords.txt --threads 32 --processes 4 --jsonl prices.jsonl
+    python collector.py --all-products --resume
+
+Pages are fetched on a thread pool (with the usual per-host limit) and,
+with --processes, parsed on a process pool. Results are written to SQLite
+in batches from a single thread; each committed (keyword, site) pair is
+appended to a checkpoint file so an interrupted run can be resumed.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from alerts import AlertEngine, print_alerts
+from database_manager import DatabaseManager
+from extraction import ExtractionPlan, get_backend
+from fetch_engine import ConcurrentFetcher
+from http_cache import HttpCache
+from scraper import PriceScraper
+from site_health import FAILURE_OUTCOMES, SiteHealth
+
+# 프로세스 풀 워커마다 한 번씩만 만드는 파서와 선택자
+_worker_backend = None
+_worker_plans = {}
+
+
+def _init_worker(backend_name):
+    global _worker_backend
+    _worker_backend = get_backend(backend_name)
+
+
+def parse_page(site_config, html, url, limit):
+    """Runs in a worker process: (listings, timings) for one fetched page."""
+    plan = _worker_plans.get(site_config['id'])
+    if plan is None or not plan.matches(site_config):
+        plan = ExtractionPlan(site_config, _worker_backend)
+        _worker_plans[site_config['id']] = plan
+    timings = {}
+    found = plan.extract_all(html, url, limit, timings)
+    return found, timings
+
+
+def read_keywords(path):
+    """Non-empty lines of a UTF-8 keyword file; lines starting with # are skipped."""
+    with open(path, encoding='utf-8') as f:
+        keywords = [line.strip() for line in f]
+    return list(dict.fromkeys(k for k in keywords if k and not k.startswith('#')))
+
+
+class BatchCollector:
+    """Scrapes every (product, site) pair once and stores the results.
+
+    `threads` bounds concurrent requests, `processes` (0 = parse on the fetch
+    threads) bounds concurrent HTML parsing. Prices, offers and site metrics
+    are written every `batch_size` results in one transaction.
+    """
+
+    def __init__(self, db, scraper, threads=16, processes=0, per_host_limit=2, batch_size=200,
+                 jsonl_path=None, checkpoint_path=None):
+        self.db = db
+        self.scraper = scraper
+        self.fetcher = ConcurrentFetcher(max_workers=threads, per_host_limit=per_host_limit, deadline=None)
+        self.processes = processes
+        self.batch_size = batch_size
+        self.jsonl_path = jsonl_path
+        self.checkpoint_path = checkpoint_path
+
+    def load_checkpoint(self):
+        """Set of (keyword, site_id) pairs already stored by an earlier run."""
+        done = set()
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        keyword, site_id = json.loads(line)
+                    except ValueError:
+                        continue  # 중단 시 마지막 줄이 잘렸을 수 있음
+                    done.add((keyword, site_id))
+        return done
+
+    def build_tasks(self, products, resume=False):
+        """One task per (product, active site) pair not yet in the checkpoint."""
+        done = self.load_checkpoint() if resume else set()
+        sites = self.db.get_site_configs()
+        # 키워드 단위로 사이트를 번갈아 배치해야 호스트별 제한에 덜 막힘
+        return [
+            dict(site, keyword=keyword, product_id=product_id)
+            for product_id, keyword in products
+            for site in sites
+            if (keyword, site['id']) not in done
+        ]
+
+    def run(self, products, resume=False, progress=None):
+        """Collect prices for [(product_id, keyword)]. Returns a stats dict."""
+        tasks = self.build_tasks(products, resume)
+        stats = {'tasks': len(tasks), 'ok': 0, 'not_found': 0, 'failed': 0, 'skipped': 0}
+        if not resume and self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        mode = 'a' if resume else 'w'
+        jsonl = open(self.jsonl_path, mode, encoding='utf-8') if self.jsonl_path else None
+        checkpoint = open(self.checkpoint_path, 'a', encoding='utf-8') if self.checkpoint_path else None
+        pool = None
+        if self.processes:
+            pool = ProcessPoolExecutor(self.processes, initializer=_init_worker,
+                                       initargs=(self.scraper.backend.name,))
+        rows, offer_rows, metrics, lines, done = [], [], [], [], []
+
+        def extract(site_config, html, url, limit, timings=None):
+            found, child_timings = pool.submit(parse_page, site_config, html, url, limit).result()
+            if timings is not None:
+                timings.update(child_timings)
+            return found
+
+        def scrape(task):
+            return self.scraper.scrape_site(task, task['keyword'], extract=extract if pool else None)
+
+        def flush():
+            started = time.perf_counter()
+            self.db.add_prices(rows, offer_rows)
+            write_ms = (time.perf_counter() - started) * 1000
+            for _, m in metrics:
+                if m.get('outcome') == 'ok':
+                    m['db_write_ms'] = write_ms
+            self.db.add_site_metrics(metrics)
+            if jsonl:
+                jsonl.writelines(lines)
+                jsonl.flush()
+            # DB 에 커밋된 뒤에만 체크포인트에 기록
+            if checkpoint:
+                checkpoint.writelines(json.dumps(pair, ensure_ascii=False) + '\n' for pair in done)
+                checkpoint.flush()
+            for pending in (rows, offer_rows, metrics, lines, done):
+                pending.clear()
+
+        started = time.monotonic()
+        count = 0
+        try:
+            for task, res in self.fetcher.map_sites(scrape, tasks):
+                count += 1
+                m = res.get('metrics')
+                outcome = m['outcome'] if m else ('skipped' if res.get('skipped') else 'error')
+                if m:
+                    metrics.append((task['id'], m))
+                if res['success']:
+                    stats['ok'] += 1
+                    rows.append((task['product_id'], task['id'], res['price'], res['product_title'], res['url']))
+                    offer_rows.extend(
+                        (task['product_id'], task['id'], rank, o['price'], o['product_title'], o['url'])
+                        for rank, o in enumerate(res['offers'])
+                    )
+                elif outcome == 'not_found':
+                    stats['not_found'] += 1
+                elif outcome == 'skipped':
+                    stats['skipped'] += 1
+                else:
+                    stats['failed'] += 1
+                # 네트워크 실패와 서킷 차단은 재개 시 다시 시도
+                if outcome not in FAILURE_OUTCOMES and outcome != 'skipped':
+                    done.append((task['keyword'], task['id']))
+                if jsonl:
+                    lines.append(json.dumps({
+                        'keyword': task['keyword'],
+                        'site_id': task['id'],
+                        'site': task['name'],
+                        'success': res['success'],
+                        'price': res.get('price'),
+                        'product_title': res.get('product_title'),
+                        'url': res.get('url'),
+                        'offers': res.get('offers', []),
+                        'outcome': outcome,
+                        'error': res.get('error'),
+                        'scraped_at': datetime.datetime.now().isoformat(timespec='seconds'),
+                    }, ensure_ascii=False) + '\n')
+                if count % self.batch_size == 0:
+                    flush()
+                    if progress:
+                        progress(count, len(tasks), time.monotonic() - started)
+        finally:
+            flush()
+            if pool:
+                pool.shutdown(cancel_futures=True)
+            if jsonl:
+                jsonl.close()
+            if checkpoint:
+                checkpoint.close()
+        stats['elapsed_s'] = time.monotonic() - started
+        stats['pairs_per_sec'] = count / stats['elapsed_s'] if stats['elapsed_s'] else 0.0
+        # 실패 없이 끝까지 마친 실행은 체크포인트가 필요 없음 (실패가 있으면 --resume 으로 재시도)
+        if count == len(tasks) and not stats['failed'] and not stats['skipped'] and self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="등록된 쇼핑몰에서 여러 상품 가격을 한 번에 수집합니다 (UI 없이 실행).")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--keywords", help="한 줄에 하나씩 검색어가 적힌 파일")
+    source.add_argument("--all-products", action="store_true", help="products 테이블의 모든 상품")
+    parser.add_argument("--db", default="prices_mobile.db")
+    parser.add_argument("--threads", type=int, default=16, help="동시 요청 수")
+    parser.add_argument("--processes", type=int, default=0, help="HTML 파싱 프로세스 수 (0 이면 요청 스레드에서 파싱)")
+    parser.add_argument("--per-host", type=int, default=2, help="쇼핑몰당 동시 요청 수")
+    parser.add_argument("--batch-size", type=int, default=200, help="한 번에 DB 에 쓰는 결과 수")
+    parser.add_argument("--jsonl", help="결과를 JSON Lines 로도 기록할 파일")
+    parser.add_argument("--checkpoint", default="collector.checkpoint", help="진행 상황 파일")
+    parser.add_argument("--resume", action="store_true", help="체크포인트 이후부터 이어서 수집")
+    parser.add_argument("--no-cache", action="store_true", help="HTTP 캐시를 쓰지 않음")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db)
+    if args.keywords:
+        products = [(db.get_or_create_product(k), k) for k in read_keywords(args.keywords)]
+    else:
+        products = [(pid, name) for pid, name in db.get_all_products()]
+    alerts = AlertEngine(db)
+    db.add_price_listener(alerts.on_prices, before=alerts.refresh)
+    alerts.add_listener(print_alerts)
+    health = SiteHealth()
+    health.seed(db.get_site_health_history())
+    scraper = PriceScraper(pool_size=args.threads, cache=None if args.no_cache else HttpCache("http_cache.db"),
+                           health=health)
+    collector = BatchCollector(db, scraper, threads=args.threads, processes=args.processes,
+                               per_host_limit=args.per_host, batch_size=args.batch_size,
+                               jsonl_path=args.jsonl, checkpoint_path=args.checkpoint)
+
+    def progress(done, total, elapsed):
+        print(f"{done}/{total} ({done / elapsed:.1f}/s)", file=sys.stderr, flush=True)
+
+    try:
+        stats = collector.run(products, resume=args.resume, progress=progress)
+    except KeyboardInterrupt:
+        print("중단됨: --resume 으로 이어서 수집할 수 있습니다.", file=sys.stderr)
+        return 130
+    finally:
+        db.close()
+    print(f"{stats['tasks']}건 중 성공 {stats['ok']}, 결과 없음 {stats['not_found']}, "
+          f"실패 {stats['failed']}, 건너뜀 {stats['skipped']} "
+          f"({stats['elapsed_s']:.1f}s, {stats['pairs_per_sec']:.1f}/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,107 @@
 import sqlite3
 import datetime
+import threading
+import traceback
+
+from site_health import FAILURE_OUTCOMES
+
+# PRAGMA user_version 으로 관리하는 스키마 버전
+SCHEMA_VERSION = 12
+
+# 사이트별로 보관하는 최근 요청 측정값 개수
+METRICS_PER_SITE = 200
+
+# 보관하는 정리 작업 기록 개수
+MAINTENANCE_LOG_SIZE = 50
+
+# 보관하는 가격 알림 개수
+ALERT_EVENTS_KEPT = 500
+
+# 알림 규칙 종류: 목표가 이하, 7일 최저가 대비 N% 하락, 역대 최저가 갱신
+ALERT_KINDS = ('below', 'drop', 'new_low')
+
+
+def _execute_script(cursor, script):
+    """Run a multi-statement script with execute() so it stays in the current transaction.
+
+    cursor.executescript() commits first, which would split a migration
+    step from the user_version bump.
+    """
+    statement = ''
+    for part in script.split(';'):
+        statement += part + ';'
+        # 트리거 본문의 ; 는 END 까지 이어 붙임
+        if sqlite3.complete_statement(statement):
+            if statement.strip().rstrip(';').strip():
+                cursor.execute(statement)
+            statement = ''
+
 
 class DatabaseManager:
-    def __init__(self, db_name="prices.db"):
+    # 연결 시 적용하는 PRAGMA (WAL: 스크래핑 쓰기 중에도 UI 읽기가 막히지 않음)
+    PRAGMAS = (
+        # 새 DB 파일에만 적용됨 (기존 파일은 vacuum() 에서 한 번 변환)
+        'PRAGMA auto_vacuum = INCREMENTAL',
+        'PRAGMA journal_mode = WAL',
+        'PRAGMA synchronous = NORMAL',
+        'PRAGMA cache_size = -8000',      # 약 8MB 페이지 캐시
+        'PRAGMA mmap_size = 67108864',    # 64MB
+        'PRAGMA temp_store = MEMORY',
+    )
+
+    def __init__(self, db_name="prices.db", busy_timeout=10.0):
         self.db_name = db_name
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections = {}
+        self._connections_lock = threading.Lock()
+        self._site_listeners = []
+        self._price_listeners = []
+        self._fts = None
         self.create_tables()
 
     def get_connection(self):
-        return sqlite3.connect(self.db_name)
+        """Return this thread's long-lived connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # timeout 은 sqlite busy handler 로 동작 (잠금 시 즉시 실패하지 않고 대기)
+            conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout, check_same_thread=False)
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._prune_dead_connections()
+                self._connections[threading.get_ident()] = (threading.current_thread(), conn)
+        return conn
+
+    def _prune_dead_connections(self):
+        # 검색마다 새 스레드가 생기므로 끝난 스레드의 연결은 정리
+        for ident, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                conn.close()
+                del self._connections[ident]
+
+    def close(self):
+        """Close every connection opened by any thread."""
+        with self._connections_lock:
+            for thread, conn in self._connections.values():
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
 
     def create_tables(self):
         """Create necessary tables if they don't exist."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            # 이미 최신 스키마면 DDL 을 건너뜀 (앱 시작 시간 단축)
+            if cursor.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION:
+                return
+            # sqlite3 모듈은 DDL 앞에서 트랜잭션을 열지 않으므로 직접 열어 마이그레이션 전체를 한 번에 커밋
+            if not conn.in_transaction:
+                cursor.execute('BEGIN')
             
             # Sites configuration table
             cursor.execute('''
@@ -22,7 +111,10 @@ class DatabaseManager:
                     url_pattern TEXT NOT NULL,
                     title_selector TEXT,
                     price_selector TEXT,
-                    is_active BOOLEAN DEFAULT 1
+                    is_active BOOLEAN DEFAULT 1,
+                    cache_ttl INTEGER,
+                    max_bytes INTEGER,
+                    imported INTEGER DEFAULT 0
                 )
             ''')
             
@@ -45,6 +137,7 @@ class DatabaseManager:
                     product_title TEXT,
                     product_url TEXT,
                     scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    day TEXT,
                     FOREIGN KEY (product_id) REFERENCES products (id),
                     FOREIGN KEY (site_id) REFERENCES sites (id)
                 )
@@ -58,8 +151,335 @@ class DatabaseManager:
                     last_searched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            self._migrate(cursor)
+            conn.commit()
+
+    def _migrate(self, cursor):
+        """Bring databases created by older app versions up to SCHEMA_VERSION."""
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        if version < 1:
+            # v1: prices 에 로컬 날짜(day) 컬럼을 저장하고 (product, site, day) 를 유일키로 사용
+            self._add_column(cursor, 'prices', 'day', 'TEXT')
+            cursor.execute("UPDATE prices SET day = date(scraped_at, 'localtime') WHERE day IS NULL")
+            # 같은 날 중복 행이 있으면 가장 최근 행만 남김
+            cursor.execute('''
+                DELETE FROM prices WHERE id NOT IN (
+                    SELECT MAX(id) FROM prices GROUP BY product_id, site_id, day
+                )
+            ''')
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_prices_product_site_day
+                ON prices (product_id, site_id, day)
+            ''')
+        if version < 2:
+            # v2: 가격추이 조회용 커버링 인덱스 (테이블 접근 없이 인덱스만으로 조회)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_prices_product_time
+                ON prices (product_id, scraped_at, site_id, price)
+            ''')
+        if version < 3:
+            # v3: 사이트별 HTTP 캐시 유효시간(초), NULL 이면 기본값 사용
+            self._add_column(cursor, 'sites', 'cache_ttl', 'INTEGER')
+        if version < 4:
+            # v4: 검색 한 번에 사이트별로 수집한 상위 N개 상품 (prices 에는 1위 상품만 기록)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS offers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    product_id INTEGER,
+                    site_id INTEGER,
+                    day TEXT,
+                    rank INTEGER,
+                    price REAL,
+                    product_title TEXT,
+                    product_url TEXT,
+                    scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (product_id, site_id, day, rank)
+                )
+            ''')
+        if version < 5:
+            # v5: 사이트별 요청 단위 측정값 (사이트당 METRICS_PER_SITE 개까지만 유지)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS site_metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    site_id INTEGER NOT NULL,
+                    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    outcome TEXT,
+                    cache TEXT,
+                    total_ms REAL,
+                    connect_ms REAL,
+                    ttfb_ms REAL,
+                    download_ms REAL,
+                    bytes INTEGER,
+                    parse_ms REAL,
+                    match_ms REAL,
+                    db_write_ms REAL,
+                    retries INTEGER
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_site_metrics_site ON site_metrics (site_id, id)')
+        if version < 6:
+            # v6: 자동완성 후보 (상품명, 검색어, 수집한 상품 제목) - 트리거로 바로 반영
+            self._create_suggestions(cursor)
+        if version < 7:
+            # v7: 일별 가격 집계 (상품/쇼핑몰/일, 상품/일) - prices 트리거로 바로 반영
+            self._create_daily_aggregates(cursor)
+            self._rebuild_daily_aggregates(cursor)
+        if version < 8:
+            # v8: 사이트별 페이지 최대 읽기 크기(바이트), NULL 이면 기본값 사용
+            self._add_column(cursor, 'sites', 'max_bytes', 'INTEGER')
+        if version < 9:
+            # v9: 오래된 가격을 주/월 단위로 접은 행과 정리 작업 기록
+            self._create_retention(cursor)
+        if version < 10:
+            # v10: 상품별 가격 알림 규칙과 발생한 알림
+            self._create_alerts(cursor)
+        if version < 11:
+            # v11: 가져오기로 생긴 쇼핑몰 표시 (비활성이어도 purge_deleted 가 기록과 함께 지우지 않음)
+            self._add_column(cursor, 'sites', 'imported', 'INTEGER DEFAULT 0')
+        if version < 12:
+            # v12: 스케줄러가 상품/쇼핑몰을 마지막으로 시도한 시각 (실패해도 갱신 주기 동안 다시 요청하지 않음)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS refresh_attempts (
+                    product_id INTEGER NOT NULL,
+                    site_id INTEGER NOT NULL,
+                    attempted_at TIMESTAMP,
+                    outcome TEXT,
+                    PRIMARY KEY (product_id, site_id)
+                ) WITHOUT ROWID
+            ''')
+        if version < SCHEMA_VERSION:
+            cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    @staticmethod
+    def _create_suggestions(cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS suggestions (
+                id INTEGER PRIMARY KEY,
+                term TEXT NOT NULL UNIQUE,
+                product_id INTEGER,
+                searches INTEGER NOT NULL DEFAULT 0,
+                last_used TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_suggestions_product ON suggestions (product_id) WHERE product_id IS NOT NULL')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_suggestions_searched ON suggestions (last_used) WHERE searches > 0')
+        cursor.execute('''
+            INSERT OR IGNORE INTO suggestions (term, product_id, last_used)
+            SELECT name, id, created_at FROM products
+        ''')
+        # 다시 실행돼도 같은 결과가 되도록 검색 횟수는 더하지 않고 1 로 맞춤
+        cursor.execute('''
+            INSERT INTO suggestions (term, searches, last_used)
+            SELECT keyword, 1, last_searched_at FROM search_history WHERE true
+            ON CONFLICT (term) DO UPDATE SET searches = MAX(searches, 1), last_used = excluded.last_used
+        ''')
+        cursor.execute('''
+            INSERT OR IGNORE INTO suggestions (term)
+            SELECT DISTINCT product_title FROM prices WHERE product_title IS NOT NULL AND product_title != ''
+        ''')
+        # 트리거 안의 OR IGNORE/ON CONFLICT 는 바깥 upsert 의 정책으로 바뀌므로 NOT EXISTS 로 처리
+        _execute_script(cursor, '''
+            CREATE TRIGGER IF NOT EXISTS trg_suggest_product AFTER INSERT ON products BEGIN
+                UPDATE suggestions SET product_id = new.id WHERE term = new.name;
+                INSERT INTO suggestions (term, product_id, last_used)
+                SELECT new.name, new.id, new.created_at
+                WHERE NOT EXISTS (SELECT 1 FROM suggestions WHERE term = new.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_unsuggest_product AFTER DELETE ON products BEGIN
+                UPDATE suggestions SET product_id = NULL WHERE product_id = old.id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_suggest_keyword AFTER INSERT ON search_history BEGIN
+                UPDATE suggestions SET searches = searches + 1, last_used = new.last_searched_at WHERE term = new.keyword;
+                INSERT INTO suggestions (term, searches, last_used)
+                SELECT new.keyword, 1, new.last_searched_at
+                WHERE NOT EXISTS (SELECT 1 FROM suggestions WHERE term = new.keyword);
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_suggest_keyword_again AFTER UPDATE OF last_searched_at ON search_history BEGIN
+                UPDATE suggestions SET searches = searches + 1, last_used = new.last_searched_at WHERE term = new.keyword;
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_suggest_title AFTER INSERT ON prices
+            WHEN new.product_title IS NOT NULL AND new.product_title != '' BEGIN
+                INSERT INTO suggestions (term) SELECT new.product_title
+                WHERE NOT EXISTS (SELECT 1 FROM suggestions WHERE term = new.product_title);
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_suggest_title_update AFTER UPDATE OF product_title ON prices
+            WHEN new.product_title IS NOT NULL AND new.product_title != '' BEGIN
+                INSERT INTO suggestions (term) SELECT new.product_title
+                WHERE NOT EXISTS (SELECT 1 FROM suggestions WHERE term = new.product_title);
+            END;
+        ''')
+        try:
+            # 외부 콘텐츠 FTS5 색인 (접두어 1~3글자 색인으로 입력 중 검색도 빠르게)
+            _execute_script(cursor, '''
+                CREATE VIRTUAL TABLE IF NOT EXISTS suggestions_fts
+                USING fts5(term, content='suggestions', content_rowid='id', prefix='1 2 3');
+                CREATE TRIGGER IF NOT EXISTS trg_suggestions_fts_insert AFTER INSERT ON suggestions BEGIN
+                    INSERT INTO suggestions_fts (rowid, term) VALUES (new.id, new.term);
+                END;
+                CREATE TRIGGER IF NOT EXISTS trg_suggestions_fts_delete AFTER DELETE ON suggestions BEGIN
+                    INSERT INTO suggestions_fts (suggestions_fts, rowid, term) VALUES ('delete', old.id, old.term);
+                END;
+                INSERT INTO suggestions_fts (suggestions_fts) VALUES ('rebuild');
+            ''')
+        except sqlite3.OperationalError:
+            # FTS5 없이 빌드된 sqlite 에서는 LIKE 검색으로 대신함
+            pass
+
+    @staticmethod
+    def _create_daily_aggregates(cursor):
+        # 같은 날 다시 수집하면 prices 행은 덮어쓰이지만 집계에는 그날의 최저/최고가가 남음
+        _execute_script(cursor, '''
+            CREATE TABLE IF NOT EXISTS price_daily_site (
+                product_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                site_id INTEGER NOT NULL,
+                min_price REAL,
+                max_price REAL,
+                last_price REAL,
+                samples INTEGER NOT NULL DEFAULT 1,
+                updated_at TIMESTAMP,
+                PRIMARY KEY (product_id, day, site_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS price_daily (
+                product_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                min_price REAL,
+                min_site_id INTEGER,
+                max_price REAL,
+                last_price REAL,
+                last_site_id INTEGER,
+                updated_at TIMESTAMP,
+                PRIMARY KEY (product_id, day)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_price_daily_lowest ON price_daily (product_id, min_price);
+        ''')
+        for event in ('INSERT', 'UPDATE OF price'):
+            name = 'insert' if event == 'INSERT' else 'update'
+            _execute_script(cursor, f'''
+                CREATE TRIGGER IF NOT EXISTS trg_price_daily_{name} AFTER {event} ON prices
+                WHEN new.price > 0 AND new.day IS NOT NULL BEGIN
+                    UPDATE price_daily_site SET
+                        min_price = MIN(min_price, new.price),
+                        max_price = MAX(max_price, new.price),
+                        last_price = new.price,
+                        samples = samples + 1,
+                        updated_at = new.scraped_at
+                    WHERE product_id = new.product_id AND day = new.day AND site_id = new.site_id;
+                    INSERT INTO price_daily_site (product_id, day, site_id, min_price, max_price, last_price, updated_at)
+                    SELECT new.product_id, new.day, new.site_id, new.price, new.price, new.price, new.scraped_at
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM price_daily_site
+                        WHERE product_id = new.product_id AND day = new.day AND site_id = new.site_id
+                    );
+                    UPDATE price_daily SET
+                        min_site_id = CASE WHEN new.price < min_price THEN new.site_id ELSE min_site_id END,
+                        min_price = MIN(min_price, new.price),
+                        max_price = MAX(max_price, new.price),
+                        last_price = new.price,
+                        last_site_id = new.site_id,
+                        updated_at = new.scraped_at
+                    WHERE product_id = new.product_id AND day = new.day;
+                    INSERT INTO price_daily (product_id, day, min_price, min_site_id, max_price, last_price, last_site_id, updated_at)
+                    SELECT new.product_id, new.day, new.price, new.site_id, new.price, new.price, new.site_id, new.scraped_at
+                    WHERE NOT EXISTS (SELECT 1 FROM price_daily WHERE product_id = new.product_id AND day = new.day);
+                END;
+            ''')
+
+    @staticmethod
+    def _create_retention(cursor):
+        _execute_script(cursor, '''
+            CREATE TABLE IF NOT EXISTS price_rollups (
+                product_id INTEGER NOT NULL,
+                site_id INTEGER NOT NULL,
+                period TEXT NOT NULL,
+                period_start TEXT NOT NULL,
+                min_price REAL,
+                max_price REAL,
+                sum_price REAL,
+                samples INTEGER NOT NULL,
+                last_price REAL,
+                last_title TEXT,
+                last_url TEXT,
+                last_at TIMESTAMP,
+                PRIMARY KEY (product_id, site_id, period, period_start)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS maintenance_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ran_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                compacted INTEGER,
+                purged_sites INTEGER,
+                purged_products INTEGER,
+                purged_rows INTEGER,
+                freed_pages INTEGER,
+                duration_ms REAL
+            );
+        ''')
+
+    @staticmethod
+    def _create_alerts(cursor):
+        _execute_script(cursor, '''
+            CREATE TABLE IF NOT EXISTS alert_rules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                threshold REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX IF NOT EXISTS idx_alert_rules_product ON alert_rules (product_id);
+            CREATE TABLE IF NOT EXISTS alert_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                rule_id INTEGER,
+                product_id INTEGER NOT NULL,
+                site_id INTEGER,
+                kind TEXT NOT NULL,
+                price REAL,
+                reference REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                seen INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_alert_events_product ON alert_events (product_id, id);
+        ''')
+
+    @staticmethod
+    def _rebuild_daily_aggregates(cursor):
+        # prices 에는 하루 한 행만 남아 있으므로 재계산 시 하루 중 변동은 복원되지 않음
+        cursor.execute('DELETE FROM price_daily_site')
+        # 압축되어 prices 에 없는 날의 상품별 집계(역대 최저가)는 유지
+        cursor.execute('DELETE FROM price_daily WHERE (product_id, day) IN (SELECT product_id, day FROM prices)')
+        cursor.execute('''
+            INSERT INTO price_daily_site (product_id, day, site_id, min_price, max_price, last_price, updated_at)
+            SELECT product_id, day, site_id, price, price, price, scraped_at
+            FROM prices WHERE price > 0 AND day IS NOT NULL
+            ORDER BY product_id, day, site_id
+        ''')
+        # 동률은 트리거와 같게: 트리거는 쓰인 순서(scraped_at, id)대로 돌며 더 낮을 때만 최저가 사이트를 바꾸고
+        # 마지막에 쓰인 가격을 last_price 로 둠
+        cursor.execute('''
+            INSERT INTO price_daily (product_id, day, min_price, min_site_id, max_price, last_price, last_site_id, updated_at)
+            SELECT product_id, day, MIN(price), MAX(CASE WHEN lowest = 1 THEN site_id END), MAX(price),
+                   MAX(CASE WHEN latest = 1 THEN price END), MAX(CASE WHEN latest = 1 THEN site_id END), MAX(scraped_at)
+            FROM (
+                SELECT product_id, day, site_id, price, scraped_at,
+                       ROW_NUMBER() OVER (PARTITION BY product_id, day ORDER BY price, scraped_at, id) AS lowest,
+                       ROW_NUMBER() OVER (PARTITION BY product_id, day ORDER BY scraped_at DESC, id DESC) AS latest
+                FROM prices WHERE price > 0 AND day IS NOT NULL
+            )
+            GROUP BY product_id, day
+        ''')
+
+    def rebuild_daily_aggregates(self):
+        """Recompute price_daily_site/price_daily for the days still in the prices table."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            self._rebuild_daily_aggregates(cursor)
             conn.commit()
 
+    @staticmethod
+    def _add_column(cursor, table, column, decl):
+        columns = [row[1] for row in cursor.execute(f'PRAGMA table_info({table})')]
+        if column not in columns:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {decl}')
+
     def add_site(self, name, url_pattern, title_selector, price_selector):
         with self.get_connection() as conn:
             cursor = conn.cursor()
@@ -68,13 +488,58 @@ class DatabaseManager:
                 VALUES (?, ?, ?, ?)
             ''', (name, url_pattern, title_selector, price_selector))
             conn.commit()
+            self._notify_site_changed(cursor.lastrowid)
             return cursor.lastrowid
 
+    def add_site_listener(self, callback):
+        """Call callback(site_id) whenever a site is added, updated or deleted."""
+        self._site_listeners.append(callback)
+
+    def _notify_site_changed(self, site_id):
+        for callback in self._site_listeners:
+            callback(site_id)
+
+    def add_price_listener(self, callback, before=None):
+        """Call callback(rows) with the (product_id, site_id, price, title, url) rows of every add_prices commit.
+
+        before(), if given, is called ahead of each add_prices write, e.g. so
+        the listener can refresh state that must not include the new rows yet.
+        """
+        self._price_listeners.append((callback, before))
+
     def get_sites(self):
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM sites WHERE is_active = 1')
             return cursor.fetchall()
+
+    def get_site_configs(self):
+        """Active sites as dicts in the shape PriceScraper.scrape_site expects."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, name, url_pattern, title_selector, price_selector, cache_ttl, max_bytes
+                FROM sites WHERE is_active = 1
+            ''')
+            return [
+                {'id': s[0], 'name': s[1], 'url_pattern': s[2], 'title_selector': s[3], 'price_selector': s[4],
+                 'cache_ttl': s[5], 'max_bytes': s[6]}
+                for s in cursor.fetchall()
+            ]
+
+    def set_site_cache_ttl(self, site_id, cache_ttl):
+        """Set how long (seconds) a site's search pages may be served from the HTTP cache."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE sites SET cache_ttl = ? WHERE id = ?', (cache_ttl, site_id))
+            conn.commit()
+
+    def set_site_max_bytes(self, site_id, max_bytes):
+        """Set how many bytes of a site's search page may be read (None for the scraper default)."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE sites SET max_bytes = ? WHERE id = ?', (max_bytes, site_id))
+            conn.commit()
             
     def update_site(self, site_id, name, url_pattern, title_selector, price_selector):
          with self.get_connection() as conn:
@@ -85,6 +550,7 @@ class DatabaseManager:
                 WHERE id=?
             ''', (name, url_pattern, title_selector, price_selector, site_id))
             conn.commit()
+            self._notify_site_changed(site_id)
 
     def get_or_create_product(self, name):
         with self.get_connection() as conn:
@@ -99,42 +565,376 @@ class DatabaseManager:
             return cursor.lastrowid
 
     def add_price(self, product_id, site_id, price, product_title, product_url):
+        self.add_prices([(product_id, site_id, price, product_title, product_url)])
+
+    def add_prices(self, rows, offer_rows=()):
+        """Upsert (product_id, site_id, price, product_title, product_url) rows in one transaction.
+
+        A product/site pair keeps one row per local day; a later scrape on the
+        same day overwrites it with the most recent price.
+
+        offer_rows are optional (product_id, site_id, rank, price, product_title,
+        product_url) tuples for every listing found on a site's results page.
+        They replace that product/site's offers for today in the same transaction.
+        """
+        rows = list(rows)
+        offer_rows = list(offer_rows)
+        if not rows and not offer_rows:
+            return
+        for _, before in self._price_listeners:
+            if before is not None:
+                try:
+                    before()
+                except Exception:
+                    traceback.print_exc()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO prices (product_id, site_id, price, product_title, product_url, scraped_at, day)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, date('now', 'localtime'))
+                ON CONFLICT (product_id, site_id, day) DO UPDATE SET
+                    price = excluded.price,
+                    product_title = excluded.product_title,
+                    product_url = excluded.product_url,
+                    scraped_at = excluded.scraped_at
+            ''', rows)
+            if offer_rows:
+                pairs = {(r[0], r[1]) for r in offer_rows}
+                cursor.executemany('''
+                    DELETE FROM offers WHERE product_id = ? AND site_id = ? AND day = date('now', 'localtime')
+                ''', pairs)
+                cursor.executemany('''
+                    INSERT INTO offers (product_id, site_id, rank, price, product_title, product_url, day)
+                    VALUES (?, ?, ?, ?, ?, ?, date('now', 'localtime'))
+                ''', offer_rows)
+            conn.commit()
+        for callback, _ in self._price_listeners:
+            # 가격은 이미 저장됨: 리스너 오류가 검색/스케줄러의 나머지 처리를 막지 않게 기록만 함
+            try:
+                callback(rows)
+            except Exception:
+                traceback.print_exc()
+
+    def get_fresh_result(self, product_id, site_id, max_age):
+        """Today's stored result for a product/site if scraped within max_age seconds.
+
+        Returned in the shape of PriceScraper.scrape_site (without site_name),
+        or None when there is no fresh row.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            # 오늘 이미 수집된 기록이 있는지 확인 (Local time 기준)
             cursor.execute('''
-                SELECT id FROM prices 
-                WHERE product_id = ? AND site_id = ? AND date(scraped_at, 'localtime') = date('now', 'localtime')
-            ''', (product_id, site_id))
+                SELECT price, product_title, product_url FROM prices
+                WHERE product_id = ? AND site_id = ? AND day = date('now', 'localtime')
+                  AND scraped_at >= datetime('now', ?)
+            ''', (product_id, site_id, f'-{int(max_age)} seconds'))
             row = cursor.fetchone()
-            
-            if row:
-                # 같은 날짜 데이터가 있으면 업데이트 (최근 가격으로 덮어씀)
-                cursor.execute('''
-                    UPDATE prices 
-                    SET price = ?, product_title = ?, product_url = ?, scraped_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (price, product_title, product_url, row[0]))
-            else:
-                # 데이터가 없으면 새로 삽입
+            if row is None:
+                return None
+            cursor.execute('''
+                SELECT price, product_title, product_url FROM offers
+                WHERE product_id = ? AND site_id = ? AND day = date('now', 'localtime')
+                ORDER BY rank
+            ''', (product_id, site_id))
+            offers = [
+                {'product_title': t, 'price': p, 'price_text': f'{p:,.0f}', 'url': u}
+                for p, t, u in cursor.fetchall()
+            ]
+        top = {'product_title': row[1], 'price': row[0], 'price_text': f'{row[0]:,.0f}', 'url': row[2]}
+        return dict(top, offers=offers or [top], success=True)
+
+    def get_latest_results(self, product_id):
+        """Last stored result per active site for a product, however old, cheapest first.
+
+        Dicts in the shape of PriceScraper.scrape_site plus 'site_id',
+        'site_name', 'scraped_at' (epoch seconds, None for rows imported
+        without a timestamp) and 'from_db': True. Sites whose rows were
+        compacted use the last price of their newest rollup.
+        """
+        results = []
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            sites = cursor.execute('SELECT id, name FROM sites WHERE is_active = 1').fetchall()
+            for site_id, site_name in sites:
+                # (product_id, site_id, day) 유일 인덱스로 사이트마다 마지막 한 행만 읽음
                 cursor.execute('''
-                    INSERT INTO prices (product_id, site_id, price, product_title, product_url)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (product_id, site_id, price, product_title, product_url))
+                    SELECT price, product_title, product_url, day, CAST(strftime('%s', scraped_at) AS INTEGER)
+                    FROM prices WHERE product_id = ? AND site_id = ?
+                    ORDER BY day DESC LIMIT 1
+                ''', (product_id, site_id))
+                row = cursor.fetchone()
+                offers = []
+                if row is not None:
+                    cursor.execute('''
+                        SELECT price, product_title, product_url FROM offers
+                        WHERE product_id = ? AND site_id = ? AND day = ?
+                        ORDER BY rank
+                    ''', (product_id, site_id, row[3]))
+                    offers = [
+                        {'product_title': t, 'price': p, 'price_text': f'{p:,.0f}', 'url': u}
+                        for p, t, u in cursor.fetchall()
+                    ]
+                else:
+                    cursor.execute('''
+                        SELECT last_price, last_title, last_url, NULL, CAST(strftime('%s', last_at) AS INTEGER)
+                        FROM price_rollups WHERE product_id = ? AND site_id = ?
+                        ORDER BY last_at DESC LIMIT 1
+                    ''', (product_id, site_id))
+                    row = cursor.fetchone()
+                if row is None or row[0] is None:
+                    continue
+                top = {'product_title': row[1], 'price': row[0], 'price_text': f'{row[0]:,.0f}', 'url': row[2]}
+                results.append(dict(top, offers=offers or [top], success=True, from_db=True,
+                                    site_id=site_id, site_name=site_name, scraped_at=row[4]))
+        results.sort(key=lambda r: r['price'])
+        return results
+
+    METRIC_FIELDS = ('outcome', 'cache', 'total_ms', 'connect_ms', 'ttfb_ms', 'download_ms',
+                     'bytes', 'parse_ms', 'match_ms', 'db_write_ms', 'retries')
+
+    def add_site_metrics(self, entries):
+        """Record (site_id, metrics_dict) pairs and trim each site to its newest METRICS_PER_SITE rows."""
+        entries = list(entries)
+        if not entries:
+            return
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                f'INSERT INTO site_metrics (site_id, {", ".join(self.METRIC_FIELDS)}) '
+                f'VALUES (?, {", ".join("?" * len(self.METRIC_FIELDS))})',
+                [(site_id, *(m.get(f) for f in self.METRIC_FIELDS)) for site_id, m in entries]
+            )
+            cursor.executemany('''
+                DELETE FROM site_metrics WHERE site_id = ? AND id <= (
+                    SELECT id FROM site_metrics WHERE site_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+                )
+            ''', [(site_id, site_id, METRICS_PER_SITE) for site_id in {e[0] for e in entries}])
             conn.commit()
-            
+
+    # 본문을 받지 않은 응답 (캐시 적중, 304 재검증) - 사이트 지연시간 통계에서 제외
+    CACHED_RESPONSES = ('hit', 'revalidated')
+
+    def get_site_metric_summary(self):
+        """{site_id: {'n', 'cached', 'p50_ms', 'p95_ms', 'success_rate', 'avg_bytes'}} over the retained requests.
+
+        p50/p95 and avg_bytes cover network fetches only (None when every
+        request was answered from the cache); 'cached' counts cache hits and
+        304 revalidations. success_rate is over all n requests.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT site_id, total_ms, outcome, bytes, cache FROM site_metrics ORDER BY site_id, total_ms')
+            per_site = {}
+            for site_id, total_ms, outcome, size, cache in cursor:
+                per_site.setdefault(site_id, []).append((total_ms or 0.0, outcome, size or 0, cache in self.CACHED_RESPONSES))
+        summary = {}
+        for site_id, rows in per_site.items():
+            n = len(rows)
+            fetched = [r for r in rows if not r[3]]
+            m = len(fetched)
+            summary[site_id] = {
+                'n': n,
+                'cached': n - m,
+                'p50_ms': fetched[int(0.50 * (m - 1))][0] if m else None,
+                'p95_ms': fetched[int(round(0.95 * (m - 1)))][0] if m else None,
+                'success_rate': sum(1 for r in rows if r[1] == 'ok') / n,
+                'avg_bytes': sum(r[2] for r in fetched) / m if m else None,
+            }
+        return summary
+
+    def get_site_health_history(self):
+        """{site_id: (network_latencies_ms, trailing_failures)} from the retained metrics, oldest first."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT site_id, outcome, cache, COALESCE(ttfb_ms, 0) + COALESCE(download_ms, 0)
+                FROM site_metrics ORDER BY site_id, id
+            ''')
+            history = {}
+            for site_id, outcome, cache, latency in cursor:
+                latencies, failures = history.get(site_id, ([], 0))
+                if outcome in FAILURE_OUTCOMES:
+                    failures += 1
+                else:
+                    failures = 0
+                    if cache != 'hit' and latency:
+                        latencies.append(latency)
+                history[site_id] = (latencies, failures)
+            return history
+
+    def add_refresh_attempts(self, entries):
+        """Record (product_id, site_id, outcome) scheduler attempts, successful or not."""
+        entries = list(entries)
+        if not entries:
+            return
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO refresh_attempts (product_id, site_id, attempted_at, outcome)
+                VALUES (?, ?, CURRENT_TIMESTAMP, ?)
+                ON CONFLICT (product_id, site_id) DO UPDATE SET
+                    attempted_at = excluded.attempted_at,
+                    outcome = excluded.outcome
+            ''', entries)
+            conn.commit()
+
+    def get_refresh_candidates(self, max_age):
+        """(product_id, product_name, site_id, last_epoch) for every product/active-site pair
+        neither scraped nor attempted within max_age seconds; last_epoch is None if never tried.
+
+        Pairs that failed or found nothing have no new price row, so their
+        last refresh_attempts entry keeps them out until max_age has passed.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT p.id, p.name, s.id,
+                       NULLIF(MAX(
+                           COALESCE((SELECT CAST(strftime('%s', MAX(pr.scraped_at)) AS INTEGER)
+                                     FROM prices pr WHERE pr.product_id = p.id AND pr.site_id = s.id), 0),
+                           COALESCE((SELECT CAST(strftime('%s', a.attempted_at) AS INTEGER)
+                                     FROM refresh_attempts a WHERE a.product_id = p.id AND a.site_id = s.id), 0)
+                       ), 0) AS last_epoch
+                FROM products p
+                CROSS JOIN sites s
+                WHERE s.is_active = 1
+                  AND (last_epoch IS NULL OR last_epoch < CAST(strftime('%s', 'now') AS INTEGER) - ?)
+            ''', (max_age,))
+            return cursor.fetchall()
+
     def get_price_history(self, product_id):
+        """(price, scraped_at, site_name) rows; compacted periods contribute their last price."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT p.price, p.scraped_at, s.name 
-                FROM prices p
-                JOIN sites s ON p.site_id = s.id
-                WHERE p.product_id = ?
-                ORDER BY p.scraped_at
+                SELECT h.price, h.scraped_at, s.name
+                FROM (
+                    SELECT site_id, price, scraped_at FROM prices WHERE product_id = ?
+                    UNION ALL
+                    SELECT site_id, last_price, last_at FROM price_rollups WHERE product_id = ?
+                ) h
+                JOIN sites s ON h.site_id = s.id
+                ORDER BY h.scraped_at
+            ''', (product_id, product_id))
+            return cursor.fetchall()
+
+    def get_today_prices(self, product_id):
+        """(site_name, last_price, min_price, max_price) for every site scraped today, cheapest first."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT s.name, d.last_price, d.min_price, d.max_price
+                FROM price_daily_site d
+                JOIN sites s ON s.id = d.site_id
+                WHERE d.product_id = ? AND d.day = date('now', 'localtime')
+                ORDER BY d.last_price
             ''', (product_id,))
             return cursor.fetchall()
 
+    def get_lowest_price(self, product_id):
+        """(price, day, site_name) of the lowest price ever recorded, or None."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT d.min_price, d.day, s.name
+                FROM price_daily d
+                LEFT JOIN sites s ON s.id = d.min_site_id
+                WHERE d.product_id = ?
+                ORDER BY d.min_price LIMIT 1
+            ''', (product_id,))
+            return cursor.fetchone()
+
+    def get_price_change(self, product_id, days=7, slack=3):
+        """(old_min, new_min, percent) between the latest day and the last day `days` to `days + slack` earlier.
+
+        Uses each day's lowest price across sites. None when either side is
+        missing, so a gap in the history is not reported as a `days`-day change.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT day, min_price FROM price_daily WHERE product_id = ? ORDER BY day DESC LIMIT 1
+            ''', (product_id,))
+            latest = cursor.fetchone()
+            if latest is None:
+                return None
+            cursor.execute('''
+                SELECT min_price FROM price_daily
+                WHERE product_id = ? AND day BETWEEN date(?, ?) AND date(?, ?)
+                ORDER BY day DESC LIMIT 1
+            ''', (product_id, latest[0], f'-{int(days) + int(slack)} days', latest[0], f'-{int(days)} days'))
+            earlier = cursor.fetchone()
+        if earlier is None or not earlier[0]:
+            return None
+        return earlier[0], latest[1], (latest[1] - earlier[0]) / earlier[0] * 100
+
+    def get_price_summary(self, product_id):
+        """Cheapest site today, lowest price ever and 7-day change for one product."""
+        today = self.get_today_prices(product_id)
+        return {
+            'cheapest_today': today[0][:2] if today else None,
+            'today': today,
+            'lowest_ever': self.get_lowest_price(product_id),
+            'change_7d': self.get_price_change(product_id, 7),
+        }
+
+    def get_price_history_buckets(self, product_id, start=None, end=None, max_points=90):
+        """Downsampled price history for charting.
+
+        start/end are epoch seconds (None means unbounded). Each site's series
+        is split into at most `max_points` equal time buckets and aggregated in
+        SQL. Returns (site_name, ts, min_price, avg_price, max_price) rows ordered
+        by site and time, where ts is the average epoch of the bucket's rows.
+        Periods folded into price_rollups count as one row at their last scrape.
+        """
+        start_str = self._epoch_to_timestamp(start) if start is not None else '0000-01-01'
+        end_str = self._epoch_to_timestamp(end) if end is not None else '9999-12-31'
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT CAST(strftime('%s', MIN(first)) AS INTEGER), CAST(strftime('%s', MAX(last)) AS INTEGER)
+                FROM (
+                    SELECT MIN(scraped_at) AS first, MAX(scraped_at) AS last FROM prices
+                    WHERE product_id = ? AND scraped_at BETWEEN ? AND ?
+                    UNION ALL
+                    SELECT MIN(last_at), MAX(last_at) FROM price_rollups
+                    WHERE product_id = ? AND last_at BETWEEN ? AND ?
+                )
+            ''', (product_id, start_str, end_str) * 2)
+            first, last = cursor.fetchone()
+            if first is None:
+                return []
+            width = max(1, (last - first) // max(1, max_points) + 1)
+            cursor.execute('''
+                SELECT s.name, b.ts, b.min_price, b.avg_price, b.max_price
+                FROM (
+                    SELECT site_id,
+                           (CAST(strftime('%s', scraped_at) AS INTEGER) - ?) / ? AS bucket,
+                           AVG(CAST(strftime('%s', scraped_at) AS INTEGER)) AS ts,
+                           MIN(min_price) AS min_price,
+                           SUM(sum_price) / SUM(samples) AS avg_price,
+                           MAX(max_price) AS max_price
+                    FROM (
+                        SELECT site_id, scraped_at, price AS min_price, price AS max_price, price AS sum_price, 1 AS samples
+                        FROM prices
+                        WHERE product_id = ? AND scraped_at BETWEEN ? AND ?
+                        UNION ALL
+                        SELECT site_id, last_at, min_price, max_price, sum_price, samples
+                        FROM price_rollups
+                        WHERE product_id = ? AND last_at BETWEEN ? AND ?
+                    )
+                    GROUP BY site_id, bucket
+                ) b
+                JOIN sites s ON b.site_id = s.id
+                ORDER BY s.name, b.ts
+            ''', (first, width) + (product_id, start_str, end_str) * 2)
+            return cursor.fetchall()
+
+    @staticmethod
+    def _epoch_to_timestamp(epoch):
+        # scraped_at 은 CURRENT_TIMESTAMP (UTC 'YYYY-MM-DD HH:MM:SS') 로 저장됨
+        return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
     def get_all_products(self):
          with self.get_connection() as conn:
             cursor = conn.cursor()
@@ -151,6 +951,69 @@ class DatabaseManager:
             ''', (keyword,))
             conn.commit()
 
+    def get_product_id(self, name):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id FROM products WHERE name = ?', (name,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def _has_fts(self, cursor):
+        if self._fts is None:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'suggestions_fts'")
+            self._fts = cursor.fetchone() is not None
+        return self._fts
+
+    def _match_suggestions(self, text, limit, products_only):
+        """(term, product_id) rows whose words start with every word of text.
+
+        Past searches come first (most recent first), then product names,
+        then scraped titles (newest first). Each tier is its own LIMITed query
+        so a one-letter prefix never sorts the whole match set.
+        """
+        words = text.split()
+        product_filter = ' AND s.product_id IS NOT NULL' if products_only else ''
+        tiers = [
+            ('s.searches > 0' + product_filter, 's.last_used DESC', True),
+            ('s.searches = 0 AND s.product_id IS NOT NULL', 's.id DESC', False),
+        ]
+        if words and not products_only:
+            tiers.append(('s.searches = 0 AND s.product_id IS NULL', 's.id DESC', False))
+        rows = []
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            use_fts = bool(words) and self._has_fts(cursor)
+            if use_fts:
+                # 단어마다 접두어 검색 ("갤럭 s2" -> "갤럭"* "s2"*), 순서는 상관없음
+                args = (' '.join('"' + w.replace('"', '""') + '"*' for w in words),)
+                match = ' AND suggestions_fts MATCH ?'
+            else:
+                args = tuple('%' + w.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%' for w in words)
+                match = ''.join(" AND s.term LIKE ? ESCAPE '\\'" for _ in words)
+            for where, order, searched in tiers:
+                if use_fts and searched:
+                    # 검색 기록은 적으므로 기록 쪽에서 FTS 를 rowid 로 확인
+                    source = 'suggestions s CROSS JOIN suggestions_fts f ON f.rowid = s.id'
+                elif use_fts:
+                    source = 'suggestions_fts f JOIN suggestions s ON s.id = f.rowid'
+                    order = 'f.rowid DESC'
+                else:
+                    source = 'suggestions s'
+                cursor.execute(f'SELECT s.term, s.product_id FROM {source} WHERE {where}{match} ORDER BY {order} LIMIT ?',
+                               (*args, limit - len(rows)))
+                rows.extend(cursor.fetchall())
+                if len(rows) >= limit:
+                    break
+        return rows
+
+    def get_suggestions(self, text, limit=8):
+        """Autocomplete terms for the search box (recent searches when text is empty)."""
+        return [term for term, product_id in self._match_suggestions(text, limit, False)]
+
+    def find_products(self, text='', limit=50):
+        """(id, name) of tracked products matching text, recently used first."""
+        return [(product_id, term) for term, product_id in self._match_suggestions(text, limit, True)]
+
     def get_recent_keywords(self, limit=20):
         with self.get_connection() as conn:
             cursor = conn.cursor()
@@ -161,5 +1024,538 @@ class DatabaseManager:
         """Soft delete a site."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('UPDATE sites SET is_active = 0 WHERE id = ?', (site_id,))
+            cursor.execute('UPDATE sites SET is_active = 0, imported = 0 WHERE id = ?', (site_id,))
+            conn.commit()
+            self._notify_site_changed(site_id)
+
+    # 원본 행(또는 주간 집계)을 price_rollups 에 합침. {source} 는 집계 컬럼 순서대로 행을 내는 SELECT
+    _ROLLUP_UPSERT = '''
+        INSERT INTO price_rollups (product_id, site_id, period, period_start, min_price, max_price, sum_price,
+                                   samples, last_price, last_title, last_url, last_at)
+        SELECT product_id, site_id, period, period_start, MIN(min_price), MAX(max_price), SUM(sum_price),
+               SUM(samples), MAX(CASE WHEN rn = 1 THEN last_price END), MAX(CASE WHEN rn = 1 THEN last_title END),
+               MAX(CASE WHEN rn = 1 THEN last_url END), MAX(last_at)
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY product_id, site_id, period, period_start ORDER BY last_at DESC
+            ) AS rn
+            FROM ({source})
+        )
+        GROUP BY product_id, site_id, period, period_start
+        ON CONFLICT (product_id, site_id, period, period_start) DO UPDATE SET
+            min_price = MIN(min_price, excluded.min_price),
+            max_price = MAX(max_price, excluded.max_price),
+            sum_price = sum_price + excluded.sum_price,
+            samples = samples + excluded.samples,
+            last_price = CASE WHEN excluded.last_at >= last_at THEN excluded.last_price ELSE last_price END,
+            last_title = CASE WHEN excluded.last_at >= last_at THEN excluded.last_title ELSE last_title END,
+            last_url = CASE WHEN excluded.last_at >= last_at THEN excluded.last_url ELSE last_url END,
+            last_at = MAX(last_at, excluded.last_at)
+    '''
+
+    def compact_prices(self, daily_days=90, weekly_days=365, archive_path=None, batch_size=5000):
+        """Fold up to batch_size price rows older than daily_days into price_rollups.
+
+        Rows within weekly_days become weekly rollups (weeks start on Monday),
+        older ones monthly; weekly rollups that age past weekly_days are merged
+        into their month. The folded rows' offers and per-site daily aggregates
+        are deleted with them. With archive_path the raw rows are first copied
+        into price_archive in that SQLite file. Returns the number of price rows
+        folded; call again until it returns less than batch_size.
+        """
+        today = datetime.date.today()
+        daily_cutoff = (today - datetime.timedelta(days=daily_days)).isoformat()
+        month_cutoff = (today - datetime.timedelta(days=weekly_days)).isoformat()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            # ATTACH 는 트랜잭션 밖에서만 가능하므로 쓰기 전에 연결
+            if archive_path:
+                cursor.execute('ATTACH DATABASE ? AS archive', (archive_path,))
+            try:
+                cursor.execute('''
+                    CREATE TEMP TABLE IF NOT EXISTS compact_batch (
+                        id INTEGER PRIMARY KEY, product_id INTEGER, site_id INTEGER, day TEXT
+                    )
+                ''')
+                cursor.execute('DELETE FROM compact_batch')
+                # id 는 수집 순서이므로 오래된 행부터 앞쪽에 모여 있음
+                cursor.execute('''
+                    INSERT INTO compact_batch
+                    SELECT id, product_id, site_id, day FROM prices WHERE day < ? ORDER BY id LIMIT ?
+                ''', (daily_cutoff, batch_size))
+                compacted = cursor.rowcount
+                if archive_path and compacted:
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS archive.price_archive (
+                            product_id INTEGER,
+                            product_name TEXT,
+                            site_id INTEGER,
+                            site_name TEXT,
+                            price REAL,
+                            product_title TEXT,
+                            product_url TEXT,
+                            scraped_at TIMESTAMP,
+                            day TEXT,
+                            UNIQUE (product_id, site_id, day)
+                        )
+                    ''')
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO archive.price_archive
+                        SELECT p.product_id, pr.name, p.site_id, s.name, p.price, p.product_title, p.product_url,
+                               p.scraped_at, p.day
+                        FROM compact_batch b
+                        CROSS JOIN prices p ON p.id = b.id
+                        LEFT JOIN products pr ON pr.id = p.product_id
+                        LEFT JOIN sites s ON s.id = p.site_id
+                    ''')
+                cursor.execute(self._ROLLUP_UPSERT.format(source='''
+                    SELECT p.product_id, p.site_id,
+                           CASE WHEN p.day < :month_cutoff THEN 'month' ELSE 'week' END AS period,
+                           CASE WHEN p.day < :month_cutoff THEN strftime('%Y-%m-01', p.day)
+                                ELSE date(p.day, 'weekday 0', '-6 days') END AS period_start,
+                           p.price AS min_price, p.price AS max_price, p.price AS sum_price, 1 AS samples,
+                           p.price AS last_price, p.product_title AS last_title, p.product_url AS last_url,
+                           p.scraped_at AS last_at
+                    FROM compact_batch b CROSS JOIN prices p ON p.id = b.id
+                    WHERE p.price > 0
+                '''), {'month_cutoff': month_cutoff})
+                cursor.execute(self._ROLLUP_UPSERT.format(source='''
+                    SELECT product_id, site_id, 'month' AS period, strftime('%Y-%m-01', period_start) AS period_start,
+                           min_price, max_price, sum_price, samples, last_price, last_title, last_url, last_at
+                    FROM price_rollups WHERE period = 'week' AND period_start < :month_cutoff
+                '''), {'month_cutoff': month_cutoff})
+                cursor.execute("DELETE FROM price_rollups WHERE period = 'week' AND period_start < ?", (month_cutoff,))
+                # 행 값 IN 은 인덱스 앞부분만 쓰므로 키마다 삭제
+                keys = cursor.execute('SELECT product_id, site_id, day FROM compact_batch').fetchall()
+                for table in ('offers', 'price_daily_site'):
+                    cursor.executemany(f'DELETE FROM {table} WHERE product_id = ? AND site_id = ? AND day = ?', keys)
+                cursor.execute('DELETE FROM prices WHERE id IN (SELECT id FROM compact_batch)')
+                conn.commit()
+            finally:
+                if archive_path:
+                    conn.rollback()
+                    cursor.execute('DETACH DATABASE archive')
+        return compacted
+
+    def purge_deleted(self, orphan_days=30):
+        """Delete soft-deleted sites with all their rows, and products that never got a price.
+
+        Inactive sites created by an import (no selectors, only history) are
+        not deleted sites and are kept. A product is kept while it is younger
+        than orphan_days or was searched within that time.
+        Returns {'purged_sites', 'purged_products', 'purged_rows'}.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            site_ids = [row[0] for row in cursor.execute('SELECT id FROM sites WHERE is_active = 0 AND imported = 0')]
+            rows = 0
+            if site_ids:
+                marks = ', '.join('?' * len(site_ids))
+                for table in ('prices', 'offers', 'price_daily_site', 'price_rollups', 'site_metrics', 'refresh_attempts'):
+                    cursor.execute(f'DELETE FROM {table} WHERE site_id IN ({marks})', site_ids)
+                    rows += cursor.rowcount
+                cursor.execute(f'DELETE FROM sites WHERE id IN ({marks})', site_ids)
+            cursor.execute('''
+                DELETE FROM products
+                WHERE created_at < datetime('now', ?)
+                  AND NOT EXISTS (SELECT 1 FROM prices WHERE product_id = products.id)
+                  AND NOT EXISTS (SELECT 1 FROM price_rollups WHERE product_id = products.id)
+                  AND NOT EXISTS (SELECT 1 FROM price_daily WHERE product_id = products.id)
+                  AND NOT EXISTS (SELECT 1 FROM alert_rules WHERE product_id = products.id)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM search_history
+                      WHERE keyword = products.name AND last_searched_at >= datetime('now', ?)
+                  )
+            ''', (f'-{int(orphan_days)} days', f'-{int(orphan_days)} days'))
+            products = cursor.rowcount
+            if products:
+                cursor.execute('DELETE FROM refresh_attempts WHERE product_id NOT IN (SELECT id FROM products)')
+                rows += cursor.rowcount
+            conn.commit()
+        for site_id in site_ids:
+            self._notify_site_changed(site_id)
+        return {'purged_sites': len(site_ids), 'purged_products': products, 'purged_rows': rows}
+
+    def vacuum(self, pages=None, convert=False):
+        """Release free pages to the filesystem; returns how many were released.
+
+        At most `pages` free pages (all when None) are released per call with
+        incremental VACUUM. Files created before auto_vacuum=INCREMENTAL
+        release nothing unless convert is set, which rewrites them with one
+        full VACUUM once a quarter of their pages are free (maintenance CLI).
+        """
+        with self.get_connection() as conn:
+            conn.commit()
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if not free:
+                return 0
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                # 전체 VACUUM 은 파일 전체를 다시 쓰므로 그동안 모든 쓰기가 기다림: 앱에서는 하지 않음
+                if not convert or free * 4 < conn.execute('PRAGMA page_count').fetchone()[0]:
+                    return 0
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                conn.execute('VACUUM')
+            else:
+                # execute() 로는 한 페이지만 반환되므로 끝까지 실행되는 executescript 사용
+                conn.executescript(f'PRAGMA incremental_vacuum({int(pages) if pages else 0})')
+            return free - conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+    def analyze(self):
+        """Refresh the query planner statistics (sampled, so it stays fast on large tables)."""
+        with self.get_connection() as conn:
+            conn.execute('PRAGMA analysis_limit = 400')
+            conn.execute('ANALYZE')
+            conn.commit()
+
+    def add_maintenance_log(self, stats):
+        """Record one maintenance run and keep the newest MAINTENANCE_LOG_SIZE entries."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO maintenance_log (compacted, purged_sites, purged_products, purged_rows, freed_pages, duration_ms)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', tuple(stats.get(k) for k in ('compacted', 'purged_sites', 'purged_products', 'purged_rows',
+                                               'freed_pages', 'duration_ms')))
+            cursor.execute('''
+                DELETE FROM maintenance_log WHERE id <= (
+                    SELECT id FROM maintenance_log ORDER BY id DESC LIMIT 1 OFFSET ?
+                )
+            ''', (MAINTENANCE_LOG_SIZE,))
+            conn.commit()
+
+    def get_last_maintenance(self):
+        """Epoch seconds of the last recorded maintenance run, or None."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT CAST(strftime('%s', MAX(ran_at)) AS INTEGER) FROM maintenance_log")
+            return cursor.fetchone()[0]
+
+    def add_alert_rule(self, product_id, kind, threshold=None):
+        """Add an alert rule: 'below' (threshold in won), 'drop' (threshold in %) or 'new_low'."""
+        if kind not in ALERT_KINDS:
+            raise ValueError(f'unknown alert kind: {kind}')
+        if kind != 'new_low':
+            if isinstance(threshold, bool) or not isinstance(threshold, (int, float)):
+                raise ValueError(f'{kind} alert needs a numeric threshold')
+            if kind == 'drop' and not 0 < threshold < 100:
+                raise ValueError('drop threshold must be a percentage between 0 and 100')
+        else:
+            threshold = None
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('INSERT INTO alert_rules (product_id, kind, threshold) VALUES (?, ?, ?)',
+                           (product_id, kind, threshold))
+            conn.commit()
+            return cursor.lastrowid
+
+    def delete_alert_rule(self, rule_id):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM alert_rules WHERE id = ?', (rule_id,))
             conn.commit()
+
+    def get_alert_rules(self, product_id=None):
+        """(rule_id, product_id, product_name, kind, threshold) rows, for one product or all."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT r.id, r.product_id, p.name, r.kind, r.threshold
+                FROM alert_rules r
+                JOIN products p ON p.id = r.product_id
+                WHERE ?1 IS NULL OR r.product_id = ?1
+                ORDER BY r.product_id, r.id
+            ''', (product_id,))
+            return cursor.fetchall()
+
+    def get_alert_rules_version(self):
+        """(count, max id) of alert_rules; changes whenever a rule is added or deleted (ids are never reused)."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*), COALESCE(MAX(id), 0) FROM alert_rules')
+            return tuple(cursor.fetchone())
+
+    def get_recent_daily_prices(self, product_id, days=7):
+        """(site_id, day, min_price, last_price) rows of the last `days` days, oldest first."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT site_id, day, min_price, last_price FROM price_daily_site
+                WHERE product_id = ? AND day >= date('now', 'localtime', ?)
+                ORDER BY day
+            ''', (product_id, f'-{int(days)} days'))
+            return cursor.fetchall()
+
+    def add_alert_events(self, events):
+        """Record (rule_id, product_id, site_id, kind, price, reference) tuples; keeps the newest ALERT_EVENTS_KEPT."""
+        events = list(events)
+        if not events:
+            return
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO alert_events (rule_id, product_id, site_id, kind, price, reference)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', events)
+            cursor.execute('''
+                DELETE FROM alert_events WHERE id <= (
+                    SELECT id FROM alert_events ORDER BY id DESC LIMIT 1 OFFSET ?
+                )
+            ''', (ALERT_EVENTS_KEPT,))
+            conn.commit()
+
+    def get_alert_events(self, product_id=None, unseen_only=False, limit=50):
+        """Newest alerts first as dicts with product_name and site_name."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT e.id, e.product_id, p.name, s.name, e.kind, e.price, e.reference, e.created_at, e.seen
+                FROM alert_events e
+                LEFT JOIN products p ON p.id = e.product_id
+                LEFT JOIN sites s ON s.id = e.site_id
+                WHERE (?1 IS NULL OR e.product_id = ?1) AND (?2 = 0 OR e.seen = 0)
+                ORDER BY e.id DESC LIMIT ?3
+            ''', (product_id, int(unseen_only), limit))
+            keys = ('id', 'product_id', 'product_name', 'site_name', 'kind', 'price', 'reference', 'created_at', 'seen')
+            return [dict(zip(keys, row)) for row in cursor.fetchall()]
+
+    def mark_alerts_seen(self, product_id=None):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE alert_events SET seen = 1 WHERE seen = 0 AND (?1 IS NULL OR product_id = ?1)',
+                           (product_id,))
+            conn.commit()
+
+    # 내보내기 형식: 상품/쇼핑몰은 id 대신 이름(과 검색 주소)으로 참조해서 다른 DB 로 옮길 수 있게 함
+    EXPORT_QUERIES = {
+        'sites': ('''
+            SELECT name, url_pattern, title_selector, price_selector, is_active, cache_ttl, max_bytes, imported
+            FROM sites ORDER BY id
+        ''', ('name', 'url_pattern', 'title_selector', 'price_selector', 'is_active', 'cache_ttl', 'max_bytes',
+              'imported')),
+        'products': ('SELECT name, created_at FROM products ORDER BY id', ('name', 'created_at')),
+        'search_history': ('SELECT keyword, last_searched_at FROM search_history ORDER BY id',
+                           ('keyword', 'last_searched_at')),
+        'prices': ('''
+            SELECT pr.name, s.name, s.url_pattern, p.price, p.product_title, p.product_url, p.scraped_at, p.day
+            FROM prices p
+            JOIN products pr ON pr.id = p.product_id
+            JOIN sites s ON s.id = p.site_id
+            ORDER BY p.id
+        ''', ('product', 'site', 'url_pattern', 'price', 'product_title', 'product_url', 'scraped_at', 'day')),
+        'price_rollups': ('''
+            SELECT pr.name, s.name, s.url_pattern, r.period, r.period_start, r.min_price, r.max_price, r.sum_price,
+                   r.samples, r.last_price, r.last_title, r.last_url, r.last_at
+            FROM price_rollups r
+            JOIN products pr ON pr.id = r.product_id
+            JOIN sites s ON s.id = r.site_id
+        ''', ('product', 'site', 'url_pattern', 'period', 'period_start', 'min_price', 'max_price', 'sum_price',
+              'samples', 'last_price', 'last_title', 'last_url', 'last_at')),
+    }
+
+    def export_rows(self, table, batch_size=1000):
+        """Yield one table's rows as dicts (columns per EXPORT_QUERIES) without loading them all.
+
+        Prices and rollups name their product and site (name + url_pattern)
+        instead of carrying ids, so they can be imported into any database.
+        """
+        query, columns = self.EXPORT_QUERIES[table]
+        cursor = self.get_connection().cursor()
+        cursor.execute(query)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield dict(zip(columns, row))
+
+    @staticmethod
+    def _resolve_import_ids(cursor, rows):
+        """(product_id, site_id) for each exported row, creating products and sites that are missing."""
+        products = {}
+        sites = {}
+        ids = []
+        for r in rows:
+            product_id = products.get(r['product'])
+            if product_id is None:
+                cursor.execute('INSERT OR IGNORE INTO products (name) VALUES (?)', (r['product'],))
+                cursor.execute('SELECT id FROM products WHERE name = ?', (r['product'],))
+                product_id = products[r['product']] = cursor.fetchone()[0]
+            key = (r['site'], r['url_pattern'])
+            site_id = sites.get(key)
+            if site_id is None:
+                cursor.execute('''
+                    SELECT id FROM sites WHERE name = ? AND url_pattern = ? ORDER BY is_active DESC, id LIMIT 1
+                ''', key)
+                found = cursor.fetchone()
+                if found is None:
+                    # 쇼핑몰 설정 없이 가격만 들어온 경우: 선택자가 없어 수집은 못 하므로 비활성, 삭제 대상은 아님
+                    cursor.execute('INSERT INTO sites (name, url_pattern, is_active, imported) VALUES (?, ?, 0, 1)', key)
+                    site_id = cursor.lastrowid
+                else:
+                    site_id = found[0]
+                sites[key] = site_id
+            ids.append((product_id, site_id))
+        return ids
+
+    # 가격을 대량으로 가져오는 동안 내려 두고 같은 일을 집합 단위로 처리하는 prices 트리거
+    BULK_PRICE_TRIGGERS = ('trg_price_daily_insert', 'trg_price_daily_update', 'trg_suggest_title', 'trg_suggest_title_update')
+
+    def _import_prices(self, cursor, rows):
+        ids = self._resolve_import_ids(cursor, rows)
+        cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS import_prices (
+                product_id INTEGER, site_id INTEGER, day TEXT, price REAL, product_title TEXT, product_url TEXT,
+                scraped_at TIMESTAMP, PRIMARY KEY (product_id, site_id, day)
+            )
+        ''')
+        cursor.execute('DELETE FROM import_prices')
+        cursor.executemany('''
+            INSERT INTO import_prices VALUES (?, ?, COALESCE(?, date(?, 'localtime')), ?, ?, ?, ?)
+            ON CONFLICT (product_id, site_id, day) DO UPDATE SET
+                price = excluded.price,
+                product_title = excluded.product_title,
+                product_url = excluded.product_url,
+                scraped_at = excluded.scraped_at
+            WHERE excluded.scraped_at > import_prices.scraped_at
+        ''', [(pid, sid, r['day'], r['scraped_at'], r['price'], r['product_title'], r['product_url'], r['scraped_at'])
+              for (pid, sid), r in zip(ids, rows)])
+        # 같은 날 이미 같거나 더 최근 기록이 있으면 가져오지 않음 (다시 가져와도 중복되지 않음)
+        cursor.execute('''
+            DELETE FROM import_prices WHERE EXISTS (
+                SELECT 1 FROM prices p
+                WHERE p.product_id = import_prices.product_id AND p.site_id = import_prices.site_id
+                  AND p.day = import_prices.day AND p.scraped_at >= import_prices.scraped_at
+            )
+        ''')
+        # 트리거 삭제/재생성도 같은 트랜잭션이라 다른 연결에서는 트리거가 없는 순간이 보이지 않음
+        cursor.execute(f'''
+            SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({', '.join('?' * len(self.BULK_PRICE_TRIGGERS))})
+        ''', self.BULK_PRICE_TRIGGERS)
+        triggers = cursor.fetchall()
+        for name, _ in triggers:
+            cursor.execute(f'DROP TRIGGER {name}')
+        try:
+            cursor.execute('''
+                INSERT INTO prices (product_id, site_id, price, product_title, product_url, scraped_at, day)
+                SELECT product_id, site_id, price, product_title, product_url, scraped_at, day
+                FROM import_prices WHERE true ORDER BY product_id, site_id, day
+                ON CONFLICT (product_id, site_id, day) DO UPDATE SET
+                    price = excluded.price,
+                    product_title = excluded.product_title,
+                    product_url = excluded.product_url,
+                    scraped_at = excluded.scraped_at
+            ''')
+            written = cursor.rowcount
+            cursor.execute('''
+                INSERT INTO price_daily_site (product_id, day, site_id, min_price, max_price, last_price, samples, updated_at)
+                SELECT product_id, day, site_id, price, price, price, 1, scraped_at
+                FROM import_prices WHERE price > 0
+                ON CONFLICT (product_id, day, site_id) DO UPDATE SET
+                    min_price = MIN(min_price, excluded.min_price),
+                    max_price = MAX(max_price, excluded.max_price),
+                    last_price = CASE WHEN excluded.updated_at >= updated_at THEN excluded.last_price ELSE last_price END,
+                    samples = samples + 1,
+                    updated_at = MAX(updated_at, excluded.updated_at)
+            ''')
+            cursor.execute('''
+                INSERT INTO price_daily (product_id, day, min_price, min_site_id, max_price, last_price, last_site_id, updated_at)
+                SELECT product_id, day, MIN(price), MAX(CASE WHEN lowest = 1 THEN site_id END), MAX(price),
+                       MAX(CASE WHEN latest = 1 THEN price END), MAX(CASE WHEN latest = 1 THEN site_id END), MAX(scraped_at)
+                FROM (
+                    -- 동률은 트리거와 같게 (prices 에 site_id 순으로 쓰므로 먼저 쓴 최저가, 마지막에 쓴 가격)
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY product_id, day ORDER BY price, site_id) AS lowest,
+                              ROW_NUMBER() OVER (PARTITION BY product_id, day ORDER BY scraped_at DESC, site_id DESC) AS latest
+                    FROM import_prices WHERE price > 0
+                )
+                GROUP BY product_id, day
+                ON CONFLICT (product_id, day) DO UPDATE SET
+                    min_site_id = CASE WHEN excluded.min_price < min_price THEN excluded.min_site_id ELSE min_site_id END,
+                    min_price = MIN(min_price, excluded.min_price),
+                    max_price = MAX(max_price, excluded.max_price),
+                    last_price = CASE WHEN excluded.updated_at >= updated_at THEN excluded.last_price ELSE last_price END,
+                    last_site_id = CASE WHEN excluded.updated_at >= updated_at THEN excluded.last_site_id ELSE last_site_id END,
+                    updated_at = MAX(updated_at, excluded.updated_at)
+            ''')
+            cursor.execute('''
+                INSERT INTO suggestions (term)
+                SELECT DISTINCT product_title FROM import_prices
+                WHERE product_title IS NOT NULL AND product_title != ''
+                  AND NOT EXISTS (SELECT 1 FROM suggestions WHERE term = import_prices.product_title)
+            ''')
+        finally:
+            for _, sql in triggers:
+                cursor.execute(sql)
+        return written
+
+    def import_rows(self, table, rows):
+        """Merge exported rows of one table into this database in a single transaction.
+
+        Rows are matched on natural keys: sites by name + url_pattern, products
+        by name, search history by keyword, prices by product/site/day (the
+        newer scrape wins) and rollups by product/site/period. Rows that are
+        already present are skipped. Returns the number of rows inserted or updated.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        updated = 0
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if table == 'sites':
+                # 가격을 먼저 가져와서 임시로 만든 쇼핑몰은 설정으로 채움
+                cursor.executemany('''
+                    UPDATE sites SET title_selector = ?, price_selector = ?, is_active = COALESCE(?, 1),
+                                     cache_ttl = ?, max_bytes = ?, imported = COALESCE(?, 0)
+                    WHERE name = ? AND url_pattern = ? AND imported = 1
+                ''', [(r['title_selector'], r['price_selector'], r['is_active'], r['cache_ttl'], r['max_bytes'],
+                       r.get('imported'), r['name'], r['url_pattern']) for r in rows])
+                updated = cursor.rowcount
+                cursor.executemany('''
+                    INSERT INTO sites (name, url_pattern, title_selector, price_selector, is_active, cache_ttl, max_bytes,
+                                       imported)
+                    SELECT ?, ?, ?, ?, COALESCE(?, 1), ?, ?, COALESCE(?, 0)
+                    WHERE NOT EXISTS (SELECT 1 FROM sites WHERE name = ? AND url_pattern = ?)
+                ''', [(r['name'], r['url_pattern'], r['title_selector'], r['price_selector'], r['is_active'],
+                       r['cache_ttl'], r['max_bytes'], r.get('imported'), r['name'], r['url_pattern']) for r in rows])
+            elif table == 'products':
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO products (name, created_at) VALUES (?, COALESCE(?, CURRENT_TIMESTAMP))
+                ''', [(r['name'], r['created_at']) for r in rows])
+            elif table == 'search_history':
+                cursor.executemany('''
+                    INSERT INTO search_history (keyword, last_searched_at) VALUES (?, COALESCE(?, CURRENT_TIMESTAMP))
+                    ON CONFLICT (keyword) DO UPDATE SET last_searched_at = excluded.last_searched_at
+                    WHERE excluded.last_searched_at > search_history.last_searched_at
+                ''', [(r['keyword'], r['last_searched_at']) for r in rows])
+            elif table == 'prices':
+                written = self._import_prices(cursor, rows)
+                conn.commit()
+                return written
+            elif table == 'price_rollups':
+                ids = self._resolve_import_ids(cursor, rows)
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO price_rollups (product_id, site_id, period, period_start, min_price, max_price,
+                                                         sum_price, samples, last_price, last_title, last_url, last_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(pid, sid, r['period'], r['period_start'], r['min_price'], r['max_price'], r['sum_price'],
+                       r['samples'], r['last_price'], r['last_title'], r['last_url'], r['last_at'])
+                      for (pid, sid), r in zip(ids, rows)])
+            else:
+                raise ValueError(f'unknown table: {table}')
+            written = updated + cursor.rowcount
+            conn.commit()
+            return written
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="가격 DB 관리 도구")
+    parser.add_argument("--db", default="prices_mobile.db")
+    parser.add_argument("--rebuild-aggregates", action="store_true", help="일별 가격 집계를 prices 테이블에서 다시 계산")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    if args.rebuild_aggregates:
+        db.rebuild_daily_aggregates()
+        print("일별 가격 집계를 다시 계산했습니다.")
+    db.close()
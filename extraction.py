@@ -0,0 +1,382 @@
+import codecs
+import itertools
+import re
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from requests.compat import chardet
+import soupsieve
+
+# 상품 목록과 무관하지만 쇼핑몰 페이지 용량의 대부분을 차지하는 블록
+_SKIPPED_BLOCK = re.compile(r'<(script|style)\b[^>]*>', re.I)
+STREAM_CHUNK = 16 * 1024
+# 첫 확인 지점 (이후 두 배씩 늘려서 전체 파싱 비용이 최종 한 번의 두 배를 넘지 않음)
+FIRST_CHECKPOINT = 32 * 1024
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+
+
+class HtmlStream:
+    """Accumulates decoded HTML chunk by chunk, dropping <script>/<style> bodies.
+
+    Only the markup outside those blocks is kept in memory, so pages that are
+    mostly inline scripts cost a fraction of their size to hold and parse.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._tail = ''
+        self._closing = None
+
+    def feed(self, text):
+        data = self._tail + text
+        self._tail = ''
+        lower = data.lower()
+        pos = 0
+        while True:
+            if self._closing:
+                end = lower.find(self._closing, pos)
+                if end < 0:
+                    # 닫는 태그가 다음 조각에 걸쳐 있을 수 있으므로 끝부분만 남김
+                    self._tail = data[max(pos, len(data) - len(self._closing)):]
+                    return
+                gt = data.find('>', end)
+                if gt < 0:
+                    self._tail = data[end:]
+                    return
+                self._closing = None
+                pos = gt + 1
+            m = _SKIPPED_BLOCK.search(data, pos)
+            if m is None:
+                # 잘린 태그('<scr' 등)는 다음 조각과 합쳐서 다시 확인
+                lt = data.rfind('<', pos)
+                keep = lt if lt >= 0 and data.find('>', lt) < 0 else len(data)
+                self._parts.append(data[pos:keep])
+                self._tail = data[keep:]
+                return
+            self._parts.append(data[pos:m.start()])
+            self._closing = '</' + m.group(1).lower()
+            pos = m.end()
+
+    def prefix(self):
+        """Kept markup up to the last complete tag, so no text node is cut short."""
+        html = ''.join(self._parts)
+        self._parts = [html]
+        return html[:html.rfind('>') + 1]
+
+    def close(self):
+        """All kept markup, including a trailing partial tag or text."""
+        html = ''.join(self._parts)
+        return html if self._closing else html + self._tail
+
+
+def _guess_encoding(head):
+    """Encoding of a body from its first bytes: <meta charset>, then UTF-8, then a charset detector."""
+    m = _META_CHARSET.search(head)
+    if m:
+        name = m.group(1).decode('ascii', 'replace')
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            pass
+    try:
+        # 조각 끝에서 잘린 멀티바이트 문자는 무시
+        head.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        if e.start >= len(head) - 3:
+            return 'utf-8'
+    encoding = chardet.detect(head).get('encoding') if chardet else None
+    # 한국 쇼핑몰에서 UTF-8 이 아니면 대부분 EUC-KR/CP949 (CP949 가 EUC-KR 을 포함함)
+    if not encoding or encoding.lower().replace('_', '-') in ('euc-kr', 'cp949', 'uhc', 'ks-c-5601-1987'):
+        return 'cp949'
+    return encoding
+
+
+def read_html(response, max_bytes=None, stop=None):
+    """Stream a requests response into stripped HTML without holding the raw body.
+
+    Reading stops once max_bytes of body have arrived or, at checkpoints that
+    double from FIRST_CHECKPOINT, when stop(prefix_html) returns True.
+    Returns (html, info) where info has 'bytes' read and 'stopped'
+    ('budget', 'early' or None when the whole body was read).
+    """
+    # 헤더에 charset 이 있으면 따르고, 없으면 첫 조각으로 추정
+    # (requests 는 charset 없는 text/html 을 ISO-8859-1 로 보고, apparent_encoding 은 본문 전체를 읽음)
+    chunks = response.iter_content(STREAM_CHUNK)
+    first = next(chunks, b'')
+    if 'charset' in response.headers.get('Content-Type', '').lower() and response.encoding:
+        encoding = response.encoding
+    else:
+        encoding = _guess_encoding(first)
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    stream = HtmlStream()
+    received = 0
+    checkpoint = FIRST_CHECKPOINT
+    stopped = None
+    for chunk in itertools.chain((first,) if first else (), chunks):
+        if max_bytes and received + len(chunk) >= max_bytes:
+            stream.feed(decoder.decode(chunk[:max_bytes - received]))
+            received = max_bytes
+            stopped = 'budget'
+            break
+        received += len(chunk)
+        stream.feed(decoder.decode(chunk))
+        if stop is not None and received >= checkpoint:
+            checkpoint *= 2
+            if stop(stream.prefix()):
+                stopped = 'early'
+                break
+    if stopped:
+        return stream.prefix(), {'bytes': received, 'stopped': stopped}
+    stream.feed(decoder.decode(b'', final=True))
+    return stream.close(), {'bytes': received, 'stopped': None}
+
+
+def split_price_selector(price_selector):
+    """Split 'css::attr(name)' into ('css', 'name'); plain selectors give (css, None)."""
+    if "::attr(" in price_selector:
+        css, attr = price_selector.split("::attr(", 1)
+        return css.strip(), attr.rstrip(")")
+    return price_selector, None
+
+
+class Bs4Backend:
+    """The original BeautifulSoup/html.parser path; always available."""
+    name = 'bs4'
+
+    def compile(self, css):
+        return soupsieve.compile(css)
+
+    def parse(self, html):
+        return BeautifulSoup(html, 'html.parser')
+
+    def select_one(self, root, matcher):
+        return matcher.select_one(root)
+
+    def select(self, root, matcher):
+        return matcher.select(root)
+
+    def parent(self, el):
+        return el.parent
+
+    def text(self, el):
+        return el.get_text(strip=True)
+
+    def attr(self, el, name):
+        value = el.get(name, "")
+        return " ".join(value) if isinstance(value, list) else value
+
+    def link(self, el):
+        if el.name == 'a':
+            link_el = el
+        else:
+            link_el = el.find_parent('a') or el.find('a')
+        return link_el.get('href') if link_el else None
+
+
+class LxmlBackend:
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import html as lxml_html
+        from lxml.cssselect import CSSSelector
+        self._html = lxml_html
+        self._selector = CSSSelector
+
+    def compile(self, css):
+        return self._selector(css, translator='html')
+
+    def parse(self, html):
+        try:
+            return self._html.document_fromstring(html)
+        except ValueError:
+            # 인코딩 선언이 있는 문서는 str 로 파싱할 수 없음
+            return self._html.document_fromstring(html.encode('utf-8'))
+
+    def select_one(self, root, matcher):
+        found = matcher(root)
+        return found[0] if found else None
+
+    def select(self, root, matcher):
+        return matcher(root)
+
+    def parent(self, el):
+        return el.getparent()
+
+    def text(self, el):
+        return "".join(t.strip() for t in el.itertext())
+
+    def attr(self, el, name):
+        return el.get(name, "")
+
+    def link(self, el):
+        if el.tag == 'a':
+            link_el = el
+        else:
+            link_el = next(el.iterancestors('a'), None)
+            if link_el is None:
+                link_el = el.find('.//a')
+        return link_el.get('href') if link_el is not None else None
+
+
+class SelectolaxBackend:
+    name = 'selectolax'
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def compile(self, css):
+        # lexbor 는 선택자를 미리 컴파일하는 API 가 없으므로 문자열 그대로 사용
+        return css
+
+    def parse(self, html):
+        return self._parser(html)
+
+    def select_one(self, root, matcher):
+        return root.css_first(matcher)
+
+    def select(self, root, matcher):
+        return root.css(matcher)
+
+    def parent(self, el):
+        return el.parent
+
+    def text(self, el):
+        return el.text(deep=True, separator="", strip=True)
+
+    def attr(self, el, name):
+        return el.attributes.get(name) or ""
+
+    def link(self, el):
+        link_el = el if el.tag == 'a' else None
+        parent = el.parent
+        while link_el is None and parent is not None:
+            if parent.tag == 'a':
+                link_el = parent
+            parent = parent.parent
+        if link_el is None:
+            link_el = el.css_first('a')
+        return link_el.attributes.get('href') if link_el is not None else None
+
+
+BACKENDS = {
+    'selectolax': SelectolaxBackend,
+    'lxml': LxmlBackend,
+    'bs4': Bs4Backend,
+}
+_backend_cache = {}
+
+
+def get_backend(name=None):
+    """Return a parser backend instance.
+
+    With no name, the fastest installed backend is used
+    (selectolax, then lxml, then BeautifulSoup's html.parser).
+    """
+    names = [name] if name else list(BACKENDS)
+    for candidate in names:
+        if candidate in _backend_cache:
+            return _backend_cache[candidate]
+        try:
+            backend = BACKENDS[candidate]()
+        except ImportError:
+            if name:
+                raise
+            continue
+        _backend_cache[candidate] = backend
+        return backend
+    return get_backend('bs4')
+
+
+class ExtractionPlan:
+    """A site's selectors compiled once for one backend."""
+
+    # 제목에서 상품 박스(li/div)까지 거슬러 올라가는 최대 단계
+    MAX_CONTAINER_DEPTH = 8
+
+    def __init__(self, site_config, backend=None):
+        self.backend = backend or get_backend()
+        self.source = (site_config['title_selector'], site_config['price_selector'])
+        self.title = self.backend.compile(site_config['title_selector'])
+        price_css, self.price_attr = split_price_selector(site_config['price_selector'])
+        self.price = self.backend.compile(price_css) if price_css else None
+
+    def matches(self, site_config):
+        return self.source == (site_config['title_selector'], site_config['price_selector'])
+
+    def extract(self, html, base_url):
+        """Return {'product_title', 'price_text', 'url'} for the first listing, or None."""
+        return self._first(self.backend.parse(html), base_url)
+
+    def _first(self, root, base_url):
+        backend = self.backend
+        title_el = backend.select_one(root, self.title)
+        price_text = ""
+        if self.price is not None:
+            price_el = backend.select_one(root, self.price)
+            if price_el is not None:
+                price_text = self._price_text(price_el)
+        if title_el is None or not price_text:
+            return None
+        return self._offer(title_el, price_text, base_url)
+
+    def extract_all(self, html, base_url, limit=10, timings=None):
+        """Return up to `limit` listings from one parse of the page.
+
+        Each title is paired with the price inside its own item container,
+        i.e. the nearest ancestor that holds a price match and no other title.
+        Pages where no title can be paired that way fall back to extract().
+        If a timings dict is given, parse_ms and match_ms are stored in it.
+        """
+        backend = self.backend
+        started = time.perf_counter()
+        root = backend.parse(html)
+        parsed = time.perf_counter()
+        offers = []
+        if self.price is not None:
+            for title_el in backend.select(root, self.title):
+                if len(offers) >= limit:
+                    break
+                price_el = self._container_price(title_el)
+                price_text = self._price_text(price_el) if price_el is not None else ""
+                if price_text:
+                    offers.append(self._offer(title_el, price_text, base_url))
+        if not offers:
+            # 같은 파싱 결과로 첫 번째 상품만 다시 찾음
+            found = self._first(root, base_url)
+            offers = [found] if found else []
+        if timings is not None:
+            timings['parse_ms'] = (parsed - started) * 1000
+            timings['match_ms'] = (time.perf_counter() - parsed) * 1000
+        return offers
+
+    def _container_price(self, title_el):
+        backend = self.backend
+        el = backend.parent(title_el)
+        for _ in range(self.MAX_CONTAINER_DEPTH):
+            if el is None:
+                break
+            price_el = backend.select_one(el, self.price)
+            if price_el is not None:
+                # 다른 상품 제목까지 포함하면 상품 박스가 아니라 목록 전체임
+                return price_el if len(backend.select(el, self.title)) == 1 else None
+            el = backend.parent(el)
+        return None
+
+    def _price_text(self, price_el):
+        if self.price_attr:
+            return self.backend.attr(price_el, self.price_attr)
+        return self.backend.text(price_el)
+
+    def _offer(self, title_el, price_text, base_url):
+        href = self.backend.link(title_el)
+        return {
+            'product_title': self.backend.text(title_el),
+            'price_text': price_text,
+            'url': urljoin(base_url, href) if href else base_url,
+        }
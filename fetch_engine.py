@@ -0,0 +1,105 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+
+class ConcurrentFetcher:
+    """Runs one task per site on a thread pool.
+
+    The pool size is the global concurrency limit; a semaphore per host keeps
+    us from opening more than `per_host_limit` requests against the same mall.
+    The pool is kept for the fetcher's lifetime, so concurrent map_sites calls
+    (e.g. several UI sessions) share the same threads and limits.
+    """
+
+    def __init__(self, max_workers=8, per_host_limit=2, deadline=20):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.deadline = deadline
+        self._host_locks = {}
+        self._host_locks_guard = threading.Lock()
+        self._executor = None
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._host_locks_guard:
+            sem = self._host_locks.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_locks[host] = sem
+            return sem
+
+    def _pool(self):
+        with self._host_locks_guard:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch')
+            return self._executor
+
+    def _run(self, fn, site_config):
+        with self._host_semaphore(site_config['url_pattern']):
+            return fn(site_config)
+
+    def _run_url(self, fn, url, args):
+        with self._host_semaphore(url):
+            return fn(url, *args)
+
+    def submit(self, fn, url, *args):
+        """Run fn(url, *args) on the shared pool under url's per-host limit and return the Future."""
+        return self._pool().submit(self._run_url, fn, url, args)
+
+    @staticmethod
+    def _outcome(site_config, future):
+        try:
+            return site_config, future.result()
+        except Exception as e:
+            return site_config, {'site_name': site_config['name'], 'error': str(e), 'success': False}
+
+    def map_sites(self, fn, site_configs, deadline=None, cancel_event=None):
+        """Yield (site_config, result) pairs in completion order.
+
+        Sites that have not finished when the deadline expires are yielded with
+        a timeout error result so callers can still account for them. Setting
+        cancel_event stops the iteration within ~0.1s: results that finished in
+        the meantime are still yielded, and sites that have not started yet are
+        cancelled (running ones cannot be interrupted and finish on their own).
+        """
+        if not site_configs:
+            return
+        deadline = self.deadline if deadline is None else deadline
+        started = time.monotonic()
+        executor = self._pool()
+        futures = {executor.submit(self._run, fn, sc): sc for sc in site_configs}
+        pending = set(futures)
+        try:
+            while pending:
+                remaining = None if deadline is None else deadline - (time.monotonic() - started)
+                if remaining is not None and remaining <= 0:
+                    break
+                if cancel_event is not None:
+                    if cancel_event.is_set():
+                        # 이미 끝난 작업의 결과는 버리지 않음 (호출자가 저장할 수 있게)
+                        for future in pending:
+                            future.cancel()
+                        for future in [f for f in pending if f.done() and not f.cancelled()]:
+                            yield self._outcome(futures.pop(future), future)
+                        return
+                    # 취소 여부를 확인할 수 있도록 짧게 나눠서 대기
+                    remaining = 0.1 if remaining is None else min(remaining, 0.1)
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield self._outcome(futures.pop(future), future)
+            elapsed = time.monotonic() - started
+            for future in pending:
+                future.cancel()
+                sc = futures.pop(future)
+                if future.done() and not future.cancelled():
+                    # 마감 직후에 끝난 작업
+                    yield self._outcome(sc, future)
+                    continue
+                yield sc, {'site_name': sc['name'], 'error': f'Timed out after {elapsed:.1f}s', 'success': False,
+                           'metrics': {'outcome': 'timeout', 'total_ms': elapsed * 1000}}
+        finally:
+            # 공유 풀이므로 이 호출에서 아직 시작하지 않은 작업만 취소
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+import time
+
+
+class HttpCache:
+    """URL-keyed response cache stored in a small SQLite file.
+
+    Entries younger than their TTL are served without touching the network.
+    Older entries keep their ETag/Last-Modified so the next request can be
+    revalidated with a conditional GET (a 304 costs no body). The total body
+    size is capped; least recently used entries are evicted first.
+
+    A body whose download was cut short is stored with `partial` set to the
+    reason ('early' or 'budget'), so callers that need the whole page can
+    ignore it while search requests still get the TTL and 304 savings.
+    """
+
+    def __init__(self, db_name="http_cache.db", default_ttl=600, max_bytes=20 * 1024 * 1024):
+        self.db_name = db_name
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_name, timeout=10, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        with self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    url TEXT PRIMARY KEY,
+                    body TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    partial TEXT
+                )
+            ''')
+            columns = [row[1] for row in self._conn.execute('PRAGMA table_info(http_cache)')]
+            if 'partial' not in columns:
+                # 이전 버전에서 만든 캐시 파일 (저장된 항목은 모두 끝까지 읽은 본문)
+                self._conn.execute('ALTER TABLE http_cache ADD COLUMN partial TEXT')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_http_cache_accessed ON http_cache (accessed_at)')
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM http_cache').fetchone()[0]
+
+    def get(self, url):
+        """Return the cached entry for url as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body, etag, last_modified, fetched_at, partial FROM http_cache WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute('UPDATE http_cache SET accessed_at = ? WHERE url = ?', (time.time(), url))
+        return {'body': row[0], 'etag': row[1], 'last_modified': row[2], 'fetched_at': row[3], 'partial': row[4]}
+
+    def is_fresh(self, entry, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        return entry is not None and time.time() - entry['fetched_at'] < ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Validator headers for revalidating a stale entry."""
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, body, etag=None, last_modified=None, partial=None):
+        size = len(body.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            old = self._conn.execute('SELECT size FROM http_cache WHERE url = ?', (url,)).fetchone()
+            self._conn.execute('''
+                INSERT OR REPLACE INTO http_cache (url, body, etag, last_modified, fetched_at, accessed_at, size, partial)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (url, body, etag, last_modified, now, now, size, partial))
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict()
+
+    def put_response(self, url, response, body=None, partial=None):
+        """Cache a successful requests.Response for url (body defaults to response.text)."""
+        body = response.text if body is None else body
+        self.put(url, body, response.headers.get('ETag'), response.headers.get('Last-Modified'), partial)
+
+    def touch(self, url):
+        """Mark an entry as freshly validated (after a 304 Not Modified)."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE http_cache SET fetched_at = ?, accessed_at = ? WHERE url = ?', (now, now, url))
+
+    def _evict(self):
+        # 용량 초과 시 가장 오래 사용하지 않은 항목부터 삭제
+        while self._total_bytes > self.max_bytes:
+            row = self._conn.execute('SELECT url, size FROM http_cache ORDER BY accessed_at LIMIT 1').fetchone()
+            if row is None:
+                self._total_bytes = 0
+                break
+            self._conn.execute('DELETE FROM http_cache WHERE url = ?', (row[0],))
+            self._total_bytes -= row[1]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM http_cache')
+            self._total_bytes = 0
@@ -1,35 +1,91 @@
 import flet as ft
 import threading
-import datetime
-import asyncio
-from database_manager import DatabaseManager
-from scraper import PriceScraper
-from auto_discovery import SiteAnalyzer
+import time
+from alerts import WINDOW_DAYS, format_alert
+from search_jobs import JobQueueFull
+from services import AppServices
+from site_health import OPEN
 
 # Colors
 PRIMARY = ft.Colors.INDIGO_400
 BG_COLOR = "#121212"
 CARD_BG = "#1E1E1E"
 
+# 사이트별 차트 최대 포인트 수 (오래된 기록은 DB에서 구간 평균으로 축약)
+CHART_MAX_POINTS = 90
+
+# 자동완성/상품 선택 목록에 보여줄 최대 개수
+SUGGESTION_LIMIT = 8
+# 자동완성 조회 전에 입력이 멈추기를 기다리는 시간 (초)
+SUGGESTION_DELAY = 0.15
+PRODUCT_PICKER_LIMIT = 50
+
+# 가격추이 탭에 보여줄 상품별 최근 알림 개수
+RECENT_ALERTS = 3
+
 class PriceCompareMobile:
-    def __init__(self, page: ft.Page):
+    """UI controller for one page/session; DB, HTTP and scraping live in AppServices."""
+
+    def __init__(self, page: ft.Page, services=None):
         self.page = page
         self.page.title = "측기 가격비교"
         self.page.theme_mode = ft.ThemeMode.DARK
         self.page.padding = 0
         self.page.bgcolor = BG_COLOR
-        
+
+        # 웹 모드에서 접속한 모든 세션이 같은 서비스를 공유 (첫 화면을 먼저 그림)
+        self.services = services or AppServices.instance()
+        self.db = None
+        self.health = None
+        self.db_ready = threading.Event()
+        self.last_searched = None
+        # 현재 검색 결과 카드 (site_id -> 카드)
+        self.result_cards = {}
+
         # Robust initialization
         try:
-            # On Android, relative path might be tricky, but usually works in app dir.
-            # Using a simple try-except to catch DB errors.
-            self.db = DatabaseManager("prices_mobile.db")
-            self.scraper = PriceScraper()
-            self.analyzer = SiteAnalyzer()
-            self.last_searched = None
             self.setup_ui()
         except Exception as e:
             self.show_critical_error(str(e))
+            return
+        threading.Thread(target=self.open_database, daemon=True).start()
+
+    def open_database(self):
+        """Get the shared DB and read the site/product lists off the UI thread, then show them."""
+        try:
+            db = self.services.get_db()
+            sites = db.get_sites()
+            stats = db.get_site_metric_summary()
+            products = db.find_products(limit=PRODUCT_PICKER_LIMIT)
+            unseen = db.get_alert_events(unseen_only=True)
+        except Exception as e:
+            error_msg = str(e)
+            self.page.run_threadsafe(lambda: self.show_critical_error(error_msg))
+            return
+        self.db = db
+        self.health = self.services.health
+        self.db_ready.set()
+        # 이 세션이 열려 있는 동안 발생한 가격 알림을 표시
+        self.services.alerts.add_listener(self.on_alerts)
+        self.page.on_disconnect = lambda e: self.services.alerts.remove_listener(self.on_alerts)
+
+        def show_lists():
+            self.render_sites(sites, stats)
+            self.render_products(products)
+            if unseen:
+                # 앱이 꺼져 있는 동안 (스케줄러, 대량 수집) 발생한 알림
+                self.show_snack(f"확인하지 않은 가격 알림 {len(unseen)}건 · {format_alert(unseen[0])}")
+        self.page.run_threadsafe(show_lists)
+
+    def on_alerts(self, events):
+        # DB writer 스레드에서 호출되므로 UI 갱신은 넘겨서 처리
+        message = format_alert(events[0]) + (f" 외 {len(events) - 1}건" if len(events) > 1 else "")
+        self.page.run_threadsafe(lambda: self.show_snack(message))
+
+    def show_snack(self, message):
+        self.page.snack_bar = ft.SnackBar(ft.Text(message), bgcolor=ft.Colors.AMBER_900)
+        self.page.snack_bar.open = True
+        self.page.update()
 
     def show_critical_error(self, error_msg):
         self.page.add(
@@ -64,26 +120,53 @@ class PriceCompareMobile:
             hint_text="검색 상품명 입력",
             expand=True,
             border_radius=10,
-            on_submit=self.start_search
+            on_submit=self.start_search,
+            on_change=self.on_search_change
         )
+        self.suggestion_list = ft.Column(spacing=0, visible=False)
         self.search_results = ft.ListView(expand=True, spacing=10, padding=10)
         self.search_view = ft.Column([
             ft.Container(
                 content=ft.Row([self.search_input, ft.IconButton(icon=ft.Icons.SEARCH, on_click=self.start_search)]),
                 padding=10
             ),
+            ft.Container(content=self.suggestion_list, padding=ft.padding.symmetric(horizontal=10)),
             self.search_results
         ], visible=True)
 
         # Tab 2: History
+        self.product_filter = ft.TextField(
+            hint_text="상품 이름으로 찾기",
+            prefix_icon=ft.Icons.FILTER_LIST,
+            border_radius=10,
+            on_change=lambda e: self.load_products()
+        )
         self.product_dropdown = ft.Dropdown(
             label="상품 선택",
             on_change=self.on_product_select,
             border_radius=10
         )
+        self.range_dropdown = ft.Dropdown(
+            label="기간",
+            value="90",
+            options=[
+                ft.dropdown.Option("30", "1개월"),
+                ft.dropdown.Option("90", "3개월"),
+                ft.dropdown.Option("365", "1년"),
+                ft.dropdown.Option("0", "전체"),
+            ],
+            on_change=self.on_product_select,
+            border_radius=10,
+            width=110
+        )
+        self.history_summary = ft.Text("", size=13, color=ft.Colors.AMBER_200)
+        self.alert_view = ft.Column(spacing=2)
         self.chart_container = ft.Container(expand=True, padding=10)
         self.history_view = ft.Column([
-            ft.Container(content=self.product_dropdown, padding=10),
+            ft.Container(content=self.product_filter, padding=ft.padding.only(left=10, right=10, top=10)),
+            ft.Container(content=ft.Row([ft.Container(content=self.product_dropdown, expand=True), self.range_dropdown]), padding=10),
+            ft.Container(content=self.history_summary, padding=ft.padding.symmetric(horizontal=10)),
+            ft.Container(content=self.alert_view, padding=ft.padding.symmetric(horizontal=10)),
             self.chart_container
         ], visible=False)
 
@@ -91,6 +174,12 @@ class PriceCompareMobile:
         self.site_list = ft.ListView(expand=True, spacing=10, padding=10)
         self.settings_view = ft.Column([
             ft.Container(content=ft.Text("쇼핑몰 관리", size=20, weight="bold"), padding=10),
+            ft.Container(
+                content=ft.Switch(label="관심 상품 자동 가격 갱신 (6시간마다)",
+                                  value=bool(self.services.scheduler and self.services.scheduler.running),
+                                  on_change=self.toggle_scheduler),
+                padding=ft.padding.symmetric(horizontal=10)
+            ),
             self.site_list,
             ft.FloatingActionButton(icon=ft.Icons.ADD, on_click=self.show_add_site_dialog)
         ], visible=False)
@@ -107,8 +196,6 @@ class PriceCompareMobile:
             ),
             self.tabs
         )
-        self.load_sites()
-        self.load_products()
 
     def on_tab_change(self, e):
         idx = self.tabs.selected_index
@@ -116,7 +203,9 @@ class PriceCompareMobile:
         self.history_view.visible = (idx == 1)
         self.settings_view.visible = (idx == 2)
         
-        if idx == 1:
+        if idx == 1 and self.db_ready.is_set():
+            if self.last_searched:
+                self.product_filter.value = ""
             self.load_products()
             if self.last_searched:
                 self.product_dropdown.value = self.last_searched
@@ -126,7 +215,11 @@ class PriceCompareMobile:
 
     def load_sites(self):
         try:
-            sites = self.db.get_sites()
+            self.render_sites(self.db.get_sites(), self.db.get_site_metric_summary())
+        except: pass
+
+    def render_sites(self, sites, stats):
+        try:
             self.site_list.controls.clear()
             for site in sites:
                 self.site_list.controls.append(
@@ -134,7 +227,7 @@ class PriceCompareMobile:
                         content=ft.ListTile(
                             leading=ft.Icon(ft.Icons.STORE),
                             title=ft.Text(site[1]),
-                            subtitle=ft.Text(site[2]),
+                            subtitle=ft.Column([ft.Text(site[2]), self.build_site_stats(stats.get(site[0]), self.health.status(site[0]))], spacing=2),
                             trailing=ft.IconButton(ft.Icons.DELETE, on_click=lambda x, sid=site[0]: self.delete_site(sid))
                         )
                     )
@@ -142,86 +235,326 @@ class PriceCompareMobile:
             self.page.update()
         except: pass
 
+    def build_site_stats(self, st, health_state=None):
+        if not st:
+            return ft.Text("측정 기록 없음", size=12, color=ft.Colors.GREY_500)
+        # 느리거나 자주 실패하는 쇼핑몰을 눈에 띄게 표시
+        slow = (st['p95_ms'] or 0) > 5000 or st['success_rate'] < 0.5 or health_state == OPEN
+        # 지연시간은 실제로 받아 온 요청만, 캐시로 처리한 요청 수는 따로 표시
+        latency = (f"p50 {st['p50_ms'] / 1000:.1f}s · p95 {st['p95_ms'] / 1000:.1f}s · "
+                   if st['p50_ms'] is not None else "")
+        return ft.Text(
+            latency + f"성공률 {st['success_rate'] * 100:.0f}% ({st['n']}회"
+            + (f", 캐시 {st['cached']}회" if st['cached'] else "") + ")"
+            + (" · 일시 중단" if health_state == OPEN else ""),
+            size=12,
+            color=ft.Colors.RED_300 if slow else ft.Colors.GREY_400
+        )
+
+    def toggle_scheduler(self, e):
+        if e.control.value:
+            self.services.get_scheduler().start()
+        elif self.services.scheduler:
+            self.services.scheduler.stop()
+
     def delete_site(self, sid):
         self.db.delete_site(sid)
         self.load_sites()
 
+    def on_search_change(self, e):
+        text = self.search_input.value or ""
+        owner = (self, 'suggestions')
+        if not text.strip() or not self.db_ready.is_set():
+            self.services.cancel_job(owner)
+            self.show_suggestions(text, [])
+            return
+        try:
+            # 입력이 잠시 멈춘 뒤에 작업 풀에서 조회 (새 입력이 오면 이전 조회는 취소됨)
+            self.services.run_job(self.load_suggestions, text, owner=owner)
+        except JobQueueFull:
+            pass
+
+    def load_suggestions(self, job, text):
+        if job.cancel_event.wait(SUGGESTION_DELAY):
+            return
+        terms = self.db.get_suggestions(text, SUGGESTION_LIMIT)
+
+        def show():
+            # 그사이 입력이 바뀌었으면 오래된 후보는 표시하지 않음
+            if not job.cancelled and (self.search_input.value or "") == text:
+                self.show_suggestions(text, terms)
+        self.page.run_threadsafe(show)
+
+    def show_suggestions(self, text, terms):
+        self.suggestion_list.controls = [
+            ft.ListTile(
+                dense=True,
+                leading=ft.Icon(ft.Icons.SEARCH, size=18),
+                title=ft.Text(term, max_lines=1),
+                on_click=lambda x, term=term: self.pick_suggestion(term)
+            )
+            for term in terms if term != text
+        ]
+        self.suggestion_list.visible = bool(self.suggestion_list.controls)
+        self.page.update()
+
+    def pick_suggestion(self, term):
+        self.search_input.value = term
+        self.start_search(None)
+
     def start_search(self, e):
         keyword = self.search_input.value
         if not keyword: return
         self.last_searched = keyword
+        self.services.cancel_job((self, 'suggestions'))
+        self.suggestion_list.visible = False
         self.search_results.controls.clear()
         self.search_results.controls.append(ft.ProgressBar(color=PRIMARY))
+        self.result_cards = {}
         self.page.update()
         
-        threading.Thread(target=self.run_scraping, args=(keyword,), daemon=True).start()
-
-    def run_scraping(self, keyword):
-        pid = self.db.get_or_create_product(keyword)
-        sites = self.db.get_sites()
-        results = []
-        for site in sites:
-            site_config = {'id': site[0], 'name': site[1], 'url_pattern': site[2], 'title_selector': site[3], 'price_selector': site[4]}
-            res = self.scraper.scrape_site(site_config, keyword)
+        try:
+            # 같은 화면의 이전 검색은 취소됨
+            self.services.run_job(self.run_scraping, keyword, owner=self)
+        except JobQueueFull:
+            self.search_results.controls = [ft.Text("검색 요청이 많습니다. 잠시 후 다시 시도해 주세요.")]
+            self.page.update()
+
+    def run_scraping(self, job, keyword):
+        def on_result(site, res):
+            # 사이트별로 끝나는 즉시 카드를 추가하거나 저장된 가격 카드를 교체 (가장 느린 사이트만큼만 기다림)
             if res['success']:
-                self.db.add_price(pid, site[0], res['price'], res['product_title'], res['url'])
-                results.append(res)
-        
-        def update_ui():
-            self.search_results.controls.clear()
-            if not results:
+                def show():
+                    # 새 검색이 시작된 뒤 도착한 결과는 버림
+                    if not job.cancelled:
+                        self.set_result_card(site['id'], res)
+                self.page.run_threadsafe(show)
+
+        self.db_ready.wait()
+        if job.cancelled:
+            return
+        # 네트워크 요청 전에 사이트별 마지막 저장 가격부터 표시 (오프라인에서도 결과가 보임)
+        product_id = self.db.get_product_id(keyword)
+        snapshot = self.db.get_latest_results(product_id) if product_id else []
+        if snapshot:
+            def show_snapshot():
+                if job.cancelled:
+                    return
+                now = time.time()
+                for res in snapshot:
+                    # 가져온(import) 기록은 수집 시각이 없을 수 있음: 경과 시간 없이 표시
+                    age = None if res['scraped_at'] is None else now - res['scraped_at']
+                    self.set_result_card(res['site_id'], res, age=age, update=False)
+                self.page.update()
+            self.page.run_threadsafe(show_snapshot)
+
+        results = self.services.get_searcher().search(keyword, on_result, cancel_event=job.cancel_event)
+        if job.cancelled:
+            return
+        found = sum(1 for site, res in results if res['success'])
+        summary = self.format_price_summary(self.db.get_price_summary(self.db.get_product_id(keyword))) if found or snapshot else ""
+
+        def finish_ui():
+            if job.cancelled:
+                return
+            self.search_results.controls = [c for c in self.search_results.controls if not isinstance(c, ft.ProgressBar)]
+            if not self.result_cards:
                 self.search_results.controls.append(ft.Text("검색 결과가 없습니다."))
             else:
-                for r in results:
-                    self.search_results.controls.append(
-                        ft.Card(
-                            content=ft.Container(
-                                content=ft.Column([
-                                    ft.ListTile(
-                                        title=ft.Text(r['product_title'], max_lines=2, weight="bold"),
-                                        subtitle=ft.Text(r['site_name']),
-                                        trailing=ft.Text(f"{r['price']:,.0f}원", size=18, color=ft.Colors.AMBER_400, weight="bold")
-                                    ),
-                                    ft.TextButton("사이트 방문", on_click=lambda x, url=r['url']: self.page.launch_url(url))
-                                ], spacing=0),
-                                padding=5
-                            )
+                if summary:
+                    self.search_results.controls.insert(0, ft.Text(summary, size=13, color=ft.Colors.AMBER_200))
+                if not found:
+                    self.search_results.controls.insert(0, ft.Text("새 가격을 가져오지 못해 저장된 가격을 표시합니다.",
+                                                                   size=13, color=ft.Colors.GREY_400))
+            self.page.update()
+
+        self.page.run_threadsafe(finish_ui)
+
+    def build_result_card(self, r, age=None):
+        # age: 저장된 가격을 먼저 보여줄 때 수집 후 지난 시간(초)
+        return ft.Card(
+            content=ft.Container(
+                content=ft.Column([
+                    ft.ListTile(
+                        title=ft.Text(r['product_title'], max_lines=2, weight="bold"),
+                        subtitle=ft.Text(r['site_name'] if age is None else f"{r['site_name']} · {self.format_age(age)} 가격",
+                                         color=None if age is None else ft.Colors.GREY_500),
+                        trailing=ft.Text(f"{r['price']:,.0f}원", size=18, color=ft.Colors.AMBER_400, weight="bold")
+                    ),
+                    *[
+                        ft.ListTile(
+                            dense=True,
+                            title=ft.Text(o['product_title'], max_lines=1, size=13),
+                            trailing=ft.Text(f"{o['price']:,.0f}원", color=ft.Colors.AMBER_200),
+                            on_click=lambda x, url=o['url']: self.page.launch_url(url)
                         )
-                    )
+                        for o in r.get('offers', [])[1:]
+                    ],
+                    ft.TextButton("사이트 방문", on_click=lambda x, url=r['url']: self.page.launch_url(url))
+                ], spacing=0),
+                padding=5,
+                opacity=1 if age is None else 0.7
+            )
+        )
+
+    def set_result_card(self, site_id, r, age=None, update=True):
+        """Show a site's result, replacing its earlier card (e.g. the stored price) in place."""
+        card = self.build_result_card(r, age)
+        old = self.result_cards.get(site_id)
+        if old is not None and old in self.search_results.controls:
+            self.search_results.controls[self.search_results.controls.index(old)] = card
+        else:
+            self.search_results.controls.append(card)
+        self.result_cards[site_id] = card
+        if update:
             self.page.update()
-        
-        self.page.run_threadsafe(update_ui)
+
+    @staticmethod
+    def format_age(seconds):
+        if seconds < 60:
+            return "방금 전"
+        if seconds < 3600:
+            return f"{int(seconds // 60)}분 전"
+        if seconds < 86400:
+            return f"{int(seconds // 3600)}시간 전"
+        return f"{int(seconds // 86400)}일 전"
 
     def load_products(self):
+        if not self.db_ready.is_set():
+            return
+        try:
+            # 자동완성과 같이 입력이 멈춘 뒤 작업 풀에서 조회
+            self.services.run_job(self.filter_products, self.product_filter.value or "", owner=(self, 'products'))
+        except JobQueueFull:
+            pass
+
+    def filter_products(self, job, text):
+        if job.cancel_event.wait(SUGGESTION_DELAY):
+            return
+        products = self.db.find_products(text, PRODUCT_PICKER_LIMIT)
+
+        def show():
+            if not job.cancelled:
+                self.render_products(products)
+        self.page.run_threadsafe(show)
+
+    def render_products(self, products):
         try:
-            products = self.db.get_all_products()
             self.product_dropdown.options = [ft.dropdown.Option(name) for pid, name in products]
             self.page.update()
         except: pass
 
     def on_product_select(self, e):
         name = self.product_dropdown.value
-        if not name: return
-        products = self.db.get_all_products()
-        pid = next((p[0] for p in products if p[1] == name), None)
+        if not name or not self.db_ready.is_set(): return
+        pid = self.db.get_product_id(name)
         if pid:
-            history = self.db.get_price_history(pid)
+            days = int(self.range_dropdown.value or 0)
+            start = time.time() - days * 86400 if days else None
+            history = self.db.get_price_history_buckets(pid, start=start, max_points=CHART_MAX_POINTS)
+            self.history_summary.value = self.format_price_summary(self.db.get_price_summary(pid))
+            self.render_alerts(pid)
             self.update_chart(history)
 
+    def render_alerts(self, pid):
+        rules = self.db.get_alert_rules(pid)
+        events = self.db.get_alert_events(pid, limit=RECENT_ALERTS)
+        if any(not ev['seen'] for ev in events):
+            self.db.mark_alerts_seen(pid)
+        self.alert_view.controls = [
+            ft.Row([
+                *[
+                    ft.Chip(
+                        label=ft.Text(self.format_alert_rule(kind, threshold), size=12),
+                        on_delete=lambda x, rule_id=rule_id: self.delete_alert_rule(rule_id, pid)
+                    )
+                    for rule_id, _, _, kind, threshold in rules
+                ],
+                ft.TextButton("알림 추가", icon=ft.Icons.NOTIFICATIONS_NONE,
+                              on_click=lambda x: self.show_add_alert_dialog(pid))
+            ], wrap=True),
+            *[
+                ft.Text(f"{ev['created_at'][5:16]} {format_alert(ev)}", size=12,
+                        color=ft.Colors.GREY_400 if ev['seen'] else ft.Colors.AMBER_200)
+                for ev in events
+            ]
+        ]
+
+    def format_alert_rule(self, kind, threshold):
+        if kind != 'new_low' and threshold is None:
+            return "기준값 없음 (삭제 후 다시 추가)"
+        if kind == 'below':
+            return f"{threshold:,.0f}원 이하"
+        if kind == 'drop':
+            return f"{WINDOW_DAYS}일 최저 대비 {threshold:g}% 하락"
+        return "역대 최저가"
+
+    def delete_alert_rule(self, rule_id, pid):
+        self.services.alerts.delete_rule(rule_id, pid)
+        self.render_alerts(pid)
+        self.page.update()
+
+    def show_add_alert_dialog(self, pid):
+        kind_dropdown = ft.Dropdown(
+            label="조건",
+            value="below",
+            options=[
+                ft.dropdown.Option("below", "목표가 이하"),
+                ft.dropdown.Option("drop", f"{WINDOW_DAYS}일 최저가 대비 하락 (%)"),
+                ft.dropdown.Option("new_low", "역대 최저가 갱신"),
+            ]
+        )
+        threshold_input = ft.TextField(label="금액(원) 또는 비율(%)", keyboard_type=ft.KeyboardType.NUMBER)
+
+        def save_rule(e):
+            kind = kind_dropdown.value
+            threshold = None
+            try:
+                if kind != 'new_low':
+                    threshold = float((threshold_input.value or "").replace(",", ""))
+                self.services.alerts.add_rule(pid, kind, threshold)
+            except ValueError:
+                # 숫자가 아니거나 하락 비율이 0~100% 를 벗어난 경우
+                threshold_input.error_text = "0~100 사이 비율을 입력하세요" if kind == 'drop' else "숫자를 입력하세요"
+                self.page.update()
+                return
+            dialog.open = False
+            self.render_alerts(pid)
+            self.page.update()
+
+        dialog = ft.AlertDialog(
+            title=ft.Text("가격 알림 추가"),
+            content=ft.Column([kind_dropdown, threshold_input], tight=True),
+            actions=[ft.TextButton("저장", on_click=save_rule)]
+        )
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+
+    def format_price_summary(self, summary):
+        # 일별 집계 테이블에서 바로 읽은 값 (오늘 최저 / 역대 최저 / 7일 변동)
+        parts = []
+        if summary['cheapest_today']:
+            site, price = summary['cheapest_today']
+            parts.append(f"오늘 최저 {site} {price:,.0f}원")
+        if summary['lowest_ever']:
+            price, day, site = summary['lowest_ever']
+            parts.append(f"역대 최저 {price:,.0f}원 ({day}{', ' + site if site else ''})")
+        if summary['change_7d']:
+            old, new, pct = summary['change_7d']
+            parts.append(f"7일 변동 {pct:+.1f}%")
+        return " · ".join(parts)
+
     def update_chart(self, history):
         if not history:
             self.chart_container.content = ft.Text("데이터가 부족합니다.")
             self.page.update()
             return
 
-        # Simple LineChart implementation
+        # 버킷별 평균가를 사이트별 선으로 표시 (집계는 DB에서 끝남)
         sites_data = {}
-        for price, date_str, site_name in history:
-            try:
-                dt = datetime.datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-                if site_name not in sites_data: sites_data[site_name] = []
-                sites_data[site_name].append((dt.timestamp(), price))
-            except: continue
+        for site_name, ts, min_price, avg_price, max_price in history:
+            sites_data.setdefault(site_name, []).append((ts, avg_price))
 
         data_series = []
         colors = [ft.Colors.BLUE, ft.Colors.RED, ft.Colors.GREEN, ft.Colors.AMBER, ft.Colors.PURPLE]
@@ -248,22 +581,61 @@ class PriceCompareMobile:
 
     def show_add_site_dialog(self, e):
         url_input = ft.TextField(label="상점 메인 URL")
-        
-        def save_site(e):
-            res = self.analyzer.analyze(url_input.value)
+        status_text = ft.Text("", size=12, color=ft.Colors.GREY_400)
+        progress = ft.ProgressBar(color=PRIMARY, visible=False)
+        save_button = ft.TextButton("분석 및 저장")
+
+        def report(message):
+            def show():
+                status_text.value = message
+                self.page.update()
+            self.page.run_threadsafe(show)
+
+        def run_analysis(job, url):
+            # 분석은 네트워크 대기가 길어서 UI 스레드 밖에서 실행
+            res = self.services.get_analyzer().analyze(url, progress=report, cancel_event=job.cancel_event)
+            if res.get('cancelled'):
+                # 대화상자를 닫아 취소한 경우 (화면은 이미 닫힘)
+                return
             if res['success']:
+                self.db_ready.wait()
                 self.db.add_site(res['site_name'], res['url_pattern'], res['title_selector'], res['price_selector'])
-                self.load_sites()
-                dialog.open = False
+
+            def finish():
+                progress.visible = False
+                save_button.disabled = False
+                if res['success']:
+                    self.load_sites()
+                    dialog.open = False
+                else:
+                    url_input.error_text = "분석 실패"
                 self.page.update()
-            else:
-                url_input.error_text = "분석 실패"
+            self.page.run_threadsafe(finish)
+
+        def save_site(e):
+            if not url_input.value:
+                return
+            url_input.error_text = None
+            progress.visible = True
+            save_button.disabled = True
+            status_text.value = "분석 시작..."
+            self.page.update()
+            try:
+                self.services.run_job(run_analysis, url_input.value, owner=analysis_owner)
+            except JobQueueFull:
+                progress.visible = False
+                save_button.disabled = False
+                status_text.value = "작업이 많습니다. 잠시 후 다시 시도해 주세요."
                 self.page.update()
 
+        save_button.on_click = save_site
+        # 대화상자를 닫으면 진행 중인 분석의 남은 요청을 보내지 않음
+        analysis_owner = (self, 'analysis')
         dialog = ft.AlertDialog(
             title=ft.Text("새 쇼핑몰 추가"),
-            content=url_input,
-            actions=[ft.TextButton("분석 및 저장", on_click=save_site)]
+            content=ft.Column([url_input, progress, status_text], tight=True),
+            actions=[save_button],
+            on_dismiss=lambda e: self.services.cancel_job(analysis_owner)
         )
         self.page.dialog = dialog
         dialog.open = True
@@ -0,0 +1,112 @@
+"""Retention, compaction and housekeeping for the prices database.
+
+    python maintenance.py --daily-days 90 --weekly-days 365 --archive prices_archive.db
+    python maintenance.py --if-due
+
+Price rows older than `daily_days` are folded into weekly rollups (monthly
+past `weekly_days`) in small batches, so searches and the scheduler can
+keep writing in between. Soft-deleted sites and products that never got a
+price are purged, free pages are released with incremental VACUUM in
+small steps and the planner statistics are refreshed. Only the CLI converts
+an old database file (without incremental auto_vacuum) with a full VACUUM,
+since that blocks every other write while it rewrites the file.
+"""
+import argparse
+import sys
+import threading
+import time
+
+from database_manager import DatabaseManager
+
+
+class DatabaseMaintenance:
+    """Applies the retention policy to a DatabaseManager (or the app's DatabaseWriter).
+
+    Each step is its own short transaction. run_if_due() only runs when the
+    last recorded run is older than `interval` seconds, so it can be called
+    from every app start and scheduler cycle.
+    """
+
+    def __init__(self, db, daily_days=90, weekly_days=365, archive_path=None, orphan_days=30,
+                 interval=24 * 3600, batch_size=2000, vacuum_pages=2000, vacuum_step=200, full_vacuum=False):
+        self.db = db
+        self.daily_days = daily_days
+        self.weekly_days = weekly_days
+        self.archive_path = archive_path
+        self.orphan_days = orphan_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.vacuum_step = vacuum_step
+        self.full_vacuum = full_vacuum
+        self._lock = threading.Lock()
+
+    def is_due(self):
+        last = self.db.get_last_maintenance()
+        return last is None or time.time() - last >= self.interval
+
+    def run(self):
+        """Run every step once and return the recorded stats (None if a run is already in progress)."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            started = time.perf_counter()
+            stats = {'compacted': 0}
+            while True:
+                compacted = self.db.compact_prices(self.daily_days, self.weekly_days, self.archive_path, self.batch_size)
+                stats['compacted'] += compacted
+                if compacted < self.batch_size:
+                    break
+            stats.update(self.db.purge_deleted(self.orphan_days))
+            stats['freed_pages'] = self._vacuum()
+            self.db.analyze()
+            stats['duration_ms'] = (time.perf_counter() - started) * 1000
+            self.db.add_maintenance_log(stats)
+            return stats
+        finally:
+            self._lock.release()
+
+    def _vacuum(self):
+        # vacuum_step 페이지씩 나눠서 반환 (앱에서는 호출 사이사이에 다른 쓰기가 실행됨)
+        freed = 0
+        while not self.vacuum_pages or freed < self.vacuum_pages:
+            step = self.vacuum_step if not self.vacuum_pages else min(self.vacuum_step, self.vacuum_pages - freed)
+            released = self.db.vacuum(step, convert=self.full_vacuum)
+            freed += released
+            if released < step:
+                break
+        return freed
+
+    def run_if_due(self):
+        return self.run() if self.is_due() else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="오래된 가격 기록을 정리하고 DB 용량을 줄입니다.")
+    parser.add_argument("--db", default="prices_mobile.db")
+    parser.add_argument("--daily-days", type=int, default=90, help="일별 기록을 그대로 두는 기간 (일)")
+    parser.add_argument("--weekly-days", type=int, default=365, help="주 단위로 접어 두는 기간, 이후는 월 단위 (일)")
+    parser.add_argument("--archive", help="접기 전 원본 기록을 옮겨 둘 SQLite 파일")
+    parser.add_argument("--orphan-days", type=int, default=30, help="가격 없는 상품을 지우기 전 유예 기간 (일)")
+    parser.add_argument("--vacuum-pages", type=int, default=0, help="한 번에 반환할 빈 페이지 수 (0 이면 전부)")
+    parser.add_argument("--if-due", action="store_true", help="마지막 정리 후 하루가 지났을 때만 실행")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db)
+    maintenance = DatabaseMaintenance(db, daily_days=args.daily_days, weekly_days=args.weekly_days,
+                                      archive_path=args.archive, orphan_days=args.orphan_days,
+                                      vacuum_pages=args.vacuum_pages, full_vacuum=True)
+    try:
+        stats = maintenance.run_if_due() if args.if_due else maintenance.run()
+    finally:
+        db.close()
+    if stats is None:
+        print("아직 정리할 때가 아닙니다.")
+        return 0
+    print(f"가격 {stats['compacted']}건 압축, 쇼핑몰 {stats['purged_sites']}곳/상품 {stats['purged_products']}개 삭제, "
+          f"빈 페이지 {stats['freed_pages']}개 반환 ({stats['duration_ms'] / 1000:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+import argparse
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event=None):
+        """Block until a token is available. Returns False if stop_event was set while waiting."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
+
+
+class WatchlistScheduler:
+    """Re-scrapes every tracked product on every active site on a fixed cadence.
+
+    Pairs are served stalest first (never-tried pairs before anything else);
+    a pair that failed or found nothing waits a full refresh_interval too.
+    Requests to the same domain go through a token bucket, each request is
+    preceded by a random jitter, and at most `max_workers` run at once.
+    With a DatabaseMaintenance, run_forever also applies it when it is due.
+    """
+
+    def __init__(self, db, scraper, refresh_interval=6 * 3600, max_workers=4,
+                 domain_rate=0.2, domain_burst=2, jitter=5.0, batch_size=20, maintenance=None):
+        self.db = db
+        self.scraper = scraper
+        self.refresh_interval = refresh_interval
+        self.max_workers = max_workers
+        self.domain_rate = domain_rate
+        self.domain_burst = domain_burst
+        self.jitter = jitter
+        self.batch_size = batch_size
+        self.maintenance = maintenance
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _bucket(self, url):
+        domain = urlparse(url).netloc.lower()
+        with self._buckets_lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                bucket = TokenBucket(self.domain_rate, self.domain_burst)
+                self._buckets[domain] = bucket
+            return bucket
+
+    def build_queue(self):
+        """Heap of (last_scraped_epoch, product_id, site_id, product_name, site_config) for due pairs."""
+        sites = {sc['id']: sc for sc in self.db.get_site_configs()}
+        queue = []
+        for product_id, name, site_id, last_epoch in self.db.get_refresh_candidates(self.refresh_interval):
+            if site_id in sites:
+                queue.append((last_epoch or 0, product_id, site_id, name, sites[site_id]))
+        heapq.heapify(queue)
+        return queue
+
+    def run_once(self):
+        """Refresh every due pair once. Returns the number of successful scrapes."""
+        queue = self.build_queue()
+        queue_lock = threading.Lock()
+        pending = []
+        metrics = []
+        attempts = []
+        pending_lock = threading.Lock()
+        stats = {'ok': 0}
+
+        def flush():
+            with pending_lock:
+                batch = pending[:]
+                pending.clear()
+                batch_metrics = metrics[:]
+                metrics.clear()
+                batch_attempts = attempts[:]
+                attempts.clear()
+            if batch:
+                self.db.add_prices([row for row, offers in batch], [o for row, offers in batch for o in offers])
+            self.db.add_site_metrics(batch_metrics)
+            self.db.add_refresh_attempts(batch_attempts)
+
+        def worker():
+            while not self._stop.is_set():
+                with queue_lock:
+                    if not queue:
+                        return
+                    _, product_id, _, name, site = heapq.heappop(queue)
+                if not self._bucket(site['url_pattern']).acquire(self._stop):
+                    return
+                if self.jitter and self._stop.wait(random.uniform(0, self.jitter)):
+                    return
+                res = self.scraper.scrape_site(site, name)
+                if res.get('skipped'):
+                    # 차단 중이라 요청하지 않은 쌍은 다음 주기에 다시 시도
+                    continue
+                outcome = res.get('metrics', {}).get('outcome') or ('ok' if res['success'] else 'error')
+                with pending_lock:
+                    if 'metrics' in res:
+                        metrics.append((site['id'], res['metrics']))
+                    # 실패/결과 없음도 시도 시각을 남겨 refresh_interval 동안 다시 요청하지 않음
+                    attempts.append((product_id, site['id'], outcome))
+                if not res['success']:
+                    continue
+                row = (product_id, site['id'], res['price'], res['product_title'], res['url'])
+                offers = [(product_id, site['id'], rank, o['price'], o['product_title'], o['url'])
+                          for rank, o in enumerate(res['offers'])]
+                with pending_lock:
+                    pending.append((row, offers))
+                    stats['ok'] += 1
+                    full = len(pending) >= self.batch_size
+                if full:
+                    flush()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for _ in range(self.max_workers):
+                executor.submit(worker)
+        flush()
+        return stats['ok']
+
+    def run_forever(self, poll_interval=60):
+        while not self._stop.is_set():
+            self.run_once()
+            if self.maintenance:
+                self.maintenance.run_if_due()
+            self._stop.wait(poll_interval)
+
+    def start(self, poll_interval=60):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, args=(poll_interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+
+if __name__ == "__main__":
+    from alerts import AlertEngine, print_alerts
+    from database_manager import DatabaseManager
+    from http_cache import HttpCache
+    from maintenance import DatabaseMaintenance
+    from scraper import PriceScraper
+    from site_health import SiteHealth
+
+    parser = argparse.ArgumentParser(description="관심 상품 가격을 주기적으로 갱신합니다 (UI 없이 실행).")
+    parser.add_argument("--db", default="prices_mobile.db")
+    parser.add_argument("--interval", type=float, default=6, help="갱신 주기 (시간)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--domain-rate", type=float, default=0.2, help="도메인당 초당 요청 수")
+    parser.add_argument("--jitter", type=float, default=5.0, help="요청 전 임의 대기 최대값 (초)")
+    parser.add_argument("--once", action="store_true", help="한 번만 갱신하고 종료")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    alerts = AlertEngine(db)
+    db.add_price_listener(alerts.on_prices, before=alerts.refresh)
+    alerts.add_listener(print_alerts)
+    health = SiteHealth()
+    health.seed(db.get_site_health_history())
+    scraper = PriceScraper(pool_size=args.workers, cache=HttpCache("http_cache.db"), health=health)
+    scheduler = WatchlistScheduler(db, scraper, refresh_interval=args.interval * 3600,
+                                   max_workers=args.workers, domain_rate=args.domain_rate, jitter=args.jitter,
+                                   maintenance=DatabaseMaintenance(db))
+    if args.once:
+        print(f"{scheduler.run_once()}건 갱신")
+    else:
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            scheduler.stop()
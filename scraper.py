@@ -1,14 +1,59 @@
 import requests
-from bs4 import BeautifulSoup
 import random
+import threading
 import time
 
 from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from urllib3.util.retry import Retry
-from urllib.parse import urljoin
+
+from extraction import ExtractionPlan, get_backend, read_html
+
+# 요청은 스레드마다 동기로 처리되므로 연결(TCP+TLS) 시간을 스레드 로컬에 누적
+_timing = threading.local()
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        _timing.connect_ms = getattr(_timing, 'connect_ms', 0.0) + (time.perf_counter() - started) * 1000
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        _timing.connect_ms = getattr(_timing, 'connect_ms', 0.0) + (time.perf_counter() - started) * 1000
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections record their connect time."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+class SiteSkipped(Exception):
+    """Raised by PriceScraper.fetch when the site's circuit breaker does not allow a request."""
+
 
 class PriceScraper:
-    def __init__(self):
+    def __init__(self, pool_size=10, cache=None, parser_backend=None, max_offers=5, health=None,
+                 max_bytes=2 * 1024 * 1024):
         self.headers_list = [
             {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'},
             {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, fee Gecko) Version/14.1.1 Safari/605.1.15'},
@@ -18,69 +63,200 @@ class PriceScraper:
         # Configure session with retries
         self.session = requests.Session()
         retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-        adapter = HTTPAdapter(max_retries=retries)
+        # pool_maxsize는 동시 요청 수와 맞춰야 커넥션이 버려지지 않음
+        adapter = TimedHTTPAdapter(max_retries=retries, pool_connections=pool_size, pool_maxsize=pool_size)
         self.session.mount('http://', adapter)
         self.session.mount('https://', adapter)
+        # 최근 실패한 사이트는 재시도/백오프 없이 한 번만 요청
+        self.fast_session = requests.Session()
+        fast_adapter = TimedHTTPAdapter(max_retries=0, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.fast_session.mount('http://', fast_adapter)
+        self.fast_session.mount('https://', fast_adapter)
+        self.health = health
+        self.cache = cache
+        self.max_offers = max_offers
+        # 사이트별 max_bytes 가 없을 때 한 페이지에서 읽는 최대 크기
+        self.max_bytes = max_bytes
+
+        # 사이트별 선택자는 한 번만 컴파일해서 재사용 (사이트 변경 시 invalidate_plan)
+        self.backend = get_backend(parser_backend)
+        self._plans = {}
+        self._plans_lock = threading.Lock()
 
     def get_random_headers(self):
         return random.choice(self.headers_list)
 
-    def scrape_site(self, site_config, keyword):
-        url = site_config['url_pattern'].format(keyword)
+    def fetch(self, url, ttl=None, metrics=None, timeout=10, retries=True, max_bytes=None, stop=None,
+              partial_ok=False, site_id=None):
+        """Return the page body for url, going through the HTTP cache when one is set.
+
+        A fresh cache entry is returned without a request; a stale one is
+        revalidated with If-None-Match/If-Modified-Since and reused on 304.
+        If a metrics dict is given, connect/TTFB/download times, response
+        bytes, retry count and cache outcome are recorded into it.
+        retries=False sends a single attempt without urllib3's retry/backoff.
+        The body is streamed without <script>/<style> blocks and reading stops
+        after max_bytes or once stop(prefix_html) is satisfied (see read_html).
+        A cut-short body is cached as a partial entry, which is only served
+        (and revalidated) when partial_ok is set; metrics['stopped'] tells the
+        caller whether the returned body is partial, cached or not.
+        With a site_id, the site's circuit breaker is asked before a request
+        goes out (not for cache hits) and SiteSkipped is raised if it is open;
+        metrics['cache'] is 'miss' or 'revalidated' whenever a request was sent.
+        """
+        m = metrics if metrics is not None else {}
+        entry = self.cache.get(url) if self.cache else None
+        if entry and entry['partial'] and not partial_ok:
+            # 전체 본문이 필요한 요청에는 잘린 본문을 쓰지 않고 검증값도 보내지 않음 (304 로 잘린 본문을 받지 않게)
+            entry = None
+        if entry and self.cache.is_fresh(entry, ttl):
+            m.update(cache='hit', bytes=0, retries=0, stopped=entry['partial'])
+            return entry['body']
+        if site_id is not None and self.health and not self.health.allow(site_id):
+            raise SiteSkipped(url)
+        headers = dict(self.get_random_headers())
+        headers.update(self.cache.conditional_headers(entry) if self.cache else {})
+        m['cache'] = 'miss'
+        _timing.connect_ms = 0.0
+        started = time.perf_counter()
+        session = self.session if retries else self.fast_session
+        response = session.get(url, headers=headers, timeout=timeout, stream=True)
+        m['ttfb_ms'] = (time.perf_counter() - started) * 1000
+        m['connect_ms'] = _timing.connect_ms
+        retry_state = getattr(response.raw, 'retries', None)
+        m['retries'] = len(retry_state.history) if retry_state else 0
         try:
-            response = self.session.get(url, headers=self.get_random_headers(), timeout=10)
+            if response.status_code == 304 and entry:
+                m.update(cache='revalidated', bytes=0, stopped=entry['partial'])
+                self.cache.touch(url)
+                return entry['body']
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            title_element = soup.select_one(site_config['title_selector'])
-            price_selector = site_config['price_selector']
-            price_text = ""
-            
-            if "::attr(" in price_selector:
-                parts = price_selector.split("::attr(")
-                css_selector = parts[0].strip()
-                attr_name = parts[1].rstrip(")")
-                if css_selector:
-                    price_element = soup.select_one(css_selector)
-                    if price_element:
-                        price_text = price_element.get(attr_name, "")
+            started = time.perf_counter()
+            html, info = read_html(response, max_bytes, stop)
+            m['download_ms'] = (time.perf_counter() - started) * 1000
+            m.update(cache='miss', bytes=info['bytes'], stopped=info['stopped'])
+            if self.cache:
+                # 잘린 본문은 partial 로 표시해서 저장 (전체 본문이 필요한 요청은 이 항목을 건너뜀)
+                self.cache.put_response(url, response, html, partial=info['stopped'])
+            return html
+        finally:
+            response.close()
+
+    def plan_for(self, site_config):
+        """Return the site's compiled ExtractionPlan, compiling it on first use."""
+        site_id = site_config.get('id')
+        with self._plans_lock:
+            plan = self._plans.get(site_id)
+            if plan is None or not plan.matches(site_config):
+                plan = ExtractionPlan(site_config, self.backend)
+                if site_id is not None:
+                    self._plans[site_id] = plan
+            return plan
+
+    def invalidate_plan(self, site_id=None):
+        """Drop the cached plan for one site (or all sites when site_id is None)."""
+        with self._plans_lock:
+            if site_id is None:
+                self._plans.clear()
             else:
-                price_element = soup.select_one(price_selector)
-                if price_element:
-                    price_text = price_element.get_text(strip=True)
-            
-            if title_element and price_text:
-                title = title_element.get_text(strip=True)
-                price = self._parse_price(price_text)
-                product_url = url
-                link_el = None
-                if title_element.name == 'a':
-                    link_el = title_element
-                else:
-                    link_el = title_element.find_parent('a') or title_element.find('a')
-                if link_el and link_el.get('href'):
-                    product_url = urljoin(url, link_el.get('href'))
-                
-                return {
-                    'site_name': site_config['name'],
-                    'product_title': title,
-                    'price': price,
-                    'price_text': price_text,
-                    'url': product_url,
-                    'success': True
-                }
+                self._plans.pop(site_id, None)
+
+    def extract(self, site_config, html, url, limit, timings=None):
+        """Raw listings for one fetched page, using the site's cached plan."""
+        return self.plan_for(site_config).extract_all(html, url, limit, timings)
+
+    def scrape_site(self, site_config, keyword, limit=None, extract=None):
+        """Scrape up to `limit` offers (default max_offers) from one fetch and parse.
+
+        The top-ranked offer is also returned at the top level of the result,
+        so callers that only need one price can ignore 'offers'. Every result
+        carries a 'metrics' dict with per-phase timings and an 'outcome'.
+        `extract` replaces self.extract, e.g. to parse in another process.
+        The page stops downloading as soon as a prefix yields `limit` offers.
+        """
+        url = site_config['url_pattern'].format(keyword)
+        site_id = site_config.get('id')
+        health = self.health if site_id is not None else None
+        metrics = {}
+        started = time.perf_counter()
+        extract = extract or self.extract
+        limit = limit or self.max_offers
+        early = []
+
+        def enough(prefix):
+            # 앞부분에서 필요한 개수를 모두 찾으면 나머지는 받지 않음
+            early[:] = extract(site_config, prefix, url, limit, metrics)
+            return len(early) >= limit
+
+        def fetch(partial_ok):
+            html = self.fetch(
+                url, site_config.get('cache_ttl'), metrics,
+                timeout=health.timeout_for(site_id) if health else 10,
+                retries=health.use_retries(site_id) if health else True,
+                max_bytes=site_config.get('max_bytes') or self.max_bytes,
+                stop=enough, partial_ok=partial_ok, site_id=site_id
+            )
+            if metrics.get('stopped') == 'early' and metrics.get('cache') == 'miss':
+                return early
+            return extract(site_config, html, url, limit, metrics)
+
+        try:
+            found = fetch(partial_ok=True)
+            if len(found) < limit and metrics.get('cache') != 'miss' and metrics.get('stopped') == 'early':
+                # 캐시된 앞부분은 더 적은 개수로 멈췄던 것 (max_offers 증가 등): 다시 받음
+                found = fetch(partial_ok=False)
+            if found:
+                offers = [
+                    {
+                        'product_title': o['product_title'],
+                        'price': self._parse_price(o['price_text']),
+                        'price_text': o['price_text'],
+                        'url': o['url'],
+                    }
+                    for o in found
+                ]
+                metrics['outcome'] = 'ok'
+                return dict(offers[0], site_name=site_config['name'], offers=offers, success=True, metrics=metrics)
             else:
+                metrics['outcome'] = 'not_found'
                 return {
                     'site_name': site_config['name'],
                     'error': 'Elements not found',
-                    'success': False
+                    'success': False,
+                    'metrics': metrics
                 }
+        except SiteSkipped:
+            # 차단 중인 사이트는 요청하지 않음 (측정값도 남기지 않음, 캐시에 있으면 위에서 이미 반환됨)
+            return {
+                'site_name': site_config['name'],
+                'error': 'Temporarily skipped after repeated failures',
+                'success': False,
+                'skipped': True
+            }
         except Exception as e:
+            metrics['outcome'] = self._classify_error(e)
             return {
                 'site_name': site_config['name'],
                 'error': str(e),
-                'success': False
+                'success': False,
+                'metrics': metrics
             }
+        finally:
+            metrics['total_ms'] = (time.perf_counter() - started) * 1000
+            if health and metrics.get('cache') in ('miss', 'revalidated'):
+                # 실제로 요청을 보낸 경우만 기록 (캐시 적중으로 반쯤 열린 차단이 닫히지 않게)
+                network_ms = metrics.get('ttfb_ms', 0) + metrics.get('download_ms', 0)
+                health.record(site_id, metrics.get('outcome'), network_ms)
+
+    @staticmethod
+    def _classify_error(error):
+        if isinstance(error, requests.exceptions.Timeout):
+            return 'timeout'
+        if isinstance(error, (requests.exceptions.HTTPError, requests.exceptions.RetryError)):
+            return 'http_error'
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return 'connection_error'
+        return 'error'
 
     def _parse_price(self, price_str):
         clean_str = ''.join(c for c in price_str if c.isdigit())
@@ -0,0 +1,189 @@
+import itertools
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class JobQueueFull(Exception):
+    """Raised by JobManager.submit when max_pending jobs are already waiting."""
+
+
+class Job:
+    """Handle for one submitted job. The job function polls `cancelled`."""
+
+    def __init__(self, job_id, owner):
+        self.id = job_id
+        self.owner = owner
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+
+class JobManager:
+    """Fixed-size worker pool with a bound on queued jobs and per-owner supersession.
+
+    Submitting a job for an owner (e.g. a UI session) cancels that owner's
+    previous job: it is dropped if still queued, otherwise its cancel_event
+    is set so it can stop early and skip its UI updates.
+    """
+
+    def __init__(self, max_workers=4, max_pending=16):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._ids = itertools.count(1)
+        self._current = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, owner=None):
+        """Run fn(job, *args) on the pool and return the Job."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f'{self._pending} jobs already waiting')
+            self._pending += 1
+            job = Job(next(self._ids), owner)
+            previous = self._current.get(owner) if owner is not None else None
+            if owner is not None:
+                self._current[owner] = job
+        if previous is not None:
+            previous.cancel()
+        job.future = self._executor.submit(self._run, job, fn, args)
+        job.future.add_done_callback(self._on_done)
+        return job
+
+    def _started(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _on_done(self, future):
+        # 실행 전에 취소된 작업은 _run 을 거치지 않으므로 여기서 대기 수를 줄임
+        if future.cancelled():
+            self._started()
+
+    def _run(self, job, fn, args):
+        self._started()
+        try:
+            if job.cancelled:
+                return None
+            return fn(job, *args)
+        except Exception:
+            traceback.print_exc()
+            raise
+        finally:
+            with self._lock:
+                if self._current.get(job.owner) is job:
+                    del self._current[job.owner]
+
+    def cancel(self, owner):
+        """Cancel the owner's current job, if any."""
+        with self._lock:
+            job = self._current.pop(owner, None)
+        if job is not None:
+            job.cancel()
+
+
+class SearchCoordinator:
+    """Runs keyword searches across all sites without duplicate fetches.
+
+    Per (keyword, site) it first reuses today's stored result if it is younger
+    than `freshness` seconds, otherwise joins a fetch for the same key that is
+    already in flight anywhere in the process, and only then hits the network.
+    """
+
+    # 프로세스 전체에서 공유 (웹 모드에서 여러 세션이 같은 검색을 해도 요청은 한 번)
+    _inflight = {}
+    _inflight_lock = threading.Lock()
+
+    def __init__(self, db, scraper, fetcher, freshness=1800):
+        self.db = db
+        self.scraper = scraper
+        self.fetcher = fetcher
+        self.freshness = freshness
+
+    def scrape(self, keyword, product_id, site_config):
+        """Result dict for one site, as returned by PriceScraper.scrape_site.
+
+        Results served from the DB carry 'from_db': True and results borrowed
+        from another caller's fetch carry 'shared': True; neither needs writing.
+        """
+        if self.freshness:
+            stored = self.db.get_fresh_result(product_id, site_config['id'], self.freshness)
+            if stored:
+                return dict(stored, site_name=site_config['name'], from_db=True)
+
+        key = (self.db.db_name, keyword, site_config['id'])
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if not owner:
+            return dict(future.result(), shared=True)
+
+        try:
+            res = self.scraper.scrape_site(site_config, keyword)
+            future.set_result(res)
+            return res
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def search(self, keyword, on_result=None, cancel_event=None):
+        """Search every active site, calling on_result(site_config, result) as each finishes.
+
+        New results are written in one add_prices transaction at the end.
+        Returns the list of (site_config, result) pairs. Once cancel_event is
+        set, sites that have not started are skipped and on_result is no longer
+        called; results already fetched are still stored.
+        """
+        product_id = self.db.get_or_create_product(keyword)
+        self.db.add_search_keyword(keyword)
+        sites = self.db.get_site_configs()
+        results = []
+        rows = []
+        offer_rows = []
+        metrics = []
+
+        def scrape(sc):
+            # 취소 확인은 요청을 맡기 전에만 (다른 세션이 기다리는 요청은 끝까지 수행)
+            if cancel_event is not None and cancel_event.is_set():
+                return {'site_name': sc['name'], 'error': 'Cancelled', 'success': False, 'cancelled': True}
+            return self.scrape(keyword, product_id, sc)
+
+        for site, res in self.fetcher.map_sites(scrape, sites, cancel_event=cancel_event):
+            if res.get('cancelled'):
+                continue
+            results.append((site, res))
+            if not res.get('from_db') and not res.get('shared'):
+                if 'metrics' in res:
+                    metrics.append((site['id'], res['metrics']))
+                if res['success']:
+                    rows.append((product_id, site['id'], res['price'], res['product_title'], res['url']))
+                    offer_rows.extend(
+                        (product_id, site['id'], rank, o['price'], o['product_title'], o['url'])
+                        for rank, o in enumerate(res['offers'])
+                    )
+            if on_result and not (cancel_event is not None and cancel_event.is_set()):
+                on_result(site, res)
+        started = time.perf_counter()
+        self.db.add_prices(rows, offer_rows)
+        write_ms = (time.perf_counter() - started) * 1000
+        # DB 쓰기는 한 번에 묶여 있으므로 저장된 사이트 모두에 같은 배치 시간을 기록
+        for site_id, m in metrics:
+            if m.get('outcome') == 'ok':
+                m['db_write_ms'] = write_ms
+        self.db.add_site_metrics(metrics)
+        return results
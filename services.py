@@ -0,0 +1,177 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+from alerts import AlertEngine
+from database_manager import DatabaseManager
+from fetch_engine import ConcurrentFetcher
+from http_cache import HttpCache
+from maintenance import DatabaseMaintenance
+from scheduler import WatchlistScheduler
+from search_jobs import JobManager, SearchCoordinator
+from site_health import SiteHealth
+
+
+class DatabaseWriter:
+    """Runs DatabaseManager writes on one dedicated thread; reads go straight to the DB.
+
+    Searches from every session, the scheduler and site edits all write
+    through the same thread, so they queue in-process instead of contending
+    for SQLite's write lock. Write calls block until their transaction is done.
+    """
+
+    WRITE_METHODS = frozenset({
+        'add_site', 'update_site', 'delete_site', 'set_site_cache_ttl', 'set_site_max_bytes',
+        'get_or_create_product', 'add_price', 'add_prices', 'add_site_metrics',
+        'add_search_keyword', 'rebuild_daily_aggregates', 'add_refresh_attempts',
+        'compact_prices', 'purge_deleted', 'vacuum', 'analyze', 'add_maintenance_log',
+        'add_alert_rule', 'delete_alert_rule', 'add_alert_events', 'mark_alerts_seen',
+    })
+
+    def __init__(self, db):
+        self.db = db
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            future, fn, args, kwargs = self._queue.get()
+            if future is None:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, name, *args, **kwargs):
+        """Queue a write and return its Future without waiting."""
+        future = Future()
+        self._queue.put((future, getattr(self.db, name), args, kwargs))
+        return future
+
+    def __getattr__(self, name):
+        attr = getattr(self.db, name)
+        if name not in self.WRITE_METHODS:
+            return attr
+
+        def write(*args, **kwargs):
+            # writer 스레드 안에서 다시 호출되면 (사이트 리스너 등) 바로 실행
+            if threading.current_thread() is self._thread:
+                return attr(*args, **kwargs)
+            return self.submit(name, *args, **kwargs).result()
+        return write
+
+    def close(self):
+        self._queue.put((None, None, None, None))
+        self._thread.join()
+        self.db.close()
+
+
+class AppServices:
+    """Process-wide services shared by every UI session (one per `flet run --web` process).
+
+    One DB writer, one HTTP cache, one pooled PriceScraper session, one fetch
+    pool with per-host limits and one bounded pool for search/analysis jobs.
+    Everything is built on first use so the first frame is not delayed.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, db_name="prices_mobile.db", cache_name="http_cache.db",
+                 fetch_workers=8, per_host_limit=2, job_workers=4, max_pending_jobs=16):
+        self.db_name = db_name
+        self.cache_name = cache_name
+        self.fetch_workers = fetch_workers
+        self.per_host_limit = per_host_limit
+        self.db = None
+        self.health = None
+        self.http_cache = None
+        self.scraper = None
+        self.scheduler = None
+        self.fetcher = None
+        self.searcher = None
+        self.analyzer = None
+        self.maintenance = None
+        self.alerts = None
+        # 세션마다 스레드를 만들지 않고 검색/분석 작업은 여기서 순서대로 처리
+        self.jobs = JobManager(max_workers=job_workers, max_pending=max_pending_jobs)
+        self._lock = threading.RLock()
+
+    def run_job(self, fn, *args, owner=None):
+        """Run fn(job, *args) on the shared job pool and return the Job.
+
+        A job with an owner supersedes (cancels) that owner's previous job.
+        Raises JobQueueFull when too many jobs are waiting for a worker.
+        """
+        return self.jobs.submit(fn, *args, owner=owner)
+
+    def cancel_job(self, owner):
+        """Cancel the owner's current job (its cancel_event is set if it already runs)."""
+        self.jobs.cancel(owner)
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def get_db(self):
+        """Open the shared DB (through the single writer) on first call; raises on failure."""
+        with self._lock:
+            if self.db is None:
+                # On Android, relative path might be tricky, but usually works in app dir.
+                db = DatabaseManager(self.db_name)
+                health = SiteHealth()
+                health.seed(db.get_site_health_history())
+                self.health = health
+                self.db = DatabaseWriter(db)
+                # 검색, 스케줄러 등 모든 가격 저장 뒤 writer 스레드에서 알림 규칙을 확인 (다른 곳에서 바뀐 규칙은 저장 전에 다시 읽음)
+                self.alerts = AlertEngine(self.db)
+                db.add_price_listener(self.alerts.on_prices, before=self.alerts.refresh)
+                self.maintenance = DatabaseMaintenance(self.db)
+                # 하루 한 번 오래된 가격 정리 (쓰기는 writer 스레드에서 다른 쓰기와 번갈아 실행)
+                self.run_job(lambda job: self.maintenance.run_if_due())
+            return self.db
+
+    def get_http_cache(self):
+        with self._lock:
+            if self.http_cache is None:
+                self.http_cache = HttpCache(self.cache_name)
+            return self.http_cache
+
+    def get_searcher(self):
+        """Build the fetch/parse stack on first use and return the SearchCoordinator."""
+        with self._lock:
+            if self.searcher is None:
+                # scraper(requests/bs4)는 첫 검색 때 import (시작 시간 단축)
+                from scraper import PriceScraper
+                db = self.get_db()
+                fetcher = self.get_fetcher()
+                self.scraper = PriceScraper(pool_size=fetcher.max_workers, cache=self.get_http_cache(), health=self.health)
+                db.add_site_listener(self.scraper.invalidate_plan)
+                self.scheduler = WatchlistScheduler(db, self.scraper, maintenance=self.maintenance)
+                self.searcher = SearchCoordinator(db, self.scraper, fetcher)
+            return self.searcher
+
+    def get_scheduler(self):
+        self.get_searcher()
+        return self.scheduler
+
+    def get_fetcher(self):
+        """The fetch pool shared by searches and site analysis (one concurrency and per-host limit)."""
+        with self._lock:
+            if self.fetcher is None:
+                self.fetcher = ConcurrentFetcher(max_workers=self.fetch_workers, per_host_limit=self.per_host_limit, deadline=20)
+            return self.fetcher
+
+    def get_analyzer(self):
+        with self._lock:
+            if self.analyzer is None:
+                from auto_discovery import SiteAnalyzer
+                self.analyzer = SiteAnalyzer(cache=self.get_http_cache(), fetcher=self.get_fetcher())
+            return self.analyzer
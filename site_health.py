@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# 네트워크/서버 문제로 보는 결과 (not_found 는 사이트가 응답했으므로 정상으로 취급)
+FAILURE_OUTCOMES = ('timeout', 'http_error', 'connection_error', 'error')
+
+
+class SiteHealth:
+    """Per-site circuit breaker and latency-based timeout budget.
+
+    A site that fails `failure_threshold` times in a row is skipped for
+    `cooldown` seconds, then probed with a single half-open request: success
+    closes the circuit, failure re-opens it. Timeouts follow the site's own
+    recent latency (p95 x `timeout_factor`, clamped to min/max), and sites
+    with any recent failure are fetched without urllib3 retries.
+    """
+
+    def __init__(self, failure_threshold=3, cooldown=300, min_timeout=3.0, max_timeout=10.0,
+                 timeout_factor=2.0, window=50, min_samples=5):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_factor = timeout_factor
+        self.window = window
+        self.min_samples = min_samples
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def _site(self, site_id):
+        site = self._sites.get(site_id)
+        if site is None:
+            site = {'state': CLOSED, 'failures': 0, 'opened_at': 0.0, 'probing': False,
+                    'latencies': deque(maxlen=self.window)}
+            self._sites[site_id] = site
+        return site
+
+    def seed(self, history):
+        """Load {site_id: (latencies_ms, trailing_failures)} from stored metrics."""
+        with self._lock:
+            for site_id, (latencies, trailing_failures) in history.items():
+                site = self._site(site_id)
+                site['latencies'].extend(latencies[-self.window:])
+                site['failures'] = trailing_failures
+                if trailing_failures >= self.failure_threshold:
+                    # 재시작 직후에는 바로 한 번만 확인 요청을 보내도록 쿨다운이 끝난 상태로 둠
+                    site['state'] = OPEN
+                    site['opened_at'] = 0.0
+
+    def allow(self, site_id):
+        """Whether a request to the site may go out now (claims the half-open probe slot)."""
+        with self._lock:
+            site = self._site(site_id)
+            if site['state'] == CLOSED:
+                return True
+            if site['state'] == OPEN and time.monotonic() - site['opened_at'] >= self.cooldown:
+                site['state'] = HALF_OPEN
+                site['probing'] = False
+            if site['state'] == HALF_OPEN and not site['probing']:
+                site['probing'] = True
+                return True
+            return False
+
+    def timeout_for(self, site_id):
+        with self._lock:
+            latencies = sorted(self._site(site_id)['latencies'])
+        if len(latencies) < self.min_samples:
+            return self.max_timeout
+        p95 = latencies[int(round(0.95 * (len(latencies) - 1)))] / 1000
+        return max(self.min_timeout, min(self.max_timeout, p95 * self.timeout_factor))
+
+    def use_retries(self, site_id):
+        with self._lock:
+            site = self._site(site_id)
+            return site['state'] == CLOSED and site['failures'] == 0
+
+    def record(self, site_id, outcome, latency_ms=None):
+        with self._lock:
+            site = self._site(site_id)
+            site['probing'] = False
+            if outcome in FAILURE_OUTCOMES:
+                site['failures'] += 1
+                if site['state'] == HALF_OPEN or site['failures'] >= self.failure_threshold:
+                    site['state'] = OPEN
+                    site['opened_at'] = time.monotonic()
+            else:
+                site['failures'] = 0
+                site['state'] = CLOSED
+                if latency_ms is not None:
+                    site['latencies'].append(latency_ms)
+
+    def status(self, site_id):
+        with self._lock:
+            return self._site(site_id)['state']
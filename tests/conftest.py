@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 테스트는 저장소 루트의 모듈과 benchmarks/ 의 픽스처 서버를 바로 import 함
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from database_manager import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A fresh DatabaseManager on a temporary file."""
+    db = DatabaseManager(str(tmp_path / 'prices.db'))
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def site_id(db):
+    """One active mall in the `db` fixture."""
+    return db.add_site('mall', 'http://mall.example/?q={}', '.name', '.price')
+
+
+@pytest.fixture
+def server():
+    """A local fixture mall (benchmarks/fixture_server.py) serving 256 KB search pages."""
+    pytest.importorskip('requests')
+    from fixture_server import FixtureServer
+    with FixtureServer(n_malls=1, page_kb=256) as srv:
+        yield srv
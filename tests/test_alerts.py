@@ -0,0 +1,69 @@
+import pytest
+
+from alerts import AlertEngine
+from database_manager import DatabaseManager
+
+
+def _setup(db):
+    site_id = db.add_site('mall', 'http://mall.example/?q={}', '.name', '.price')
+    return db.get_or_create_product('phone'), site_id
+
+
+def test_rule_threshold_is_validated(db):
+    product_id, _ = _setup(db)
+    for kind, threshold in (('below', None), ('drop', None), ('below', '900'), ('drop', 150)):
+        with pytest.raises(ValueError):
+            db.add_alert_rule(product_id, kind, threshold)
+    db.add_alert_rule(product_id, 'new_low')
+    db.add_alert_rule(product_id, 'below', 900)
+    assert [r[3:] for r in db.get_alert_rules(product_id)] == [('new_low', None), ('below', 900)]
+
+
+def test_listener_error_does_not_escape_add_prices(db):
+    product_id, site_id = _setup(db)
+
+    def broken(rows):
+        raise RuntimeError('listener failed')
+    seen = []
+    db.add_price_listener(broken)
+    db.add_price_listener(seen.extend)
+    db.add_prices([(product_id, site_id, 1000, 't', 'u')])
+    assert len(seen) == 1
+    assert db.get_lowest_price(product_id)[0] == 1000
+
+
+def test_rule_without_threshold_is_skipped(db):
+    product_id, site_id = _setup(db)
+    # 검증이 없던 버전에서 저장된 규칙
+    with db.get_connection() as conn:
+        conn.execute("INSERT INTO alert_rules (product_id, kind) VALUES (?, 'below')", (product_id,))
+    db.add_alert_rule(product_id, 'below', 1500)
+    engine = AlertEngine(db)
+    db.add_price_listener(engine.on_prices)
+    fired = []
+    engine.add_listener(lambda events: 1 / 0)
+    engine.add_listener(fired.extend)
+    db.add_prices([(product_id, site_id, 1000, 't', 'u')])
+    assert [(e['kind'], e['reference']) for e in fired] == [('below', 1500)]
+    assert len(db.get_alert_events(product_id)) == 1
+
+
+def test_rules_added_elsewhere_are_picked_up(db, tmp_path):
+    product_id, site_id = _setup(db)
+    engine = AlertEngine(db)
+    db.add_price_listener(engine.on_prices, before=engine.refresh)
+    fired = []
+    engine.add_listener(fired.extend)
+    db.add_prices([(product_id, site_id, 1000, 't', 'u')])
+
+    # 앱이 실행 중일 때 `python alerts.py add ...` 로 추가한 규칙
+    cli = DatabaseManager(db.db_name)
+    rule_id = cli.add_alert_rule(product_id, 'below', 900)
+    db.add_prices([(product_id, site_id, 850, 't', 'u')])
+    assert [(e['rule_id'], e['price']) for e in fired] == [(rule_id, 850)]
+
+    cli.delete_alert_rule(rule_id)
+    cli.close()
+    db.add_prices([(product_id, site_id, 1000, 't', 'u')])
+    db.add_prices([(product_id, site_id, 800, 't', 'u')])
+    assert len(fired) == 1
@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+pytest.importorskip('requests')
+
+from auto_discovery import SiteAnalyzer
+from fetch_engine import ConcurrentFetcher
+
+
+class RecordingAnalyzer(SiteAnalyzer):
+    """Records requested URLs instead of going to the network; the homepage fetch cancels the analysis."""
+
+    def __init__(self, fetcher, cancel_event):
+        super().__init__(fetcher=fetcher)
+        self.cancel_event = cancel_event
+        self.fetched = []
+
+    def _fetch(self, url):
+        self.fetched.append(url)
+        if url == 'https://mall.example':
+            self.cancel_event.set()
+        return 200, '<html><body></body></html>'
+
+
+def test_cancelled_analysis_sends_no_more_requests():
+    # 작업자 한 명: 검색 확인 요청들은 홈페이지 요청 뒤에서 대기
+    fetcher = ConcurrentFetcher(max_workers=1)
+    cancel = threading.Event()
+    analyzer = RecordingAnalyzer(fetcher, cancel)
+    res = analyzer.analyze('mall.example', cancel_event=cancel)
+    assert res['cancelled'] and not res['success']
+    # 남은 작업이 있었다면 여기서 실행됨
+    fetcher.submit(lambda url: None, 'https://mall.example').result()
+    assert analyzer.fetched == ['https://mall.example']
+
+
+def test_analysis_runs_on_the_given_fetcher():
+    fetcher = ConcurrentFetcher(max_workers=2)
+    analyzer = RecordingAnalyzer(fetcher, threading.Event())
+    analyzer.analyze('https://shop.example')
+    assert fetcher._executor is not None
+    assert len(analyzer.fetched) == 1 + len(SiteAnalyzer.TEST_KEYWORDS)
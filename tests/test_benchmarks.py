@@ -0,0 +1,49 @@
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from fixture_server import LAYOUTS, LAYOUT_SELECTORS, FixtureServer, render_page
+from scraper import PriceScraper
+
+
+def test_pages_are_deterministic_and_sized():
+    for layout in LAYOUTS:
+        page = render_page(layout, 'phone', page_kb=32)
+        assert page == render_page(layout, 'phone', page_kb=32)
+        assert abs(len(page.encode('utf-8')) - 32 * 1024) < 64
+        assert page != render_page(layout, 'phone', page_kb=32, seed=1)
+
+
+def test_every_layout_is_extracted_with_its_selectors():
+    scraper = PriceScraper()
+    for layout in LAYOUTS:
+        title, price = LAYOUT_SELECTORS[layout]
+        site = {'id': layout, 'name': layout, 'title_selector': title, 'price_selector': price}
+        offers = scraper.plan_for(site).extract_all(render_page(layout, 'phone', 16, items=5), 'http://fixture/', 10)
+        assert len(offers) == 5, layout
+
+
+def test_error_rate_and_overrides():
+    with FixtureServer(n_malls=2, error_rate=1.0, overrides={1: {'error_rate': 0.0}}, page_kb=8) as server:
+        configs = server.site_configs()
+        assert requests.get(configs[0][1].format('phone')).status_code == 503
+        ok = requests.get(configs[1][1].format('phone'))
+        assert ok.status_code == 200 and 'phone' in ok.text
+        assert requests.get(server.base_url + '/other').status_code == 404
+        assert server.requests == 3
+
+
+def test_percentiles():
+    from run_benchmarks import percentiles
+    assert percentiles([]) == {}
+    stats = percentiles(list(range(1, 101)))
+    assert (stats['n'], stats['p50'], stats['p95'], stats['max'], stats['mean']) == (100, 51, 95, 100, 50.5)
+
+
+def test_bench_search_runs_against_the_fixture_server():
+    from run_benchmarks import bench_search
+    result = bench_search(n_malls=3, searches=2, latency=(0.0, 0.0), error_rate=0.0, page_kb=16, workers=3)
+    assert result['site_failures'] == 0
+    assert result['latency_ms']['n'] == 2
+    # freshness=0 이므로 검색마다 모든 쇼핑몰에 실제로 요청함
+    assert result['server_requests'] == 6
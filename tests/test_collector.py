@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+pytest.importorskip('requests')
+
+from collector import BatchCollector
+from fixture_server import FixtureServer
+from scraper import PriceScraper
+
+
+def test_collect_store_and_resume(db, tmp_path):
+    jsonl_path = str(tmp_path / 'out.jsonl')
+    checkpoint_path = str(tmp_path / 'collector.checkpoint')
+    with FixtureServer(n_malls=2, page_kb=16, overrides={1: {'error_rate': 1.0}}) as server:
+        for config in server.site_configs():
+            db.add_site(*config)
+        products = [(db.get_or_create_product(k), k) for k in ('phone', 'tv', 'watch')]
+        scraper = PriceScraper(max_offers=3)
+        scraper.session = scraper.fast_session  # 503 재시도 대기 없이 바로 실패로 기록
+        collector = BatchCollector(db, scraper, threads=4, batch_size=2,
+                                   jsonl_path=jsonl_path, checkpoint_path=checkpoint_path)
+        stats = collector.run(products)
+        assert (stats['tasks'], stats['ok'], stats['failed']) == (6, 3, 3)
+
+        for product_id, _ in products:
+            assert db.get_lowest_price(product_id)[0] > 0
+        with open(jsonl_path, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == 6
+        assert {(r['keyword'], r['site'], r['success']) for r in lines if r['success']} == {
+            (k, 'mall0', True) for _, k in products}
+        assert all(len(r['offers']) == 3 for r in lines if r['success'])
+
+        # 실패한 쇼핑몰만 체크포인트에서 빠져 있으므로 재개 시 그 쌍만 다시 요청
+        requests_before = server.requests
+        server.overrides = {}
+        stats = collector.run(products, resume=True)
+        assert (stats['tasks'], stats['ok'], stats['failed']) == (3, 3, 0)
+        assert server.requests == requests_before + 3
+    with open(jsonl_path, encoding='utf-8') as f:
+        assert sum(1 for _ in f) == 9
@@ -0,0 +1,40 @@
+DAILY = 'SELECT product_id, day, min_price, min_site_id, max_price, last_price, last_site_id FROM price_daily ORDER BY 1, 2'
+
+
+def test_rebuild_matches_triggers(db):
+    a, b, c, d = (db.add_site(name, f'http://{name}.example/?q={{}}', '.t', '.p') for name in 'ABCD')
+    phone = db.get_or_create_product('phone')
+    tv = db.get_or_create_product('tv')
+    # B 가 최저가 (C 와 동률이지만 먼저 기록), D 가 마지막으로 기록 / tv 는 모두 같은 가격
+    db.add_prices([(phone, a, 1000, 't', 'u'), (phone, b, 900, 't', 'u'), (phone, c, 900, 't', 'u'),
+                   (tv, a, 500, 't', 'u'), (tv, b, 500, 't', 'u')])
+    db.add_prices([(phone, d, 950, 't', 'u'), (tv, c, 500, 't', 'u')])
+    with db.get_connection() as conn:
+        by_triggers = conn.execute(DAILY).fetchall()
+    db.rebuild_daily_aggregates()
+    with db.get_connection() as conn:
+        rebuilt = conn.execute(DAILY).fetchall()
+
+    assert rebuilt == by_triggers
+    assert rebuilt[0][2:] == (900, b, 1000, 950, d)
+    assert rebuilt[1][2:] == (500, a, 500, 500, c)
+    assert db.get_lowest_price(phone)[2] == 'B'
+
+
+def _daily(db, product_id, rows):
+    with db.get_connection() as conn:
+        conn.executemany('INSERT INTO price_daily (product_id, day, min_price) VALUES (?, ?, ?)',
+                         [(product_id, day, price) for day, price in rows])
+        conn.commit()
+
+
+def test_price_change_ignores_days_outside_the_window(db):
+    phone = db.get_or_create_product('phone')
+    # 2024-01-01 과 2026-10-18 사이에 기록이 없음
+    _daily(db, phone, [('2024-01-01', 1100), ('2026-10-18', 900)])
+    assert db.get_price_change(phone, 7) is None
+    assert db.get_price_summary(phone)['change_7d'] is None
+
+    _daily(db, phone, [('2026-10-05', 1200), ('2026-10-09', 1000), ('2026-10-12', 950)])
+    old, new, pct = db.get_price_change(phone, 7)
+    assert (old, new, round(pct, 2)) == (1000, 900, -10.0)
@@ -0,0 +1,79 @@
+import datetime
+import sqlite3
+import threading
+
+import pytest
+
+
+def test_add_prices_keeps_one_row_per_site_and_day(db, site_id):
+    phone = db.get_or_create_product('phone')
+    db.add_prices([(phone, site_id, 1000, 'phone', 'http://mall.example/1')],
+                  [(phone, site_id, 0, 1000, 'phone', 'http://mall.example/1'),
+                   (phone, site_id, 1, 1100, 'phone case', 'http://mall.example/2')])
+    # 같은 날 다시 수집하면 덮어씀
+    db.add_prices([(phone, site_id, 950, 'phone', 'http://mall.example/1')],
+                  [(phone, site_id, 0, 950, 'phone', 'http://mall.example/1')])
+    with db.get_connection() as conn:
+        assert conn.execute('SELECT price FROM prices').fetchall() == [(950,)]
+        assert conn.execute('SELECT rank, price FROM offers').fetchall() == [(0, 950)]
+    db.add_price(phone, site_id, 900, 'phone', 'http://mall.example/1')
+    with db.get_connection() as conn:
+        assert conn.execute('SELECT COUNT(*), MIN(price) FROM prices').fetchone() == (1, 900)
+
+
+def test_add_prices_is_one_transaction(db, site_id):
+    phone = db.get_or_create_product('phone')
+    # 같은 순위가 두 번 들어가 유일 제약을 어기면 가격 행까지 모두 되돌려짐
+    with pytest.raises(sqlite3.IntegrityError):
+        db.add_prices([(phone, site_id, 1000, 'phone', 'u')],
+                      [(phone, site_id, 0, 1000, 'phone', 'u'), (phone, site_id, 0, 1100, 'phone', 'u')])
+    with db.get_connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM prices').fetchone()[0] == 0
+
+
+def test_connections_are_reused_per_thread_in_wal_mode(db):
+    conn = db.get_connection()
+    assert db.get_connection() is conn
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.get_connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+    db.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute('SELECT 1')
+    # 닫은 뒤에도 다시 열어서 사용 가능
+    assert db.get_connection().execute('SELECT COUNT(*) FROM sites').fetchone() == (0,)
+
+
+def _history(db, site_id, product_id, days):
+    with db.get_connection() as conn:
+        conn.executemany('''
+            INSERT INTO prices (product_id, site_id, price, scraped_at, day)
+            VALUES (?, ?, ?, datetime('2026-01-01', ?), date('2026-01-01', ?))
+        ''', [(product_id, site_id, 1000 + i, f'+{i} days', f'+{i} days') for i in range(days)])
+        conn.commit()
+
+
+def test_history_is_bucketed_in_sql(db, site_id):
+    phone = db.get_or_create_product('phone')
+    _history(db, site_id, phone, 100)
+    rows = db.get_price_history_buckets(phone, max_points=10)
+    assert 5 <= len(rows) <= 10
+    assert {r[0] for r in rows} == {'mall'}
+    assert min(r[2] for r in rows) == 1000 and max(r[4] for r in rows) == 1099
+    assert [r[1] for r in rows] == sorted(r[1] for r in rows)
+    # 기간 제한
+    start = datetime.datetime(2026, 4, 1, tzinfo=datetime.timezone.utc).timestamp()  # 91번째 날
+    assert min(r[2] for r in db.get_price_history_buckets(phone, start=start)) == 1090
+
+
+def test_history_query_uses_the_covering_index(db):
+    with db.get_connection() as conn:
+        plan = ' '.join(row[-1] for row in conn.execute('''
+            EXPLAIN QUERY PLAN SELECT site_id, scraped_at, price FROM prices
+            WHERE product_id = 1 AND scraped_at BETWEEN '2026-01-01' AND '2026-12-31'
+        '''))
+    assert 'COVERING INDEX idx_prices_product_time' in plan
@@ -0,0 +1,104 @@
+import pytest
+
+from extraction import BACKENDS, ExtractionPlan, get_backend, read_html, split_price_selector
+from fixture_server import LAYOUT_SELECTORS, LAYOUTS, render_page
+
+SITE = {'title_selector': '.name', 'price_selector': '.price'}
+
+
+class CountingBackend:
+    """Wraps the bs4 backend and counts parses."""
+
+    def __init__(self):
+        self._backend = get_backend('bs4')
+        self.parses = 0
+
+    def parse(self, html):
+        self.parses += 1
+        return self._backend.parse(html)
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+
+class FakeResponse:
+    def __init__(self, body, content_type, encoding):
+        self.body = body
+        self.headers = {'Content-Type': content_type}
+        self.encoding = encoding
+
+    def iter_content(self, size):
+        for i in range(0, len(self.body), size):
+            yield self.body[i:i + size]
+
+
+def test_fallback_reuses_the_parse():
+    backend = CountingBackend()
+    plan = ExtractionPlan(SITE, backend)
+    # 제목과 가격이 같은 상품 박스에 없어서 첫 상품만 찾는 경로로 감
+    html = ('<div class="names"><p class="name">폰</p><p class="name">TV</p></div>'
+            '<div class="prices"><span class="price">1,000원</span></div>')
+    offers = plan.extract_all(html, 'http://mall.example/')
+    assert [(o['product_title'], o['price_text']) for o in offers] == [('폰', '1,000원')]
+    assert backend.parses == 1
+
+
+def test_korean_page_without_charset_header():
+    html = '<html><body><p class="name">갤럭시 S24 자급제</p><p class="price">1,000원</p></body></html>'
+    # requests 는 charset 없는 text/html 을 ISO-8859-1 로 봄
+    for content_type, encoding in (('text/html', 'ISO-8859-1'), ('', None)):
+        text, info = read_html(FakeResponse(html.encode('cp949'), content_type, encoding))
+        assert text == html
+    meta = '<meta charset="euc-kr">' + html
+    text, info = read_html(FakeResponse(meta.encode('cp949'), 'text/html', 'ISO-8859-1'))
+    assert text == meta
+    text, info = read_html(FakeResponse(html.encode('utf-8'), 'text/html; charset=utf-8', 'utf-8'))
+    assert text == html
+
+
+@pytest.mark.parametrize('layout', LAYOUTS)
+def test_backends_agree_on_fixture_layouts(layout):
+    html = render_page(layout, 'phone', page_kb=16, items=5)
+    title, price = LAYOUT_SELECTORS[layout]
+    site = {'title_selector': title, 'price_selector': price}
+    results = {}
+    for name in BACKENDS:
+        try:
+            backend = get_backend(name)
+        except ImportError:
+            continue
+        results[name] = ExtractionPlan(site, backend).extract(html, 'http://mall.example/search')
+    assert results['bs4']['product_title'] == 'phone 상품 0'
+    assert results['bs4']['price_text']
+    assert all(found == results['bs4'] for found in results.values())
+
+
+def test_attr_selector_is_split_once():
+    assert split_price_selector('[ec-data-price]::attr(ec-data-price)') == ('[ec-data-price]', 'ec-data-price')
+    assert split_price_selector('.price') == ('.price', None)
+
+
+def test_plans_are_cached_per_site_until_selectors_change():
+    pytest.importorskip('requests')
+    from scraper import PriceScraper
+    scraper = PriceScraper()
+    site = {'id': 1, 'title_selector': '.name', 'price_selector': '.price'}
+    plan = scraper.plan_for(site)
+    assert scraper.plan_for(dict(site)) is plan
+    assert scraper.plan_for(dict(site, price_selector='.sale')) is not plan
+    scraper.invalidate_plan(1)
+    assert scraper.plan_for(site) is not plan
+
+
+def test_extract_all_pairs_each_title_with_its_own_price():
+    plan = ExtractionPlan(SITE, get_backend('bs4'))
+    items = ''.join(f'<li><a href="/p/{i}"><span class="name">상품 {i}</span></a><div><b class="price">{i},000원</b></div></li>'
+                    for i in range(1, 6))
+    # 두 번째 상품은 가격이 없음
+    items = items.replace('<b class="price">2,000원</b>', '')
+    offers = plan.extract_all(f'<ul>{items}</ul>', 'http://mall.example/search', limit=3)
+    assert [(o['product_title'], o['price_text'], o['url']) for o in offers] == [
+        ('상품 1', '1,000원', 'http://mall.example/p/1'),
+        ('상품 3', '3,000원', 'http://mall.example/p/3'),
+        ('상품 4', '4,000원', 'http://mall.example/p/4'),
+    ]
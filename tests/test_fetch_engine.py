@@ -0,0 +1,74 @@
+import threading
+import time
+
+from fetch_engine import ConcurrentFetcher
+
+
+def _sites(*names):
+    return [{'name': name, 'url_pattern': f'http://{name}.example/?q={{}}'} for name in names]
+
+
+def test_cancel_keeps_finished_results():
+    fetcher = ConcurrentFetcher(max_workers=3)
+    cancel = threading.Event()
+    release = threading.Event()
+
+    def fn(sc):
+        if sc['name'] in ('slow', 'queued'):
+            release.wait(5)
+        elif sc['name'] == 'late':
+            time.sleep(0.05)
+        return {'site_name': sc['name'], 'success': True}
+
+    seen = []
+    try:
+        for sc, res in fetcher.map_sites(fn, _sites('fast', 'late', 'slow', 'queued'), cancel_event=cancel):
+            seen.append(sc['name'])
+            if sc['name'] == 'fast':
+                # 'late' 가 끝난 뒤에 취소
+                time.sleep(0.3)
+                cancel.set()
+    finally:
+        release.set()
+    assert seen == ['fast', 'late']
+
+
+def test_sites_run_concurrently_and_stream_in_completion_order():
+    fetcher = ConcurrentFetcher(max_workers=4)
+    delays = {'a': 0.3, 'b': 0.1, 'c': 0.2}
+
+    def fn(sc):
+        time.sleep(delays[sc['name']])
+        return {'site_name': sc['name'], 'success': True}
+
+    started = time.monotonic()
+    order = [sc['name'] for sc, res in fetcher.map_sites(fn, _sites('a', 'b', 'c'))]
+    # 가장 느린 사이트만큼만 걸림 (순서대로면 0.6초)
+    assert time.monotonic() - started < 0.5
+    assert order == ['b', 'c', 'a']
+
+
+def test_per_host_limit_and_deadline():
+    fetcher = ConcurrentFetcher(max_workers=4, per_host_limit=1)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def fn(sc):
+        with lock:
+            running.append(sc)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(sc)
+        return {'site_name': sc['name'], 'success': True}
+
+    same_host = [{'name': f'p{i}', 'url_pattern': f'http://mall.example/{i}?q={{}}'} for i in range(3)]
+    assert len(list(fetcher.map_sites(fn, same_host))) == 3
+    assert max(peak) == 1
+
+    release = threading.Event()
+    results = dict((sc['name'], res) for sc, res in fetcher.map_sites(
+        lambda sc: release.wait(2) and {'success': True}, _sites('stuck'), deadline=0.1))
+    release.set()
+    assert results['stuck']['metrics']['outcome'] == 'timeout'
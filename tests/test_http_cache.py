@@ -0,0 +1,71 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_cache import HttpCache
+
+PAGE = '<html><body><p class="name">phone</p><p class="price">1,000원</p></body></html>'.encode('utf-8')
+
+
+@pytest.fixture
+def etag_server():
+    """Serves PAGE with an ETag and answers 304 to a matching If-None-Match."""
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            hits.append(self.headers.get('If-None-Match'))
+            if self.headers.get('If-None-Match') == '"v1"':
+                self.send_response(304)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('ETag', '"v1"')
+            self.send_header('Content-Length', str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}/search?q=phone', hits
+    httpd.shutdown()
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = HttpCache(str(tmp_path / 'cache.db'), default_ttl=60, max_bytes=10)
+    cache.put('http://a', 'aaaa', etag='"a"')
+    entry = cache.get('http://a')
+    assert cache.is_fresh(entry) and not cache.is_fresh(entry, ttl=0)
+    assert cache.conditional_headers(entry) == {'If-None-Match': '"a"'}
+    cache.put('http://b', 'bbbb')
+    cache.get('http://a')
+    # 용량을 넘으면 가장 오래 쓰지 않은 항목(b)부터 지움
+    cache.put('http://c', 'cccc')
+    assert cache.get('http://b') is None
+    assert cache.get('http://a') and cache.get('http://c')
+
+
+def test_stale_entry_is_revalidated(etag_server, tmp_path):
+    pytest.importorskip('requests')
+    from scraper import PriceScraper
+    url, hits = etag_server
+    scraper = PriceScraper(cache=HttpCache(str(tmp_path / 'cache.db')))
+
+    metrics = {}
+    assert scraper.fetch(url, metrics=metrics) == PAGE.decode('utf-8')
+    assert metrics['cache'] == 'miss'
+    metrics = {}
+    scraper.fetch(url, metrics=metrics)
+    assert metrics['cache'] == 'hit' and len(hits) == 1
+    metrics = {}
+    assert scraper.fetch(url, ttl=0, metrics=metrics) == PAGE.decode('utf-8')
+    assert metrics['cache'] == 'revalidated' and metrics['bytes'] == 0
+    assert hits == [None, '"v1"']
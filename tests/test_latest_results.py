@@ -0,0 +1,16 @@
+def test_latest_result_per_site(db, site_id):
+    other = db.add_site('other', 'http://other.example/?q={}', '.name', '.price')
+    phone = db.get_or_create_product('phone')
+    db.add_prices([(phone, site_id, 1000, 'phone', 'http://mall.example/1'),
+                   (phone, other, 900, 'phone', 'http://other.example/1')])
+    results = db.get_latest_results(phone)
+    assert [(r['site_id'], r['price'], r['from_db']) for r in results] == [(other, 900, True), (site_id, 1000, True)]
+    assert all(isinstance(r['scraped_at'], int) for r in results)
+
+
+def test_imported_row_without_timestamp(db, site_id):
+    db.import_rows('prices', [{'product': 'phone', 'site': 'mall', 'url_pattern': 'http://mall.example/?q={}',
+                               'day': '2026-10-01', 'scraped_at': None, 'price': 1000,
+                               'product_title': 'phone', 'product_url': 'http://mall.example/1'}])
+    results = db.get_latest_results(db.get_product_id('phone'))
+    assert [(r['price'], r['scraped_at']) for r in results] == [(1000, None)]
@@ -0,0 +1,74 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('flet')
+
+import main
+from search_jobs import JobManager
+
+
+class FakePage:
+    def __init__(self):
+        self.updates = 0
+
+    def run_threadsafe(self, fn):
+        fn()
+
+    def update(self):
+        self.updates += 1
+
+
+class FakeServices:
+    def __init__(self):
+        self.jobs = JobManager()
+
+    def run_job(self, fn, *args, owner=None):
+        return self.jobs.submit(fn, *args, owner=owner)
+
+    def cancel_job(self, owner):
+        self.jobs.cancel(owner)
+
+
+class FakeApp:
+    """Just the state PriceCompareMobile's search box handlers use (hashable, like the real session object)."""
+
+    def __init__(self, db):
+        self.db = db
+        self.db_ready = threading.Event()
+        self.db_ready.set()
+        self.page = FakePage()
+        self.services = FakeServices()
+        self.search_input = SimpleNamespace(value='')
+        self.suggestion_list = SimpleNamespace(controls=[], visible=False)
+
+
+def _app(db):
+    app = FakeApp(db)
+    for name in ('on_search_change', 'load_suggestions', 'show_suggestions', 'pick_suggestion'):
+        setattr(app, name, getattr(main.PriceCompareMobile, name).__get__(app))
+    return app
+
+
+def test_suggestions_are_debounced_off_the_ui_thread(db):
+    db.add_search_keyword('phone')
+    db.add_search_keyword('phone case')
+    calls = []
+    get_suggestions = db.get_suggestions
+
+    def recording(text, limit):
+        calls.append((text, threading.current_thread() is threading.main_thread()))
+        return get_suggestions(text, limit)
+    db.get_suggestions = recording
+    app = _app(db)
+
+    for text in ('p', 'ph', 'pho'):
+        app.search_input.value = text
+        app.on_search_change(None)
+    assert calls == []
+    time.sleep(main.SUGGESTION_DELAY + 0.3)
+    assert calls == [('pho', False)]
+    assert [c.title.value for c in app.suggestion_list.controls] == get_suggestions('pho', main.SUGGESTION_LIMIT)
+    assert app.suggestion_list.visible
@@ -0,0 +1,52 @@
+import sqlite3
+
+from database_manager import DatabaseManager
+from maintenance import DatabaseMaintenance
+
+
+def _with_free_pages(db_or_path, rows=2000):
+    conn = sqlite3.connect(db_or_path)
+    conn.execute('CREATE TABLE IF NOT EXISTS filler (data TEXT)')
+    conn.executemany('INSERT INTO filler VALUES (?)', [('x' * 500,)] * rows)
+    conn.commit()
+    conn.execute('DROP TABLE filler')
+    conn.commit()
+    conn.close()
+
+
+class CountingDb:
+    """Records the page budget of every vacuum call."""
+
+    def __init__(self, db):
+        self.db = db
+        self.calls = []
+
+    def vacuum(self, pages=None, convert=False):
+        self.calls.append(pages)
+        return self.db.vacuum(pages, convert)
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+
+def test_vacuum_runs_in_bounded_steps(db):
+    _with_free_pages(db.db_name)
+    counting = CountingDb(db)
+    stats = DatabaseMaintenance(counting, vacuum_pages=35, vacuum_step=10).run()
+    assert counting.calls == [10, 10, 10, 5]
+    assert stats['freed_pages'] == 35
+
+
+def test_old_file_is_only_converted_from_the_cli(tmp_path):
+    path = str(tmp_path / 'old.db')
+    # auto_vacuum 없이 만들어진 예전 파일
+    _with_free_pages(path)
+    db = DatabaseManager(path)
+    assert DatabaseMaintenance(db).run()['freed_pages'] == 0
+    with db.get_connection() as conn:
+        assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 0
+    stats = DatabaseMaintenance(db, vacuum_pages=0, full_vacuum=True).run()
+    assert stats['freed_pages'] > 0
+    with db.get_connection() as conn:
+        assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+    db.close()
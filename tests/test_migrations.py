@@ -0,0 +1,66 @@
+import sqlite3
+
+import pytest
+
+import database_manager
+from database_manager import DatabaseManager
+
+
+def _v5_database(path):
+    """A database as left by an app version before the suggestions step (v6)."""
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE sites (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, url_pattern TEXT NOT NULL,
+                            title_selector TEXT, price_selector TEXT, is_active BOOLEAN DEFAULT 1);
+        CREATE TABLE products (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE,
+                               created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE prices (id INTEGER PRIMARY KEY AUTOINCREMENT, product_id INTEGER, site_id INTEGER, price REAL,
+                             product_title TEXT, product_url TEXT, scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE search_history (id INTEGER PRIMARY KEY AUTOINCREMENT, keyword TEXT NOT NULL UNIQUE,
+                                     last_searched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        INSERT INTO sites (name, url_pattern) VALUES ('mall', 'http://mall.example/?q={}');
+        INSERT INTO products (name) VALUES ('phone');
+        INSERT INTO search_history (keyword) VALUES ('phone');
+        INSERT INTO search_history (keyword) VALUES ('tv');
+        INSERT INTO prices (product_id, site_id, price, product_title) VALUES (1, 1, 1000, 'phone 128GB');
+    ''')
+    conn.close()
+
+
+def test_interrupted_migration_is_rolled_back_and_rerun_cleanly(tmp_path, monkeypatch):
+    path = str(tmp_path / 'old.db')
+    _v5_database(path)
+
+    def fail(cursor):
+        raise sqlite3.OperationalError('interrupted')
+    # 자동완성 단계(v6) 다음 단계에서 중단
+    monkeypatch.setattr(DatabaseManager, '_create_daily_aggregates', staticmethod(fail))
+    with pytest.raises(sqlite3.OperationalError):
+        DatabaseManager(path)
+    conn = sqlite3.connect(path)
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'suggestions'").fetchone()[0] == 0
+    conn.close()
+
+    monkeypatch.undo()
+    db = DatabaseManager(path)
+    with db.get_connection() as conn:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == database_manager.SCHEMA_VERSION
+        rows = conn.execute('SELECT term, searches FROM suggestions ORDER BY term').fetchall()
+    assert rows == [('phone', 1), ('phone 128GB', 0), ('tv', 1)]
+    assert db.get_suggestions('ph') == ['phone', 'phone 128GB']
+    db.close()
+
+
+def test_suggestions_backfill_is_idempotent(tmp_path):
+    path = str(tmp_path / 'old.db')
+    _v5_database(path)
+    db = DatabaseManager(path)
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        before = cursor.execute('SELECT term, searches, product_id FROM suggestions ORDER BY term').fetchall()
+        DatabaseManager._create_suggestions(cursor)
+        after = cursor.execute('SELECT term, searches, product_id FROM suggestions ORDER BY term').fetchall()
+        conn.rollback()
+    assert after == before
+    db.close()
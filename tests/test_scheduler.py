@@ -0,0 +1,41 @@
+from scheduler import WatchlistScheduler
+
+
+class FailingScraper:
+    """Stands in for PriceScraper against a mall that always answers 503."""
+
+    def __init__(self, outcome='http_error'):
+        self.outcome = outcome
+        self.calls = 0
+
+    def scrape_site(self, site_config, keyword):
+        self.calls += 1
+        return {'site_name': site_config['name'], 'success': False, 'error': '503',
+                'metrics': {'outcome': self.outcome, 'total_ms': 1.0}}
+
+
+def _scheduler(db, scraper):
+    db.get_or_create_product('phone')
+    return WatchlistScheduler(db, scraper, jitter=0, domain_rate=1000, domain_burst=1000)
+
+
+def test_failed_pair_waits_for_refresh_interval(db, site_id):
+    scraper = FailingScraper()
+    scheduler = _scheduler(db, scraper)
+    assert scheduler.run_once() == 0
+    assert scraper.calls == 1
+    # 다음 폴링에서는 같은 쌍을 다시 요청하지 않음
+    assert scheduler.build_queue() == []
+    scheduler.run_once()
+    assert scraper.calls == 1
+    # 갱신 주기가 지나면 다시 후보가 됨
+    scheduler.refresh_interval = -1
+    assert len(scheduler.build_queue()) == 1
+
+
+def test_not_found_pair_is_not_retried(db, site_id):
+    scraper = FailingScraper('not_found')
+    scheduler = _scheduler(db, scraper)
+    scheduler.run_once()
+    scheduler.run_once()
+    assert scraper.calls == 1
@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip('requests')
+
+from http_cache import HttpCache
+from scraper import PriceScraper
+
+
+def _site(server):
+    name, url_pattern, title, price = server.site_configs()[0]
+    return {'id': 1, 'name': name, 'url_pattern': url_pattern, 'title_selector': title, 'price_selector': price}
+
+
+def test_partial_body_is_cached_as_partial(server, tmp_path):
+    cache = HttpCache(str(tmp_path / 'cache.db'))
+    scraper = PriceScraper(cache=cache)
+    url = server.site_configs()[0][1].format('phone')
+
+    metrics = {}
+    scraper.fetch(url, metrics=metrics, stop=lambda prefix: True)
+    assert metrics['stopped'] == 'early'
+    assert cache.get(url)['partial'] == 'early'
+
+    # 전체 본문이 필요한 요청은 잘린 항목을 쓰지 않음
+    metrics = {}
+    html = scraper.fetch(url, metrics=metrics)
+    assert (metrics['cache'], metrics['stopped']) == ('miss', None)
+    entry = cache.get(url)
+    assert entry['partial'] is None and entry['body'] == html
+
+
+def test_search_is_served_from_partial_entry(server, tmp_path):
+    cache = HttpCache(str(tmp_path / 'cache.db'))
+    scraper = PriceScraper(cache=cache, max_offers=3)
+    site = _site(server)
+
+    first = scraper.scrape_site(site, 'phone')
+    assert first['metrics']['stopped'] == 'early'
+    assert first['metrics']['bytes'] < server.page_kb * 1024
+    requests_before = server.requests
+    again = scraper.scrape_site(site, 'phone')
+    assert again['metrics']['cache'] == 'hit'
+    assert again['offers'] == first['offers']
+    assert server.requests == requests_before
+
+    # 더 많은 상품이 필요하면 캐시된 앞부분으로는 부족하므로 다시 받음
+    more = scraper.scrape_site(site, 'phone', limit=server.items + 10)
+    assert (more['metrics']['cache'], more['metrics']['stopped']) == ('miss', None)
+    assert len(more['offers']) == server.items
+    assert server.requests == requests_before + 1
+
+
+def test_scrape_site_returns_top_offers(server):
+    res = PriceScraper(max_offers=4).scrape_site(_site(server), 'phone')
+    assert res['success'] and len(res['offers']) == 4
+    assert [o['product_title'] for o in res['offers']] == [f'phone 상품 {i}' for i in range(4)]
+    assert (res['price'], res['product_title']) == (res['offers'][0]['price'], res['offers'][0]['product_title'])
+    assert all(o['price'] > 0 for o in res['offers'])
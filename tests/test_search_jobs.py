@@ -0,0 +1,44 @@
+import threading
+import time
+
+from fetch_engine import ConcurrentFetcher
+from search_jobs import SearchCoordinator
+
+
+class SlowScraper:
+    """Stands in for PriceScraper: every site answers one offer after a short delay."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def scrape_site(self, site_config, keyword):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        offer = {'product_title': keyword, 'price': 1000.0, 'price_text': '1,000', 'url': 'http://mall.example/1'}
+        return dict(offer, site_name=site_config['name'], offers=[offer], success=True,
+                    metrics={'outcome': 'ok', 'total_ms': self.delay * 1000})
+
+
+def test_concurrent_searches_share_one_fetch(db, site_id):
+    scraper = SlowScraper()
+    coordinator = SearchCoordinator(db, scraper, ConcurrentFetcher(), freshness=0)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(coordinator.search('phone'))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert scraper.calls == 1
+    assert sorted(bool(res.get('shared')) for (_, res), in results) == [False, True]
+
+
+def test_fresh_result_is_reused_the_same_day(db, site_id):
+    scraper = SlowScraper(delay=0)
+    coordinator = SearchCoordinator(db, scraper, ConcurrentFetcher())
+    coordinator.search('phone')
+    (site, res), = coordinator.search('phone')
+    assert scraper.calls == 1
+    assert res['from_db'] and res['price'] == 1000
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from maintenance import DatabaseMaintenance
+from services import AppServices, DatabaseWriter
+
+
+def test_writes_run_on_the_writer_thread(db, site_id):
+    writer = DatabaseWriter(db)
+    threads = []
+    original = db.add_prices
+
+    def add_prices(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return original(*args, **kwargs)
+    db.add_prices = add_prices
+    # 리스너 안에서 다시 쓰기를 호출해도 writer 스레드에서 바로 실행되어 멈추지 않음
+    db.add_price_listener(lambda rows: writer.add_search_keyword('phone'))
+    product_id = writer.get_or_create_product('phone')
+
+    workers = [threading.Thread(target=writer.add_prices, args=([(product_id, site_id, 1000 + i, 't', 'u')],))
+               for i in range(8)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    assert threads == [writer._thread] * 8
+    assert writer.get_lowest_price(product_id)[0] == 1000
+    assert writer.get_sites() == db.get_sites()
+
+    with pytest.raises(ValueError):
+        writer.add_alert_rule(product_id, 'below', None)
+    writer.close()
+
+
+def test_sessions_share_one_set_of_services(tmp_path, monkeypatch):
+    pytest.importorskip('requests')
+    monkeypatch.setattr(DatabaseMaintenance, 'run_if_due', lambda self: None)
+    services = AppServices(db_name=str(tmp_path / 'prices.db'), cache_name=str(tmp_path / 'cache.db'))
+    db = services.get_db()
+    assert isinstance(db, DatabaseWriter)
+    assert services.get_db() is db
+
+    searcher = services.get_searcher()
+    assert services.get_searcher() is searcher
+    # 검색과 사이트 분석이 같은 요청 풀(호스트별 제한)을 씀
+    assert searcher.fetcher is services.get_fetcher()
+    assert services.get_analyzer().fetcher is services.get_fetcher()
+    db.close()
+
+
+def test_instance_is_a_process_wide_singleton(monkeypatch):
+    monkeypatch.setattr(AppServices, '_instance', None)
+    first = AppServices.instance()
+    assert AppServices.instance() is first
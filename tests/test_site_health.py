@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip('requests')
+
+from http_cache import HttpCache
+from scraper import PriceScraper
+from site_health import CLOSED, OPEN, SiteHealth
+
+
+def test_cache_hit_does_not_close_the_circuit(server, tmp_path):
+    name, url_pattern, title, price = server.site_configs()[0]
+    site = {'id': 1, 'name': name, 'url_pattern': url_pattern, 'title_selector': title, 'price_selector': price}
+    health = SiteHealth(failure_threshold=1)
+    # 재시작 직후처럼 쿨다운이 끝난 열린 상태 (다음 요청 하나가 반쯤 열린 확인 요청)
+    health.seed({1: ([], 1)})
+    cache = HttpCache(str(tmp_path / 'cache.db'))
+    scraper = PriceScraper(cache=cache, health=health)
+    PriceScraper(cache=cache).fetch(url_pattern.format('phone'))
+    requests_before = server.requests
+
+    res = scraper.scrape_site(site, 'phone')
+    assert res['success'] and res['metrics']['cache'] == 'hit'
+    assert health.status(1) == OPEN
+
+    cache.clear()
+    res = scraper.scrape_site(site, 'phone')
+    assert res['success'] and res['metrics']['cache'] == 'miss'
+    assert health.status(1) == CLOSED
+    assert server.requests == requests_before + 1
+
+
+def test_open_circuit_still_serves_the_cache(server, tmp_path):
+    name, url_pattern, title, price = server.site_configs()[0]
+    site = {'id': 1, 'name': name, 'url_pattern': url_pattern, 'title_selector': title, 'price_selector': price}
+    health = SiteHealth(failure_threshold=1, cooldown=300)
+    health.record(1, 'timeout')
+    cache = HttpCache(str(tmp_path / 'cache.db'))
+    scraper = PriceScraper(cache=cache, health=health)
+    assert scraper.scrape_site(site, 'phone')['skipped']
+
+    PriceScraper(cache=cache).fetch(url_pattern.format('phone'))
+    assert scraper.scrape_site(site, 'phone')['success']
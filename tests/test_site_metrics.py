@@ -0,0 +1,20 @@
+def test_cache_hits_are_left_out_of_latency(db, site_id):
+    entries = [(site_id, {'outcome': 'ok', 'cache': 'miss', 'total_ms': ms, 'bytes': 1000}) for ms in (800, 1000, 1200)]
+    entries += [(site_id, {'outcome': 'ok', 'cache': 'hit', 'total_ms': 1, 'bytes': 0})] * 5
+    entries += [(site_id, {'outcome': 'ok', 'cache': 'revalidated', 'total_ms': 40, 'bytes': 0})] * 2
+    entries += [(site_id, {'outcome': 'timeout', 'total_ms': 10000})]
+    db.add_site_metrics(entries)
+
+    summary = db.get_site_metric_summary()[site_id]
+    assert summary['n'] == 11
+    assert summary['cached'] == 7
+    assert summary['p50_ms'] == 1000
+    assert summary['p95_ms'] == 10000
+    assert summary['avg_bytes'] == 750
+    assert summary['success_rate'] == 10 / 11
+
+
+def test_only_cached_requests(db, site_id):
+    db.add_site_metrics([(site_id, {'outcome': 'ok', 'cache': 'hit', 'total_ms': 1})])
+    summary = db.get_site_metric_summary()[site_id]
+    assert (summary['cached'], summary['p50_ms'], summary['p95_ms']) == (1, None, None)
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip('flet')
+
+import main
+from maintenance import DatabaseMaintenance
+from services import AppServices
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Page:
+    """Stand-in for ft.Page that records when the shell is first added."""
+
+    def __init__(self):
+        self.added = threading.Event()
+
+    def add(self, *controls):
+        self.added.set()
+
+    def update(self, *controls):
+        pass
+
+    def run_threadsafe(self, fn, *args):
+        fn(*args)
+
+
+class SlowServices(AppServices):
+    def __init__(self, db_name):
+        super().__init__(db_name=db_name)
+        self.release = threading.Event()
+
+    def get_db(self):
+        self.release.wait(5)
+        return super().get_db()
+
+
+def test_importing_main_does_not_load_scraping():
+    code = ('import sys, main; '
+            "print(','.join(m for m in ('requests', 'bs4', 'lxml', 'scraper', 'auto_discovery') if m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ''
+
+
+def test_shell_is_shown_before_the_database_opens(tmp_path, monkeypatch):
+    # 위젯 구성은 설치된 flet 버전에 따라 다르므로 순서만 확인
+    monkeypatch.setattr(main.PriceCompareMobile, 'setup_ui', lambda self: self.page.add())
+    shown = threading.Event()
+    monkeypatch.setattr(main.PriceCompareMobile, 'render_sites', lambda self, sites, stats=None: None)
+    monkeypatch.setattr(main.PriceCompareMobile, 'render_products', lambda self, products: shown.set())
+    # DB 를 열 때 예약되는 정리 작업은 이 테스트와 무관
+    monkeypatch.setattr(DatabaseMaintenance, 'run_if_due', lambda self: None)
+    services = SlowServices(str(tmp_path / 'prices.db'))
+    page = Page()
+    app = main.PriceCompareMobile(page, services=services)
+    # DB 를 여는 동안에도 첫 화면은 이미 그려져 있음
+    assert page.added.is_set()
+    assert app.db is None and not app.db_ready.is_set()
+
+    services.release.set()
+    assert app.db_ready.wait(5)
+    assert app.db is services.db
+    assert shown.wait(5)
+    services.db.close()
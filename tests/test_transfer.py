@@ -0,0 +1,57 @@
+from database_manager import DatabaseManager
+from maintenance import DatabaseMaintenance
+import transfer
+
+
+def _source_db(path):
+    db = DatabaseManager(path)
+    site_id = db.add_site('mall', 'http://mall.example/?q={}', '.name', '.price')
+    rows = [(db.get_or_create_product(f'product{i}'), site_id, 1000 + i, 'title', 'url') for i in range(5)]
+    db.add_prices(rows)
+    return db
+
+
+def test_prices_only_import_survives_maintenance(tmp_path):
+    src = _source_db(str(tmp_path / 'src.db'))
+    transfer.export_csv(src, str(tmp_path / 'dump'), tables=('prices',))
+    src.close()
+
+    db = DatabaseManager(str(tmp_path / 'dst.db'))
+    counts = transfer.import_records(db, transfer.read_csv(str(tmp_path / 'dump')))
+    assert counts == {'prices': 5}
+
+    stats = DatabaseMaintenance(db).run()
+    assert stats['purged_sites'] == 0
+    with db.get_connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM prices').fetchone()[0] == 5
+        assert conn.execute('SELECT is_active, imported FROM sites').fetchall() == [(0, 1)]
+    db.close()
+
+
+def test_site_config_fills_imported_site(tmp_path):
+    src = _source_db(str(tmp_path / 'src.db'))
+    transfer.export_jsonl(src, str(tmp_path / 'prices.jsonl'), tables=('prices',))
+    transfer.export_jsonl(src, str(tmp_path / 'sites.jsonl'), tables=('sites',))
+    src.close()
+
+    db = DatabaseManager(str(tmp_path / 'dst.db'))
+    transfer.import_records(db, transfer.read_jsonl(str(tmp_path / 'prices.jsonl')))
+    transfer.import_records(db, transfer.read_jsonl(str(tmp_path / 'sites.jsonl')))
+    assert db.get_site_configs()[0]['price_selector'] == '.price'
+    with db.get_connection() as conn:
+        assert conn.execute('SELECT COUNT(*), SUM(imported) FROM sites').fetchone() == (1, 0)
+    db.close()
+
+
+def test_deleted_imported_site_is_purged(tmp_path):
+    src = _source_db(str(tmp_path / 'src.db'))
+    transfer.export_jsonl(src, str(tmp_path / 'prices.jsonl'), tables=('prices',))
+    src.close()
+
+    db = DatabaseManager(str(tmp_path / 'dst.db'))
+    transfer.import_records(db, transfer.read_jsonl(str(tmp_path / 'prices.jsonl')))
+    with db.get_connection() as conn:
+        site_id = conn.execute('SELECT id FROM sites').fetchone()[0]
+    db.delete_site(site_id)
+    assert db.purge_deleted()['purged_sites'] == 1
+    db.close()
@@ -0,0 +1,138 @@
+"""Streaming export and import of sites, products, prices and search history.
+
+    python transfer.py export backup.jsonl.gz
+    python transfer.py export dump/ --format csv --gzip --tables prices
+    python transfer.py import backup.jsonl.gz --db prices_mobile.db
+
+JSONL dumps are one file with a "table" field on every line; CSV dumps are a
+directory with one <table>.csv(.gz) per table. Rows are written and read one
+at a time, so memory use does not grow with the size of the history. Imports
+commit every `batch_size` rows and merge into existing data (see
+DatabaseManager.import_rows), so the same dump can be imported twice.
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+
+from database_manager import DatabaseManager
+
+# 참조되는 쪽(쇼핑몰, 상품)을 먼저 기록
+TABLES = ('sites', 'products', 'search_history', 'prices', 'price_rollups')
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        # 기본값(9)은 압축률 차이에 비해 훨씬 느림
+        return gzip.open(path, mode + 't', compresslevel=6, encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def export_jsonl(db, path, tables=TABLES):
+    """Write the tables to one JSONL file (gzip if path ends in .gz). Returns {table: rows}."""
+    counts = {}
+    with _open(path, 'w') as f:
+        for table in tables:
+            counts[table] = 0
+            for row in db.export_rows(table):
+                f.write(json.dumps({'table': table, **row}, ensure_ascii=False) + '\n')
+                counts[table] += 1
+    return counts
+
+
+def export_csv(db, directory, tables=TABLES, compress=False):
+    """Write each table to <directory>/<table>.csv (.csv.gz with compress). Returns {table: rows}."""
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    for table in tables:
+        counts[table] = 0
+        path = os.path.join(directory, table + ('.csv.gz' if compress else '.csv'))
+        with _open(path, 'w') as f:
+            writer = csv.DictWriter(f, fieldnames=DatabaseManager.EXPORT_QUERIES[table][1])
+            writer.writeheader()
+            for row in db.export_rows(table):
+                writer.writerow(row)
+                counts[table] += 1
+    return counts
+
+
+def read_jsonl(path):
+    """Yield (table, row) pairs from a JSONL dump."""
+    with _open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                yield row.pop('table'), row
+
+
+def read_csv(directory, tables=TABLES):
+    """Yield (table, row) pairs from a CSV dump directory; empty cells become None."""
+    for table in tables:
+        for name in (table + '.csv', table + '.csv.gz'):
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                with _open(path, 'r') as f:
+                    for row in csv.DictReader(f):
+                        yield table, {k: (v if v != '' else None) for k, v in row.items()}
+
+
+def import_records(db, records, batch_size=20000, tables=TABLES):
+    """Import (table, row) pairs in transactions of up to batch_size rows. Returns {table: rows written}."""
+    counts = {}
+    batch = []
+    batch_table = None
+
+    def flush():
+        if batch:
+            counts[batch_table] = counts.get(batch_table, 0) + db.import_rows(batch_table, batch)
+            batch.clear()
+
+    for table, row in records:
+        if table not in tables:
+            continue
+        if table != batch_table or len(batch) >= batch_size:
+            flush()
+            batch_table = table
+        batch.append(row)
+    flush()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="가격 기록과 쇼핑몰 설정을 파일로 내보내거나 가져옵니다.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="DB 내용을 파일로 내보내기")
+    export.add_argument("path", help="JSONL 파일 (.gz 이면 압축) 또는 CSV 를 저장할 폴더")
+    export.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    export.add_argument("--gzip", action="store_true", help="CSV 파일을 gzip 으로 압축")
+    imp = sub.add_parser("import", help="내보낸 파일을 DB 에 합치기")
+    imp.add_argument("path", help="JSONL 파일 또는 CSV 폴더")
+    imp.add_argument("--batch-size", type=int, default=20000, help="한 트랜잭션에 쓰는 행 수")
+    for p in (export, imp):
+        p.add_argument("--db", default="prices_mobile.db")
+        p.add_argument("--tables", nargs="+", choices=TABLES, default=list(TABLES))
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db)
+    started = time.perf_counter()
+    try:
+        if args.command == "export":
+            if args.format == "csv":
+                counts = export_csv(db, args.path, args.tables, args.gzip)
+            else:
+                counts = export_jsonl(db, args.path, args.tables)
+        else:
+            records = read_csv(args.path, args.tables) if os.path.isdir(args.path) else read_jsonl(args.path)
+            counts = import_records(db, records, args.batch_size, args.tables)
+    finally:
+        db.close()
+    summary = ", ".join(f"{table} {n}" for table, n in counts.items())
+    print(f"{summary} ({time.perf_counter() - started:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())